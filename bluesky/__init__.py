@@ -1,4 +1,10 @@
 ''' BlueSky: The open-source ATM simulator.'''
+import sys
+from bluesky import startupprof
+if '--profile-startup' in sys.argv:
+    # Start profiling before the other bluesky modules are imported
+    startupprof.start()
+
 from bluesky import settings
 from bluesky.core import Signal
 from bluesky.pathfinder import resource
@@ -62,57 +68,71 @@ def init(mode='sim', configfile=None, scenfile=None, discoverable=False,
     globals()['gui'] = gui
 
     # Initialise resource localisation, and set custom working directory if present
-    from bluesky import pathfinder
-    pathfinder.init(workdir)
+    with startupprof.step('pathfinder'):
+        from bluesky import pathfinder
+        pathfinder.init(workdir)
 
     # Initialize global settings, possibly loading a custom config file
-    settings.init(configfile)
+    with startupprof.step('settings'):
+        settings.init(configfile)
 
     # Initialise tools
-    tools.init()
+    with startupprof.step('tools'):
+        tools.init()
 
     # Load navdatabase in all versions of BlueSky
     # Only the headless server doesn't need this
     if mode == "sim" or gui is not None:
-        from bluesky.navdatabase import Navdatabase
-        global navdb
-        navdb = Navdatabase()
+        with startupprof.step('navdb'):
+            from bluesky.navdatabase import Navdatabase
+            global navdb
+            navdb = Navdatabase()
 
     # If mode is server-gui or server-headless start the networking server
     if mode == 'server':
         global server
-        from bluesky.network.server import Server
-        server = Server(discoverable, configfile, scenfile)
+        with startupprof.step('server'):
+            from bluesky.network.server import Server
+            server = Server(discoverable, configfile, scenfile)
 
     # The remaining objects are only instantiated in the sim nodes
     if mode == 'sim':
-        from bluesky.traffic import Traffic
-        from bluesky.simulation import Simulation
-        if gui == 'pygame':
-            from bluesky.ui.pygame import Screen
-            from bluesky.network.detached import Node
-        else:
-            from bluesky.simulation import ScreenIO as Screen
-            if detached:
+        with startupprof.step('sim imports'):
+            from bluesky.traffic import Traffic
+            from bluesky.simulation import Simulation
+            if gui == 'pygame':
+                from bluesky.ui.pygame import Screen
                 from bluesky.network.detached import Node
             else:
-                from bluesky.network.node import Node
+                from bluesky.simulation import ScreenIO as Screen
+                if detached:
+                    from bluesky.network.detached import Node
+                else:
+                    from bluesky.network.node import Node
 
-        from bluesky.core import varexplorer
+            from bluesky.core import varexplorer
 
         # Initialize singletons
         global traf, sim, scr, net
-        traf = Traffic()
-        sim = Simulation()
-        scr = Screen()
-        net = Node(settings.simevent_port,
-                   settings.simstream_port)
+        with startupprof.step('traffic'):
+            traf = Traffic()
+        with startupprof.step('simulation'):
+            sim = Simulation()
+            scr = Screen()
+            net = Node(settings.simevent_port,
+                       settings.simstream_port)
 
         # Initialize remaining modules
         varexplorer.init()
         if scenfile:
             stack.stack(f'IC {scenfile}')
 
-    from bluesky.core import plugin
-    plugin.init(mode)
-    stack.init(mode)
+    with startupprof.step('plugins'):
+        from bluesky.core import plugin
+        plugin.init(mode)
+    with startupprof.step('stack'):
+        stack.init(mode)
+
+    if startupprof.active():
+        startupprof.stop()
+        print(startupprof.report())
@@ -49,6 +49,9 @@ def parse():
     parser.add_argument("--workdir", dest="workdir",
                         help="Set BlueSky working directory (if other than cwd or ~/bluesky).")
 
+    parser.add_argument("--profile-startup", dest="profile_startup", action="store_true",
+                        help="Print the time spent on imports and initialisation at startup.")
+
     cmdargs = parser.parse_args()
 
     return vars(cmdargs)
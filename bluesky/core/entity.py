@@ -23,9 +23,13 @@ class Proxy:
         for name in self._proxied:
             delattr(self, name)
         self._proxied.clear()
-        # Copy all public functions/methods of reference object
-        for name, value in inspect.getmembers(refobj, callable):
-            if name[0] != '_':
+        # Copy all public functions/methods of reference object. Properties
+        # are skipped: they are evaluated when accessed through __getattr__
+        for name in dir(refobj):
+            if name[0] == '_' or isinstance(getattr(type(refobj), name, None), property):
+                continue
+            value = getattr(refobj, name)
+            if callable(value):
                 self.__dict__[name] = value
                 self._proxied.append(name)
 
@@ -73,7 +77,11 @@ class EntityMeta(type):
                 cls.selected()._instance = super().__call__(*args, **kwargs)
             # Update the object the proxy is referring to
             refobj = cls.selected()._instance
+            oldobj = cls._proxy._refobj
             cls._proxy._replace(refobj)
+            if TrafficArrays.stateblock is not None:
+                # Only the selected implementation keeps its state in the block
+                TrafficArrays.stateblock.replace(oldobj, refobj)
             # Update the stack commands of this class
             for name, cmd in cls._stackcmds.items():
                 cmd.callback = getattr(refobj, name, cmd.notimplemented)
@@ -91,6 +99,12 @@ class Entity(Replaceable, TrafficArrays, metaclass=EntityMeta, replaceable=False
         super().select()
         _ = cls()
 
+    def isactive(self):
+        ''' Returns true if this instance is the selected implementation. '''
+        if self._proxy is None or self._proxy._refobj is self:
+            return super().isactive()
+        return False
+
     @classmethod
     def is_instantiated(cls):
         ''' Returns true if the singleton of this class has already been instantiated. '''
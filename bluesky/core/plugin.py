@@ -1,12 +1,17 @@
 """ Implementation of BlueSky's plugin system. """
 import ast
 import importlib
+import pickle
 from pathlib import Path
 import bluesky as bs
 from bluesky import plugins
 from bluesky import settings
 from bluesky.core import timed_function, varexplorer as ve
 from bluesky import stack
+from bluesky.tools import cachefile
+
+# Cache version of the parsed plugin information
+plugincache_version = 'v20261018'
 
 # Register settings defaults
 settings.set_variable_defaults(plugin_path='plugins', enabled_plugins=['datafeed'])
@@ -86,66 +91,103 @@ class Plugin:
 
     @classmethod
     def find_plugins(cls, reqtype):
-        ''' Create plugin wrapper objects based on source code of potential plug-in files. '''
+        ''' Create plugin wrapper objects based on source code of potential plug-in files.
+            The parsed plugin information is cached per file, and only parsed
+            again when the file has changed. '''
+        try:
+            with cachefile.openfile('plugins.p', plugincache_version) as cache:
+                parsed = cache.load()
+        except (pickle.PickleError, cachefile.CacheError, OSError, EOFError):
+            parsed = dict()
+        changed = False
+
         for path in (Path(p) for p in plugins.__spec__.submodule_search_locations):
             for fname in path.glob('**/*.py'):
                 submod = fname.relative_to(path).parent.as_posix().replace('/', '.')
                 fullname = f'bluesky.plugins.{fname.stem}' if submod == '.' else \
                            f'bluesky.plugins.{submod}.{fname.stem}'
-                with open(fname, 'rb') as f:
-                    source = f.read()
-                    try:
-                        tree = ast.parse(source)
-                    except:
-                        # Failed to parse source code, continue to next file
-                        continue
-
-                    ret_dicts = []
-                    ret_names = ['', '']
-                    for item in tree.body:
-                        if isinstance(item, ast.FunctionDef) and item.name == 'init_plugin':
-                            for iitem in reversed(item.body):
-                                # Return value of init_plugin should always be a tuple of two dicts
-                                # The first dict is the plugin config dict, the second dict is the stack function dict
-                                if isinstance(iitem, ast.Return):
-                                    if isinstance(iitem.value, ast.Tuple):
-                                        ret_dicts = iitem.value.elts
-                                    else:
-                                        ret_dicts = [iitem.value]
-                                    if len(ret_dicts) not in (1, 2):
-                                        print(f"{fname} looks like a plugin, but init_plugin() doesn't return one or two dicts")
-                                        continue
-                                    ret_names = [el.id if isinstance(el, ast.Name) else '' for el in ret_dicts]
-
-                                # Check if this is the assignment of one of the return values
-                                if isinstance(iitem, ast.Assign) and isinstance(iitem.value, ast.Dict):
-                                    for i, name in enumerate(ret_names):
-                                        if iitem.targets[0].id == name:
-                                            ret_dicts[i] = iitem.value
-
-                            # Parse the config dict
-                            cfgdict = {k.s:v for k,v in zip(ret_dicts[0].keys, ret_dicts[0].values)}
-                            plugintype = cfgdict.get('plugin_type')
-                            if plugintype is None:
-                                print(f'{fname} looks like a plugin, but no plugin type (sim/gui) is specified. ' 
-                                        'To fix this, add the element plugin_type to the configuration dictionary that is returned from init_plugin()')
-                                continue
-                            if plugintype.s == reqtype:
-                                # This is the initialization function of a bluesky plugin. Parse the contents
-                                plugin = Plugin(fullname)
-                                plugin.plugin_doc = ast.get_docstring(tree)
-                                plugin.plugin_name = cfgdict['plugin_name'].s
-                                plugin.plugin_type = cfgdict['plugin_type'].s
-
-                                # Parse the stack function dict
-                                if len(ret_dicts) > 1:
-                                    stack_keys       = [el.s for el in ret_dicts[1].keys]
-                                    stack_docs       = [el.elts[-1].s for el in ret_dicts[1].values]
-                                    plugin.plugin_stack = list(zip(stack_keys, stack_docs))
-                                # Add plugin to the dict of available plugins
-                                cls.plugins[plugin.plugin_name.upper()] = plugin
+                stat = fname.stat()
+                key, fileid = str(fname), (stat.st_mtime_ns, stat.st_size)
+                if key not in parsed or parsed[key][0] != fileid:
+                    parsed[key] = (fileid, cls.parse_plugin(fname))
+                    changed = True
+                info = parsed[key][1]
+                if info is None:
+                    continue
+                if info['plugin_type'] == reqtype:
+                    plugin = Plugin(fullname)
+                    plugin.plugin_doc = info['plugin_doc']
+                    plugin.plugin_name = info['plugin_name']
+                    plugin.plugin_type = info['plugin_type']
+                    plugin.plugin_stack = info['plugin_stack']
+                    # Add plugin to the dict of available plugins
+                    cls.plugins[plugin.plugin_name.upper()] = plugin
+                else:
+                    cls.plugins_ext.append(info['plugin_name'].upper())
+
+        if changed:
+            try:
+                with cachefile.openfile('plugins.p', plugincache_version) as cache:
+                    cache.dump(parsed)
+            except OSError:
+                pass
+
+    @staticmethod
+    def parse_plugin(fname):
+        ''' Parse the source code of a potential plug-in file. Returns a dict
+            with the plugin type, name, docstring and stack commands, or None
+            if the file is not a plugin. '''
+        with open(fname, 'rb') as f:
+            source = f.read()
+            try:
+                tree = ast.parse(source)
+            except:
+                # Failed to parse source code, continue to next file
+                return None
+
+            ret_dicts = []
+            ret_names = ['', '']
+            for item in tree.body:
+                if isinstance(item, ast.FunctionDef) and item.name == 'init_plugin':
+                    for iitem in reversed(item.body):
+                        # Return value of init_plugin should always be a tuple of two dicts
+                        # The first dict is the plugin config dict, the second dict is the stack function dict
+                        if isinstance(iitem, ast.Return):
+                            if isinstance(iitem.value, ast.Tuple):
+                                ret_dicts = iitem.value.elts
                             else:
-                                cls.plugins_ext.append(cfgdict['plugin_name'].s.upper())
+                                ret_dicts = [iitem.value]
+                            if len(ret_dicts) not in (1, 2):
+                                print(f"{fname} looks like a plugin, but init_plugin() doesn't return one or two dicts")
+                                continue
+                            ret_names = [el.id if isinstance(el, ast.Name) else '' for el in ret_dicts]
+
+                        # Check if this is the assignment of one of the return values
+                        if isinstance(iitem, ast.Assign) and isinstance(iitem.value, ast.Dict):
+                            for i, name in enumerate(ret_names):
+                                if iitem.targets[0].id == name:
+                                    ret_dicts[i] = iitem.value
+
+                    # Parse the config dict
+                    cfgdict = {k.s:v for k,v in zip(ret_dicts[0].keys, ret_dicts[0].values)}
+                    plugintype = cfgdict.get('plugin_type')
+                    if plugintype is None:
+                        print(f'{fname} looks like a plugin, but no plugin type (sim/gui) is specified. ' 
+                                'To fix this, add the element plugin_type to the configuration dictionary that is returned from init_plugin()')
+                        continue
+                    # This is the initialization function of a bluesky plugin. Parse the contents
+                    info = dict(plugin_type=plugintype.s,
+                                plugin_name=cfgdict['plugin_name'].s,
+                                plugin_doc=ast.get_docstring(tree),
+                                plugin_stack=[])
+
+                    # Parse the stack function dict
+                    if len(ret_dicts) > 1:
+                        stack_keys       = [el.s for el in ret_dicts[1].keys]
+                        stack_docs       = [el.elts[-1].s for el in ret_dicts[1].values]
+                        info['plugin_stack'] = list(zip(stack_keys, stack_docs))
+                    return info
+        return None
 
 
 def init(mode):
@@ -0,0 +1,159 @@
+''' Wall-clock profiler of the phases of the simulation step. '''
+from bisect import bisect
+from time import perf_counter
+from types import SimpleNamespace
+import numpy as np
+import bluesky as bs
+from bluesky import settings
+
+
+# Histogram bin edges of the recorded wall times [s]: four bins per decade,
+# from 1 us to 10 s. The first and last bins also count the samples outside
+# this range.
+edges = list(10.0 ** np.arange(-6.0, 1.01, 0.25))
+
+# Profiler state: when inactive, tic() and toc() return immediately
+_prof = SimpleNamespace(active=False, tstart=0.0, nsteps=0)
+
+# Recorded statistics per phase
+phases = dict()
+
+
+class Phase:
+    ''' Wall time statistics of one phase of the simulation step. '''
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.tmin = float('inf')
+        self.tmax = 0.0
+        self.hist = [0] * (len(edges) + 1)
+
+    def record(self, dt):
+        ''' Add one wall time sample [s]. '''
+        self.count += 1
+        self.total += dt
+        self.tmin = min(self.tmin, dt)
+        self.tmax = max(self.tmax, dt)
+        self.hist[bisect(edges, dt)] += 1
+
+    def mean(self):
+        ''' Mean wall time of this phase [s]. '''
+        return self.total / max(1, self.count)
+
+
+def active():
+    ''' Returns True if the profiler is recording. '''
+    return _prof.active
+
+
+def tic():
+    ''' Start timing a phase. Returns the start time. '''
+    return perf_counter() if _prof.active else 0.0
+
+
+def toc(name, t0):
+    ''' Record the wall time since t0 for the phase with the given name.
+        Returns the end time, so that it can be the start of the next phase. '''
+    if not _prof.active:
+        return 0.0
+    t1 = perf_counter()
+    record(name, t1 - t0)
+    return t1
+
+
+def record(name, dt):
+    ''' Add a wall time sample [s] to the phase with the given name. '''
+    phase = phases.get(name)
+    if phase is None:
+        phase = phases[name] = Phase(name)
+    phase.record(dt)
+
+
+def step():
+    ''' Count the simulation steps while the profiler is recording. '''
+    if _prof.active:
+        _prof.nsteps += 1
+
+
+def start():
+    ''' Clear the recorded statistics and start recording. '''
+    phases.clear()
+    _prof.nsteps = 0
+    _prof.tstart = perf_counter()
+    _prof.active = True
+
+
+def stop():
+    ''' Stop recording. The recorded statistics are kept. '''
+    _prof.active = False
+
+
+def reset():
+    ''' Stop recording and clear the recorded statistics. '''
+    stop()
+    phases.clear()
+    _prof.nsteps = 0
+
+
+def summary():
+    ''' Return the recorded statistics as a dict of arrays,
+        which is sent to the clients in the PROFILE stream. '''
+    names = list(phases)
+    return dict(names=names,
+                nsteps=_prof.nsteps,
+                walltime=(perf_counter() - _prof.tstart) if _prof.active else 0.0,
+                count=np.array([phases[n].count for n in names], dtype=int),
+                total=np.array([phases[n].total for n in names]),
+                mean=np.array([phases[n].mean() for n in names]),
+                tmin=np.array([phases[n].tmin for n in names]),
+                tmax=np.array([phases[n].tmax for n in names]),
+                edges=np.array(edges),
+                hist=np.array([phases[n].hist for n in names], dtype=int).reshape(-1, len(edges) + 1))
+
+
+def text(nlines=20):
+    ''' Return a table of the phases with the largest total wall times. '''
+    lines = [f'Profile of {_prof.nsteps} simulation steps',
+             f'{"Phase":<40s}{"count":>8s}{"total [s]":>11s}{"mean [ms]":>11s}{"max [ms]":>10s}']
+    for phase in sorted(phases.values(), key=lambda p: -p.total)[:nlines]:
+        lines.append(f'{phase.name:<40s}{phase.count:8d}{phase.total:11.3f}'
+                     f'{1e3 * phase.mean():11.3f}{1e3 * phase.tmax:10.3f}')
+    return '\n'.join(lines)
+
+
+def dump(fname=''):
+    ''' Write the recorded statistics to a file in the log directory. '''
+    from bluesky.tools.datalog import makeLogfileName
+    fpath = makeLogfileName('SIMPROF') if not fname else \
+        bs.resource(settings.log_path) / fname
+    fpath.parent.mkdir(parents=True, exist_ok=True)
+    with open(fpath, 'w') as fout:
+        fout.write(f'# Wall time profile of {_prof.nsteps} simulation steps\n')
+        fout.write('# Histogram bin edges [s]: ' +
+                   ', '.join(f'{e:.3g}' for e in edges) + '\n')
+        fout.write('# phase, count, total [s], mean [s], min [s], max [s], histogram counts\n')
+        for phase in phases.values():
+            fout.write(f'{phase.name}, {phase.count}, {phase.total:.6f}, '
+                       f'{phase.mean():.9f}, {phase.tmin:.9f}, {phase.tmax:.9f}, ' +
+                       ', '.join(str(c) for c in phase.hist) + '\n')
+    return fpath
+
+
+def simprof(cmd='', fname=''):
+    ''' SIMPROF ON/OFF/DUMP [fname]: Profile the wall time of the phases
+        of the simulation step. '''
+    if cmd == 'ON':
+        start()
+        return True, 'Simulation profiler started'
+    if cmd == 'OFF':
+        stop()
+        return True, 'Simulation profiler stopped\n' + text()
+    if cmd == 'DUMP':
+        if not phases:
+            return False, 'SIMPROF: No profile data recorded'
+        fpath = dump(fname)
+        return True, f'Simulation profile written to {fpath}'
+    if cmd:
+        return False, f'SIMPROF: Unknown option {cmd}'
+    return True, f'Simulation profiler is {"ON" if _prof.active else "OFF"}\n' + text()
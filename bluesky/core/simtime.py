@@ -4,7 +4,9 @@ from collections import OrderedDict
 from inspect import signature
 from types import SimpleNamespace
 from decimal import Decimal
+import numpy as np
 from bluesky import settings
+from bluesky.core import simprof
 
 
 # Register settings defaults
@@ -16,6 +18,7 @@ MAX_RECOVERY_FAC = 4
 _clock = SimpleNamespace(t=Decimal('0.0'), dt=Decimal(repr(settings.simdt)),
                          ft=0.0, fdt=settings.simdt)
 _timers = OrderedDict()
+_schedules = OrderedDict()
 
 # Dictionaries of timed functions for different trigger points
 preupdate_funs = OrderedDict()
@@ -63,16 +66,32 @@ def step(recovery_time=0):
 
 def preupdate():
     ''' Update function executed before traffic update.'''
+    if simprof.active():
+        return profiled(preupdate_funs)
     for fun in preupdate_funs.values():
         fun.trigger()
 
 
 def update():
     ''' Update function executed after traffic update.'''
+    if simprof.active():
+        return profiled(update_funs)
     for fun in update_funs.values():
         fun.trigger()
 
 
+def profiled(funs):
+    ''' Trigger timed functions, and record the wall time of the functions
+        that are called in this timestep. '''
+    for name, fun in funs.items():
+        if fun.timer is None or fun.timer.counter == 0:
+            t0 = simprof.tic()
+            fun.trigger()
+            simprof.toc(name, t0)
+        else:
+            fun.trigger()
+
+
 def reset():
     ''' Reset function executed when simulation is reset.'''
     # Call plugin reset for plugins that have one
@@ -86,6 +105,59 @@ def reset():
     _clock.fdt = float(_clock.dt)
     for timer in _timers.values():
         timer.reset()
+    for schedule in _schedules.values():
+        schedule.reset()
+
+
+def setschedule(name='', nsub=None):
+    ''' Set the number of intervals over which aircraft without priority
+        are spread in the adaptive schedule of a timed function. Without
+        arguments, the schedules and the fraction of work they saved are
+        listed. '''
+    if not name:
+        text = 'Adaptive schedules:'
+        for schedule in _schedules.values():
+            text += '\n' + schedule.info()
+        return True, text
+    schedule = _schedules.get(name.upper())
+    if schedule is None:
+        return False, f'Schedule {name} not found'
+    if nsub is None:
+        return True, schedule.info()
+    schedule.nsub = max(1, int(nsub))
+    schedule.nupdated = schedule.ntotal = 0
+    if schedule.nsub == 1:
+        return True, f'{schedule.name}: all aircraft are updated in each interval'
+    return True, f'{schedule.name}: aircraft without priority are updated ' + \
+        f'once every {schedule.nsub} intervals'
+
+
+def getstate():
+    ''' Return the state of the simulation clock and all timers. '''
+    timers = {name: (timer.dt_requested, timer.dt_act, timer.rel_freq,
+                     timer.counter, timer.tprev) for name, timer in _timers.items()}
+    schedules = {name: (schedule.nsub, schedule.phase, schedule.nupdated,
+                        schedule.ntotal) for name, schedule in _schedules.items()}
+    return dict(t=_clock.t, dt=_clock.dt, timers=timers, schedules=schedules)
+
+
+def setstate(state):
+    ''' Restore the state of the simulation clock and timers obtained with
+        getstate(). Timers that don't exist (anymore) are skipped. '''
+    _clock.t = state['t']
+    _clock.dt = state['dt']
+    _clock.ft = float(_clock.t)
+    _clock.fdt = float(_clock.dt)
+    for name, (dt_requested, dt_act, rel_freq, counter, tprev) in state['timers'].items():
+        timer = _timers.get(name)
+        if timer is not None:
+            timer.dt_requested, timer.dt_act = dt_requested, dt_act
+            timer.rel_freq, timer.counter, timer.tprev = rel_freq, counter, tprev
+    for name, (nsub, phase, nupdated, ntotal) in state.get('schedules', {}).items():
+        schedule = _schedules.get(name)
+        if schedule is not None:
+            schedule.nsub, schedule.phase = nsub, phase
+            schedule.nupdated, schedule.ntotal = nupdated, ntotal
 
 
 class Timer:
@@ -157,6 +229,69 @@ class Timer:
         return elapsed
 
 
+class Schedule:
+    ''' Adaptive schedule of the per-aircraft work of a timed function.
+
+        Aircraft with priority are updated in each interval of the timer,
+        the other aircraft are spread over nsub consecutive intervals, so
+        that each of them is updated once every nsub intervals. With
+        pairwise=True, the work is counted in aircraft pairs of which at
+        least one aircraft is updated, otherwise in aircraft. '''
+    @classmethod
+    def makeschedule(cls, name, pairwise=False):
+        ''' Create and return a new schedule if none with the given name
+            exists. Return existing schedule if present. '''
+        return _schedules.get(name.upper()) or cls(name, pairwise)
+
+    def __init__(self, name, pairwise=False):
+        self.name = name
+        self.pairwise = pairwise
+        self.nsub = 1
+        self.phase = 0
+        # Work done, and work that would be done without this schedule
+        self.nupdated = 0
+        self.ntotal = 0
+
+        # Add self to dictionary of schedules
+        _schedules[name.upper()] = self
+
+    def reset(self):
+        ''' Reset the schedule: all aircraft are updated in each interval. '''
+        self.nsub = 1
+        self.phase = 0
+        self.nupdated = 0
+        self.ntotal = 0
+
+    def select(self, priority):
+        ''' Return a boolean mask of the aircraft to update in this interval,
+            or None when all aircraft are updated. priority is a function
+            that returns a boolean mask of the aircraft with priority. '''
+        if self.nsub < 2:
+            return None
+        prio = priority()
+        ntraf = len(prio)
+        active = prio | (np.arange(ntraf) % self.nsub == self.phase)
+        self.phase = (self.phase + 1) % self.nsub
+        nactive = np.count_nonzero(active)
+        if self.pairwise:
+            # Pairs of two aircraft that are not updated are skipped
+            nskipped = (ntraf - nactive) * (ntraf - nactive - 1)
+            self.nupdated += ntraf * (ntraf - 1) - nskipped
+            self.ntotal += ntraf * (ntraf - 1)
+        else:
+            self.nupdated += nactive
+            self.ntotal += ntraf
+        return active
+
+    def saved(self):
+        ''' Return the fraction of the work that was skipped. '''
+        return 1.0 - self.nupdated / self.ntotal if self.ntotal else 0.0
+
+    def info(self):
+        ''' Return a text with the settings and savings of this schedule. '''
+        return f'{self.name}: nsub = {self.nsub}, {100.0 * self.saved():.1f}% of work saved'
+
+
 class TimedFunction:
     ''' Wrapper object to hold (periodically) timed functions. '''
     def __init__(self, fun, name, dt=0, hook=''):
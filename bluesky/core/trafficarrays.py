@@ -10,6 +10,9 @@ import numpy as np
 
 defaults = {"float": 0.0, "int": 0, "uint":0, "bool": False, "S": "", "str": ""}
 
+# Minimum number of elements allocated for each traffic array
+mincapacity = 16
+
 
 class RegisterElementParameters:
     """ Class to use in 'with'-syntax. This class automatically
@@ -30,13 +33,22 @@ class RegisterElementParameters:
 class TrafficArrays:
     """ Parent class to use separate arrays and lists to allow
         vectorizing but still maintain and object like benefits
-        for creation and deletion of an element for all parameters"""
+        for creation and deletion of an element for all parameters
+
+        Numpy traffic arrays are stored in pre-allocated buffers that grow
+        geometrically, and the registered attributes are views of the first
+        ntraf elements of these buffers. When an attribute is replaced by
+        a new array (e.g., self.alt = self.alt + dalt), its contents are
+        copied back into the buffer at the next create. """
 
     # The TrafficArrays class keeps track of all of the constructed
     # TrafficArray objects
     root = None
     ntraf = 0
 
+    # Optional contiguous storage for all float traffic arrays
+    stateblock = None
+
     @staticmethod
     def setroot(obj):
         ''' This function is used to set the root of the tree of TrafficArray
@@ -51,6 +63,7 @@ class TrafficArrays:
         self._children = []
         self._ArrVars  = []
         self._LstVars  = []
+        self._buffers  = dict()
 
     def reparent(self, newparent):
         ''' Give TrafficArrays object a new parent. '''
@@ -59,6 +72,20 @@ class TrafficArrays:
         newparent._children.append(self)
         self._parent = newparent
 
+    @staticmethod
+    def enablestateblock():
+        ''' Store all float traffic arrays that are allocated from now on
+            as rows of one contiguous state block. '''
+        if TrafficArrays.stateblock is None:
+            TrafficArrays.stateblock = StateBlock()
+        return TrafficArrays.stateblock
+
+    def isactive(self):
+        ''' Returns true if this object is part of the active traffic tree.
+            (Instances of replaceable implementations that are not selected
+            are kept up to date, but are not active.) '''
+        return self._parent is None or self._parent.isactive()
+
     def settrafarrays(self):
         ''' Convenience function for with-style traffic array registration. '''
         return RegisterElementParameters(self)
@@ -87,9 +114,31 @@ class TrafficArrays:
             lst.extend([defaults.get(vartype)] * n)
 
         for v in self._ArrVars:  # Numpy array
-            # Get type without byte length
-            vartype = ''.join(c for c in str(self.__dict__[v].dtype) if c.isalpha())
-            self.__dict__[v] = np.append(self.__dict__[v], [defaults.get(vartype, 0)] * n)
+            arr = self.__dict__[v]
+            nold = len(arr)
+            buf, view, default = self._buffers.get(v, (None, None, None))
+            if buf is None or buf.dtype != arr.dtype or nold + n > len(buf):
+                if TrafficArrays.stateblock is not None and arr.dtype == np.float64 \
+                        and self.isactive():
+                    # Float arrays are stored in a row of the state block
+                    buf = TrafficArrays.stateblock.row(self, v, nold + n)
+                else:
+                    # Allocate a new buffer, at least doubling its size when growing
+                    capacity = max(mincapacity, nold + n, 0 if buf is None else len(buf))
+                    if buf is not None and nold + n > len(buf):
+                        capacity = max(capacity, 2 * len(buf))
+                    buf = np.empty(capacity, dtype=arr.dtype)
+                buf[:nold] = arr
+                # Get type without byte length
+                vartype = ''.join(c for c in str(arr.dtype) if c.isalpha())
+                default = defaults.get(vartype, 0)
+            elif arr is not view:
+                # The attribute was replaced by a new array: copy it to the buffer
+                buf[:nold] = arr
+
+            buf[nold:nold + n] = default
+            view = self.__dict__[v] = buf[:nold + n]
+            self._buffers[v] = (buf, view, default)
 
     def istrafarray(self, name):
         ''' Returns true if parameter 'name' is a traffic array. '''
@@ -101,20 +150,62 @@ class TrafficArrays:
             child.create(n)
             child.create_children(n)
 
+    def unalias(self):
+        ''' Give replaced traffic arrays that are views of another array
+            (e.g., gs = tas) their own copy, so that compacting a buffer in
+            place doesn't change them. '''
+        for v in self._ArrVars:
+            arr = self.__dict__[v]
+            if arr.base is not None and arr is not self._buffers.get(v, (None, None))[1]:
+                self.__dict__[v] = arr.copy()
+        for child in self._children:
+            child.unalias()
+
     def delete(self, idx):
         ''' Aircraft delete. '''
+        # Arrays can alias the buffers of other objects in the tree
+        if self is TrafficArrays.root or self._parent is None:
+            self.unalias()
+
         # Remove element (aircraft) idx from all lists and arrays
         for child in self._children:
             child.delete(idx)
 
+        # Compact all arrays and lists in one pass, using a mask of the
+        # elements to keep
+        multi = isinstance(idx, Collection)
+        masks = dict()
+        def keepmask(nold):
+            if nold not in masks:
+                masks[nold] = np.ones(nold, dtype=bool)
+                masks[nold][idx] = False
+            return masks[nold]
+
         for v in self._ArrVars:
-            self.__dict__[v] = np.delete(self.__dict__[v], idx)
+            arr = self.__dict__[v]
+            buf, view, default = self._buffers.get(v, (None, None, None))
+            if arr is not view:
+                self.__dict__[v] = np.delete(arr, idx)
+                continue
+
+            # Compact in place in the buffer
+            nold = len(arr)
+            if multi:
+                keep = keepmask(nold)
+                nnew = np.count_nonzero(keep)
+                buf[:nnew] = arr[keep]
+            else:
+                nnew = nold - 1
+                buf[idx:nnew] = buf[idx + 1:nold]
+            view = self.__dict__[v] = buf[:nnew]
+            self._buffers[v] = (buf, view, default)
 
         if self._LstVars:
-            if isinstance(idx, Collection):
-                for i in reversed(idx):
-                    for v in self._LstVars:
-                        del self.__dict__[v][i]
+            if multi:
+                for v in self._LstVars:
+                    lst = self.__dict__[v]
+                    keep = keepmask(len(lst)).tolist()
+                    lst[:] = [item for item, k in zip(lst, keep) if k]
             else:
                 for v in self._LstVars:
                     del self.__dict__[v][idx]
@@ -124,8 +215,171 @@ class TrafficArrays:
         for child in self._children:
             child.reset()
 
+        self._buffers.clear()
         for v in self._ArrVars:
             self.__dict__[v] = np.array([], dtype=self.__dict__[v].dtype)
 
         for v in self._LstVars:
             self.__dict__[v] = []
+
+
+class StateBlock:
+    """ Contiguous storage of float traffic arrays.
+
+        All float64 traffic arrays of the traffic object tree are stored as
+        rows of one 2-D array, with the registered attributes being views of
+        the first ntraf elements of each row. A snapshot of the state of the
+        whole fleet is then a single copy of the block.
+
+        When a replaceable implementation (e.g., of CD or the performance
+        model) is replaced, the arrays of the old implementation are moved
+        out of the block, so that the block only contains the state of the
+        active traffic tree. """
+    def __init__(self):
+        self.data = np.empty((0, mincapacity))
+        # Traffic arrays (obj, varname) stored in the block, in row order
+        self.fields = []
+        self.rows = dict()
+
+    def row(self, obj, name, size):
+        ''' Return the block row for traffic array obj.name, and make sure
+            that it can hold size elements. '''
+        k = self.rows.get((id(obj), name))
+        if k is None:
+            k = self.rows[(id(obj), name)] = len(self.fields)
+            self.fields.append((obj, name))
+
+        nrows, capacity = self.data.shape
+        if k >= nrows or size > capacity:
+            self.grow(max(k + 1, 2 * nrows if k >= nrows else nrows),
+                      max(size, 2 * capacity) if size > capacity else capacity)
+        return self.data[k]
+
+    def grow(self, nrows, capacity):
+        ''' Reallocate the block, and move all traffic arrays to the new block. '''
+        data = np.empty((nrows, capacity))
+        data[:self.data.shape[0], :self.data.shape[1]] = self.data
+        self.rebind(data, range(len(self.fields)))
+
+    def rebind(self, data, rows):
+        ''' Make the traffic arrays of the fields in (old) rows views of the
+            consecutive rows of the new block data. '''
+        for knew, k in enumerate(rows):
+            obj, name = self.fields[k]
+            buf, view, default = obj._buffers.get(name, (None, None, None))
+            if buf is None or buf.base is not self.data:
+                continue
+            newview = data[knew, :len(view)]
+            if obj.__dict__[name] is view:
+                obj.__dict__[name] = newview
+            obj._buffers[name] = (data[knew], newview, default)
+        self.data = data
+
+    def replace(self, oldobj, newobj):
+        ''' Move the traffic arrays of oldobj and its children out of the
+            block, and those of newobj and its children into the block. '''
+        if oldobj is not None:
+            self.release(oldobj)
+        if newobj is not None:
+            self.attach(newobj)
+
+    def release(self, obj):
+        ''' Move the traffic arrays of obj and its children out of the block. '''
+        objs = set(map(id, subtree(obj)))
+        keep = [k for k, (o, _) in enumerate(self.fields) if id(o) not in objs]
+        if len(keep) == len(self.fields):
+            return
+        for o, name in self.fields:
+            if id(o) not in objs:
+                continue
+            buf, view, default = o._buffers.get(name, (None, None, None))
+            if buf is None or buf.base is not self.data:
+                continue
+            buf = buf.copy()
+            newview = buf[:len(view)]
+            if o.__dict__[name] is view:
+                o.__dict__[name] = newview
+            o._buffers[name] = (buf, newview, default)
+
+        self.rebind(self.data[keep], keep)
+        self.fields = [self.fields[k] for k in keep]
+        self.rows = {(id(o), name): k for k, (o, name) in enumerate(self.fields)}
+
+    def attach(self, obj):
+        ''' Store the float traffic arrays of obj and its children in the block. '''
+        for o in subtree(obj):
+            if not o.isactive():
+                continue
+            for v in o._ArrVars:
+                arr = o.__dict__[v]
+                if arr.dtype != np.float64 or (id(o), v) in self.rows:
+                    continue
+                buf = self.row(o, v, len(arr))
+                buf[:len(arr)] = arr
+                view = o.__dict__[v] = buf[:len(arr)]
+                o._buffers[v] = (buf, view, 0.0)
+
+    def sync(self):
+        ''' Copy traffic arrays that were replaced by new arrays back into
+            the block. '''
+        for k, (obj, name) in enumerate(self.fields):
+            arr = obj.__dict__[name]
+            buf, view, default = obj._buffers.get(name, (None, None, None))
+            if arr is not view and buf is not None and buf.base is self.data \
+                    and arr.dtype == np.float64 and len(arr) <= len(buf):
+                buf[:len(arr)] = arr
+                view = obj.__dict__[name] = buf[:len(arr)]
+                obj._buffers[name] = (buf, view, default)
+
+    def names(self):
+        ''' Return the names of the block rows, as attribute paths
+            relative to the traffic root object. '''
+        paths = treepaths()
+        return [paths.get(id(obj), type(obj).__name__ + '.') + name
+                for obj, name in self.fields]
+
+    def snapshot(self):
+        ''' Return a copy of the state of all aircraft, as a dict of
+            field name: array. The arrays are rows of one [nfields x ntraf]
+            array. '''
+        self.sync()
+        data = self.data[:len(self.fields), :TrafficArrays.root.ntraf].copy()
+        return dict(zip(self.names(), data))
+
+    def restore(self, state):
+        ''' Restore a state obtained with snapshot(). The number of aircraft
+            should be the same. Fields that are not in the block (anymore)
+            are skipped. '''
+        self.sync()
+        ntraf = TrafficArrays.root.ntraf
+        for k, name in enumerate(self.names()):
+            if name in state:
+                self.data[k, :ntraf] = state[name]
+
+
+def treepaths():
+    ''' Return the attribute paths (e.g., 'cd.') relative to the traffic
+        root object of the objects in the traffic tree, by object id.
+        Objects that are not an attribute of their parent (e.g., traffic
+        arrays of plugins) are not included. '''
+    paths = {id(TrafficArrays.root): ''}
+    def addchildren(parent):
+        for attr, child in parent.__dict__.items():
+            # Replaceable children are stored as a proxy of the instance
+            child = getattr(child, '_refobj', child)
+            if isinstance(child, TrafficArrays) and child in parent._children:
+                paths[id(child)] = paths[id(parent)] + attr + '.'
+                addchildren(child)
+    addchildren(TrafficArrays.root)
+    return paths
+
+
+def subtree(obj):
+    ''' Return obj and all its TrafficArrays descendants. '''
+    if '_children' not in obj.__dict__:
+        # Entities that don't use traffic arrays don't initialise them
+        return []
+    objs = [obj]
+    for child in obj._children:
+        objs.extend(subtree(child))
+    return objs
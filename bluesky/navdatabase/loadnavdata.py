@@ -4,11 +4,12 @@ import pickle
 from bluesky import settings
 from bluesky.tools import cachefile
 from .loadnavdata_txt import loadnavdata_txt, loadthresholds_txt
+from .navindex import NameIndex, GridIndex
 
 
 # Cache versions: increment these to the current date if the source data is updated
 # or other reasons why the cache needs to be updated
-navdb_version = 'v20170101'
+navdb_version = 'v20261018'
 
 ## Default settings
 settings.set_variable_defaults(navdata_path='navdata')
@@ -16,25 +17,31 @@ settings.set_variable_defaults(navdata_path='navdata')
 
 def load_navdata():
     ''' Load navigation database. '''
-    with cachefile.openfile('navdata.p', navdb_version) as cache:
+    with cachefile.openarrays('navdata', navdb_version) as cache:
         try:
-            wptdata       = cache.load()
-            awydata       = cache.load()
-            aptdata       = cache.load()
-            firdata       = cache.load()
-            codata        = cache.load()
-            rwythresholds = cache.load()
-        except (pickle.PickleError, cachefile.CacheError) as e:
+            wptdata       = cache.load('wpt')
+            awydata       = cache.load('awy')
+            aptdata       = cache.load('apt')
+            firdata       = cache.load('fir')
+            codata        = cache.load('co')
+            rwythresholds = cache.load('rwy')['rwythresholds']
+        except (pickle.PickleError, cachefile.CacheError, OSError, ValueError) as e:
             print(e.args[0])
 
             wptdata, aptdata, awydata, firdata, codata = loadnavdata_txt()
             rwythresholds = loadthresholds_txt()
 
-            cache.dump(wptdata)
-            cache.dump(awydata)
-            cache.dump(aptdata)
-            cache.dump(firdata)
-            cache.dump(codata)
-            cache.dump(rwythresholds)
+            # Name and spatial indices of waypoints and airports
+            wptdata['wpindex'] = NameIndex(wptdata['wpid'])
+            wptdata['wpgrid'] = GridIndex(wptdata['wplat'], wptdata['wplon'])
+            aptdata['apindex'] = NameIndex(aptdata['apid'])
+            aptdata['apgrid'] = GridIndex(aptdata['aplat'], aptdata['aplon'])
+
+            cache.dump('wpt', wptdata)
+            cache.dump('awy', awydata)
+            cache.dump('apt', aptdata)
+            cache.dump('fir', firdata)
+            cache.dump('co', codata)
+            cache.dump('rwy', dict(rwythresholds=rwythresholds))
 
     return wptdata, aptdata, awydata, firdata, codata, rwythresholds
@@ -24,6 +24,8 @@ class Navdatabase:
         wplat                     : latitude
         wplon                     : longitude
         wpco                      : country code
+        wpindex                   : index of the positions of each identifier
+        wpgrid                    : spatial index of the waypoints
 
         apid                      : list of identifier/short names
         apname                    : long name
@@ -33,6 +35,8 @@ class Navdatabase:
         apmaxrwy                  : max rwy length in meters
         apco                      : country code
         apelev                    : country code
+        aptindex                  : index of the positions of each identifier
+        aptgrid                   : spatial index of the airports
 
 
     Created by  : Jacco M. Hoekstra (TU Delft)
@@ -41,10 +45,33 @@ class Navdatabase:
     def __init__(self):
         """The navigation database: Contains waypoint, airport, airway, and sector data, but also
            geographical graphics data."""
-        # Variables are initialized in reset()
-        self.reset()
+        # Variables are initialized in reset(). With lazy startup, the
+        # database is loaded when one of its variables is first used.
+        self.changed = True
+        if not bs.settings.lazy_startup:
+            self.reset()
+
+    def __getattr__(self, name):
+        # Only called for variables that don't exist yet: load the database
+        if name.startswith('_') or self.loaded:
+            raise AttributeError(f"'Navdatabase' object has no attribute '{name}'")
+        self.load()
+        return getattr(self, name)
+
+    @property
+    def loaded(self):
+        ''' True when the database has been loaded. '''
+        return 'wpid' in self.__dict__
 
     def reset(self):
+        # Only reload when waypoints were added or deleted since the last load,
+        # and with lazy startup, when the database has been used
+        if not self.changed or (bs.settings.lazy_startup and not self.loaded):
+            return
+        self.load()
+
+    def load(self):
+        ''' Load the navigation database. '''
         print("Loading global navigation database...")
         wptdata, aptdata, awydata, firdata, codata, rwythresholds = load_navdata()
 
@@ -57,6 +84,8 @@ class Navdatabase:
         self.wpvar    = wptdata['wpvar']      # magn variation [deg]
         self.wpfreq   = wptdata['wpfreq']       # frequency [kHz/MHz]
         self.wpdesc   = wptdata['wpdesc']     # description
+        self.wpindex  = wptdata['wpindex']    # indices of each identifier
+        self.wpgrid   = wptdata['wpgrid']     # spatial index
 
         # Get airway legs data
         self.awfromwpid = awydata['awfromwpid']  # identifier (string)
@@ -79,6 +108,8 @@ class Navdatabase:
         self.aptype    = aptdata['aptype']    # type (int, 1=large, 2=medium, 3=small)
         self.aptco     = aptdata['apco']      # two char country code (string)
         self.aptelev   = aptdata['apelev']    # field elevation in meters [m] above mean sea level
+        self.aptindex  = aptdata['apindex']   # indices of each identifier
+        self.aptgrid   = aptdata['apgrid']    # spatial index
 
         # Get FIR data
         self.fir      = firdata['fir']        # fir name
@@ -94,6 +125,7 @@ class Navdatabase:
         self.conr     = codata['conr']        # country icao number
 
         self.rwythresholds = rwythresholds
+        self.changed = False
 
     def defwpt(self,name=None,lat=None,lon=None,wptype=None):
 
@@ -112,7 +144,7 @@ class Navdatabase:
         # No data: give info on waypoint
         elif lat==None or lon==None:
             reflat, reflon = bs.scr.getviewctr()
-            if self.wpid.count(name.upper()) > 0:
+            if name.upper() in self.wpindex:
                 i = self.getwpidx(name.upper(),reflat,reflon)
                 txt = self.wpid[i]+" : "+str(self.wplat[i])+","+str(self.wplon[i])
                 if len(self.wptype[i])>0:
@@ -138,21 +170,27 @@ class Navdatabase:
         self.wpfreq.append(0.0)               # frequency [kHz/MHz]
         self.wpdesc.append("Custom waypoint") # description
 
+        self.changed = True
+
+        # Add waypoint to the indices
+        self.wpindex.add(name.upper(), len(self.wpid) - 1)
+        self.wpgrid.add(len(self.wpid) - 1)
+
          # Update screen info
         bs.scr.addnavwpt(name.upper(),lat,lon)
 
         return True,name.upper()+" added to navdb."
     def delwpt(self,name=None):
         """ Delete a waypoint"""
-        if self.wpid.count(name.upper()) <= 0:
+        if name.upper() not in self.wpindex:
             return False,"Waypoint "+name.upper()+" does not exist."
 
-        idx = len(self.wpid)-self.wpid[::-1].index(name)-1 # Search from back of list
+        idx = self.wpindex[name.upper()][-1] # Last waypoint with this name
 
         del self.wpid[idx]   # wp name
 
-        np.delete(self.wplat,idx)  # wp lat
-        np.delete (self.wplon,idx) # wp lon
+        self.wplat = np.delete(self.wplat,idx)  # wp lat
+        self.wplon = np.delete(self.wplon,idx)  # wp lon
 
         del self.wptype[idx]        # Waypoint type
         del self.wpelev[idx]        # elevation [m]
@@ -160,6 +198,12 @@ class Navdatabase:
         del self.wpfreq[idx]        # frequency [kHz/MHz]
         del self.wpdesc[idx]        # description
 
+        self.changed = True
+
+        # Indices after the deleted waypoint have changed: rebuild indices
+        self.wpindex.build(self.wpid)
+        self.wpgrid.build(self.wplat, self.wplon)
+
          # Update screen info 9delete necessary there?)
         bs.scr.removenavwpt(name.upper())
 
@@ -167,82 +211,41 @@ class Navdatabase:
 
     def getwpidx(self, txt, reflat=999999., reflon=999999):
         """Get waypoint index to access data"""
-        name = txt.upper()
-        try:
-            i = self.wpid.index(name)
-        except:
+        idx = self.wpindex.get(txt.upper())
+        if not idx:
             return -1
 
-        # if no pos is specified, get first occurence
-        if not reflat < 99999.:
-            return i
+        # if no pos is specified, or there is only one, get first occurence
+        if not reflat < 99999. or len(idx) == 1:
+            return idx[0]
 
-        # If pos is specified check for more and return closest
-        else:
-            idx = []
-            idx.append(i)
-            found = True
-            while i < len(self.wpid) - 1 and found:
-                try:
-                    i = self.wpid.index(name, i + 1)
-                    idx.append(i)
-                except:
-                    found = False
-            if len(idx) == 1:
-                return idx[0]
-            else:
-                imin = idx[0]
-                dmin = geo.kwikdist(reflat, reflon, self.wplat[imin], self.wplon[imin])
-                for i in idx[1:]:
-                    d = geo.kwikdist(reflat, reflon, self.wplat[i], self.wplon[i])
-                    if d < dmin:
-                        imin = i
-                        dmin = d
-                return imin
+        # If pos is specified return closest
+        dist = geo.kwikdist(reflat, reflon, self.wplat[idx], self.wplon[idx])
+        return idx[np.argmin(dist)]
 
     def getwpindices(self, txt, reflat=999999., reflon=999999,crit=1852.0):
         """Get waypoint index to access data"""
-        name = txt.upper()
-        try:
-            i = self.wpid.index(name)
-        except:
+        idx = self.wpindex.get(txt.upper())
+        if not idx:
             return [-1]
 
-        # if no pos is specified, get first occurence
-        if not reflat < 99999.:
-            return [i]
+        # if no pos is specified, or there is only one, get first occurence
+        if not reflat < 99999. or len(idx) == 1:
+            return [idx[0]]
 
-        # If pos is specified check for more and return closest
-        else:
-            idx = findall(self.wpid,name) # find indices of al occurences
+        # If pos is specified find closest
+        dist = geo.kwikdist(reflat, reflon, self.wplat[idx], self.wplon[idx])
+        imin = idx[np.argmin(dist)]
 
-            if len(idx) == 1:
-                return [idx[0]]
-            else:
-                imin = idx[0]
-                dmin = geo.kwikdist(reflat, reflon, self.wplat[imin], self.wplon[imin])
-                for i in idx[1:]:
-                    d = geo.kwikdist(reflat, reflon, self.wplat[i], self.wplon[i])
-                    if d < dmin:
-                        imin = i
-                        dmin = d
-                # Find co-located
-                indices = [imin]
-                for i in idx:
-                    if i!=imin:
-                        dist = nm*geo.kwikdist(self.wplat[i], self.wplon[i], \
-                                            self.wplat[imin], self.wplon[imin])
-                        if dist<=crit:
-                            indices.append(i)
-
-                return indices
+        # Find co-located
+        dist = nm * geo.kwikdist(self.wplat[idx], self.wplon[idx],
+                                 self.wplat[imin], self.wplon[imin])
+        return [imin] + [i for i, d in zip(idx, dist) if i != imin and d <= crit]
 
     def getaptidx(self, txt):
         """Get waypoint index to access data"""
-        try:
-            return self.aptid.index(txt.upper())
-        except:
-            return -1
+        idx = self.aptindex.get(txt.upper())
+        return idx[0] if idx else -1
 
     def getinear(self, wlat, wlon, lat, lon):  # lat,lon in degrees
         # t0 = time.clock()
@@ -257,11 +260,13 @@ class Navdatabase:
 
     def getwpinear(self, lat, lon):  # lat,lon in degrees
         """Get closest waypoint index"""
-        return self.getinear(self.wplat, self.wplon, lat, lon)
+        idx = self.wpgrid.nearest(self.wplat, self.wplon, lat, lon)
+        return self.getinear(self.wplat, self.wplon, lat, lon) if idx is None else idx
 
     def getapinear(self, lat, lon):  # lat,lon in degrees
         """Get closest airport index"""
-        return self.getinear(self.aptlat, self.aptlon, lat, lon)
+        idx = self.aptgrid.nearest(self.aptlat, self.aptlon, lat, lon)
+        return self.getinear(self.aptlat, self.aptlon, lat, lon) if idx is None else idx
 
     def getinside(self, wlat, wlon, lat0, lat1, lon0, lon1):
         """Get indices inside given box"""
@@ -277,10 +282,14 @@ class Navdatabase:
 
     def getwpinside(self, lat0, lat1, lon0, lon1):
         """Get waypoint indices inside box"""
+        if lat0 < lat1 and lon0 < lon1:
+            return list(self.wpgrid.inside(self.wplat, self.wplon, lat0, lat1, lon0, lon1))
         return self.getinside(self.wplat, self.wplon, lat0, lat1, lon0, lon1)
 
     def getapinside(self, lat0, lat1, lon0, lon1):
         """Get airport indicex inside box"""
+        if lat0 < lat1 and lon0 < lon1:
+            return list(self.aptgrid.inside(self.aptlat, self.aptlon, lat0, lat1, lon0, lon1))
         return self.getinside(self.aptlat, self.aptlon, lat0, lat1, lon0, lon1)
 
     # returns all runways of given airport
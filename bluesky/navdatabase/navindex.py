@@ -0,0 +1,148 @@
+''' Name and spatial indices of the navigation database. '''
+import numpy as np
+
+
+class NameIndex:
+    ''' Index of the positions of each name in a list of names.
+
+        The index consists of an array of the sorted unique names, and the
+        positions sorted by name, so that the positions of a name are a
+        range of these sorted positions. Names that are added after the
+        index is built are kept in a dict, until the index is rebuilt.
+        Supports the lookups of a dict of lists: name in index,
+        index[name], index.get(name), and iterating over the names.
+
+        Arguments:
+        - names: list of names
+    '''
+    def __init__(self, names):
+        self.build(names)
+
+    def build(self, names):
+        ''' (Re)build the index for the given list of names. '''
+        names = np.array(names, dtype=str)
+        self.order = np.argsort(names, kind='stable').astype(np.int32)
+        self.names, start = np.unique(names[self.order], return_index=True)
+        self.start = np.append(start, len(names)).astype(np.int32)
+        self.extra = dict()
+
+    def add(self, name, idx):
+        ''' Add position idx of name, that was appended to the names. '''
+        self.extra.setdefault(name, []).append(idx)
+
+    def get(self, name, default=None):
+        ''' Positions of name in the list of names, in increasing order,
+            or default when the name is not in the list. '''
+        i = np.searchsorted(self.names, name)
+        idx = []
+        if i < len(self.names) and self.names[i] == name:
+            idx = self.order[self.start[i]:self.start[i + 1]].tolist()
+        idx += self.extra.get(name, [])
+        return idx or default
+
+    def __getitem__(self, name):
+        idx = self.get(name)
+        if idx is None:
+            raise KeyError(name)
+        return idx
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __iter__(self):
+        yield from self.names.tolist()
+        yield from (name for name in self.extra if name not in self.names)
+
+    def __len__(self):
+        return len(self.names) + sum(name not in self.names for name in self.extra)
+
+
+class GridIndex:
+    ''' Spatial index of a set of points on a lat/lon grid.
+
+        The indices of the points are sorted by grid cell, so that the points
+        of a cell are a range of these sorted indices. Points added after
+        the index is built are kept in a separate list, until the index is
+        rebuilt.
+
+        Arguments:
+        - lat, lon: position of the points [deg]
+        - cellsize: size of the grid cells [deg]
+    '''
+    def __init__(self, lat, lon, cellsize=1.0):
+        self.cellsize = cellsize
+        self.nlat = int(np.ceil(180.0 / cellsize))
+        self.nlon = int(np.ceil(360.0 / cellsize))
+        self.build(lat, lon)
+
+    def build(self, lat, lon):
+        ''' (Re)build the index for the given point positions. '''
+        cells = self.cellidx(np.asarray(lat), np.asarray(lon))
+        self.order = np.argsort(cells, kind='stable').astype(np.int32)
+        self.start = np.searchsorted(cells[self.order],
+                                     np.arange(self.nlat * self.nlon + 1)).astype(np.int32)
+        self.extra = []
+
+    def add(self, idx):
+        ''' Add the point with index idx, that was appended to the points. '''
+        self.extra.append(idx)
+
+    def cellrowcol(self, lat, lon):
+        ''' Row and column of the grid cell of the given positions. '''
+        row = np.clip(((np.asarray(lat) + 90.0) // self.cellsize).astype(int), 0, self.nlat - 1)
+        col = ((np.asarray(lon) + 180.0) // self.cellsize).astype(int) % self.nlon
+        return row, col
+
+    def cellidx(self, lat, lon):
+        ''' Index of the grid cell of the given positions. '''
+        row, col = self.cellrowcol(lat, lon)
+        return row * self.nlon + col
+
+    def candidates(self, row0, row1, col0, col1):
+        ''' Indices of the points in the cells in the given range of rows
+            and columns (inclusive), and of the points that were added. '''
+        rows = np.arange(max(0, row0), min(self.nlat - 1, row1) + 1)
+        cols = np.arange(col0, col1 + 1) % self.nlon
+        cells = np.unique((rows[:, np.newaxis] * self.nlon + cols).ravel())
+        start, end = self.start[cells], self.start[cells + 1]
+        count = end - start
+        # Concatenate the ranges of sorted indices of all cells
+        offsets = np.repeat(start - np.cumsum(count) + count, count)
+        idx = self.order[np.arange(len(offsets)) + offsets]
+        if self.extra:
+            idx = np.append(idx, self.extra)
+        return idx
+
+    def inside(self, wlat, wlon, lat0, lat1, lon0, lon1):
+        ''' Indices of the points within the given box, of which lat0 < lat1
+            and lon0 < lon1. '''
+        row0, col0 = self.cellrowcol(lat0, lon0)
+        row1, col1 = self.cellrowcol(lat1, lon1)
+        if lon1 - lon0 >= 360.0 - self.cellsize:
+            col0, col1 = 0, self.nlon - 1
+        idx = self.candidates(row0, row1, col0, col1 if col1 >= col0 else col1 + self.nlon)
+        lat, lon = wlat[idx], wlon[idx]
+        idx = idx[(lat > lat0) & (lat < lat1) & (lon > lon0) & (lon < lon1)]
+        return np.sort(idx)
+
+    def nearest(self, wlat, wlon, lat, lon):
+        ''' Index of the point closest to the given position, using the same
+            flat-earth distance as Navdatabase.getinear. Searches squares of
+            cells of increasing size around the position, until no point
+            outside the square can be closer. '''
+        f = np.cos(np.radians(lat))
+        row, col = self.cellrowcol(lat, lon)
+        k = 0
+        while k * self.cellsize < 180.0:
+            idx = self.candidates(row - k, row + k, col - k, col + k)
+            if len(idx) > 0:
+                dlat = (wlat[idx] - lat + 180.) % 360. - 180.
+                dlon = f * ((wlon[idx] - lon + 180.) % 360. - 180.)
+                d2 = dlat * dlat + dlon * dlon
+                # Points outside the square are at least k cells away
+                dmin = f * k * self.cellsize
+                if np.min(d2) <= dmin * dmin:
+                    # Lowest index of the closest points, like np.argmin
+                    return int(np.min(idx[d2 == np.min(d2)]))
+            k += 1
+        return None
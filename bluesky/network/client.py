@@ -7,7 +7,7 @@ from bluesky import settings
 from bluesky.core import Signal
 from bluesky.stack.clientstack import stack, process
 from bluesky.network.discovery import Discovery
-from bluesky.network.npcodec import encode_ndarray, decode_ndarray
+from bluesky.network.npcodec import encode_ndarray, decode_ndarray, unpackframes
 
 
 class Client:
@@ -169,14 +169,15 @@ class Client:
                     self.event(eventname, pydata, self.sender_id)
 
             if socks.get(self.stream_in) == zmq.POLLIN:
-                msg = self.stream_in.recv_multipart()
+                # Arrays in stream data use the memory of the received frames
+                topic, *frames = self.stream_in.recv_multipart(copy=False)
 
-                strmname = msg[0][:-5]
-                sender_id = msg[0][-5:]
+                strmname = topic.bytes[:-5]
+                sender_id = topic.bytes[-5:]
                 if self._getroute(sender_id) is None:
                     print('Client: Skipping stream data from unknown node')
                     return False
-                pydata = msgpack.unpackb(msg[1], object_hook=decode_ndarray, raw=False)
+                pydata = unpackframes(frames)
                 self.stream(strmname, pydata, sender_id)
 
             # If we are in discovery mode, parse this message
@@ -0,0 +1,122 @@
+''' Delta encoding of streams with per-aircraft data.
+
+    A stream frame is a dict with an id list of the aircraft, arrays with a
+    value per aircraft, and other (scalar) values. The encoder sends a
+    keyframe with all data at a fixed interval, and in between only the
+    values of the aircraft that changed. The id list is only sent when
+    aircraft are created or deleted. '''
+import numpy as np
+
+
+def reindex(previds, ids):
+    ''' Return the index in previds of each id in ids (-1 for new ids). '''
+    lookup = {acid: i for i, acid in enumerate(previds)}
+    return np.array([lookup.get(acid, -1) for acid in ids], dtype=np.int64)
+
+
+def take(arr, iprev):
+    ''' Reorder the rows of a per-aircraft array to a new id list. '''
+    if len(arr) == 0:
+        return np.zeros((len(iprev),) + arr.shape[1:], dtype=arr.dtype)
+    return arr[np.maximum(iprev, 0)]
+
+
+class DeltaEncoder:
+    ''' Encoder of a stream of per-aircraft data frames into keyframes and
+        delta frames. '''
+    def __init__(self, interval=25):
+        # Number of frames between keyframes
+        self.interval = interval
+        # Data of the last frame
+        self.prev = None
+        self.seq = 0
+        self.nextkey = 0
+
+    def keyframe(self):
+        ''' Make the next frame a keyframe. '''
+        self.prev = None
+
+    def encode(self, data):
+        ''' Encode the data of the next frame. The arrays in data shouldn't
+            be modified afterwards, as they are compared with the next frame. '''
+        ids = data['id']
+        frame = dict(seq=self.seq, key=False, data=dict(), rows=dict())
+        self.seq += 1
+        if self.prev is None or frame['seq'] >= self.nextkey:
+            frame.update(key=True, data=dict(data))
+            self.prev = data
+            self.nextkey = frame['seq'] + self.interval
+            return frame
+
+        previds = self.prev['id']
+        iprev = None
+        if list(ids) != list(previds):
+            frame['data']['id'] = ids
+            iprev = reindex(previds, ids)
+
+        for name, value in data.items():
+            if name == 'id':
+                continue
+            old = self.prev.get(name)
+            if not isperaircraft(value, ids) or not isperaircraft(old, previds) \
+                    or value.dtype != old.dtype or value.shape[1:] != old.shape[1:]:
+                frame['data'][name] = value
+                continue
+            if iprev is None:
+                changed = value != old
+            else:
+                changed = (iprev < 0) | (value != take(old, iprev))
+            if changed.ndim > 1:
+                changed = changed.reshape(len(ids), -1).any(axis=1)
+            idx = np.flatnonzero(changed)
+            if 2 * len(idx) > len(ids):
+                frame['data'][name] = value
+            elif len(idx):
+                frame['rows'][name] = (idx.astype(np.uint32), value[idx])
+
+        self.prev = data
+        return frame
+
+
+class DeltaDecoder:
+    ''' Decoder of a stream encoded with DeltaEncoder. '''
+    def __init__(self):
+        self.state = None
+        self.seq = -1
+
+    def decode(self, frame):
+        ''' Return the full data of a frame. Returns None when a frame was
+            missed, until the next keyframe is received. '''
+        if frame['key']:
+            self.state = dict(frame['data'])
+            self.seq = frame['seq']
+            return self.state
+
+        if self.state is None or frame['seq'] != self.seq + 1:
+            self.state = None
+            return None
+
+        state = dict(self.state)
+        previds = state['id']
+        ids = frame['data'].get('id', previds)
+        if ids is not previds:
+            iprev = reindex(previds, ids)
+            for name, value in state.items():
+                if name != 'id' and isperaircraft(value, previds):
+                    state[name] = take(value, iprev)
+
+        for name, (idx, values) in frame['rows'].items():
+            # Arrays of earlier frames are left as they are
+            value = np.array(state[name])
+            value[idx] = values
+            state[name] = value
+
+        state.update(frame['data'])
+        self.state = state
+        self.seq = frame['seq']
+        return state
+
+
+def isperaircraft(value, ids):
+    ''' Returns True if value is an array with a row per aircraft. '''
+    return isinstance(value, np.ndarray) and value.ndim > 0 and len(value) == len(ids)
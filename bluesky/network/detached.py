@@ -35,11 +35,24 @@ class Node:
         ''' Connect node to the BlueSky server. This does nothing in detached mode. '''
         pass
 
+    def fork(self):
+        ''' Fork the simulation process. The child process continues from
+            the same (copy-on-write) simulation state as a new node.
+
+            Returns the process id of the child in the parent, and 0 in the child. '''
+        pid = os.fork()
+        if pid == 0:
+            self.node_id = b'\x00' + os.urandom(4)
+        return pid
+
     def addnodes(self, count=1):
         pass
 
     def send_event(self, eventname, data=None, target=None):
         pass
 
-    def send_stream(self, name, data):
+    def subscribed(self, name):
+        return False
+
+    def send_stream(self, name, data, copy=True):
         pass
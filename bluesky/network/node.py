@@ -5,7 +5,7 @@ import msgpack
 import bluesky as bs
 from bluesky import stack
 from bluesky.core.walltime import Timer
-from bluesky.network.npcodec import encode_ndarray, decode_ndarray
+from bluesky.network.npcodec import encode_ndarray, decode_ndarray, packframes
 
 
 class Node:
@@ -15,9 +15,11 @@ class Node:
         self.running = True
         ctx = zmq.Context.instance()
         self.event_io = ctx.socket(zmq.DEALER)
-        self.stream_out = ctx.socket(zmq.PUB)
+        self.stream_out = ctx.socket(zmq.XPUB)
         self.event_port = event_port
         self.stream_port = stream_port
+        # Stream topics to which clients are subscribed
+        self.topics = set()
 
     def update(self):
         ''' Update timers and perform I/O. '''
@@ -36,6 +38,13 @@ class Node:
                 pydata = msgpack.unpackb(
                     data, object_hook=decode_ndarray, raw=False)
                 bs.sim.event(eventname, pydata, route)
+        # Keep track of the stream subscriptions of clients
+        while self.stream_out.getsockopt(zmq.EVENTS) & zmq.POLLIN:
+            msg = self.stream_out.recv()
+            if msg[:1] == b'\x01':
+                self.topics.add(msg[1:])
+            else:
+                self.topics.discard(msg[1:])
 
     def connect(self):
         ''' Connect node to the BlueSky server. '''
@@ -49,6 +58,25 @@ class Node:
         self.host_id = self.event_io.recv_multipart()[0]
         # print(f'Node connected, id={self.node_id}')
 
+    def fork(self):
+        ''' Fork the simulation process. The child process continues from
+            the same (copy-on-write) simulation state, and connects to the
+            server as a new node.
+
+            Returns the process id of the child in the parent, and 0 in the child. '''
+        pid = os.fork()
+        if pid == 0:
+            # The sockets of the parent process can't be used in the child.
+            # Keep them referenced, so that they are never closed from here.
+            self.parentio = (self.event_io.context, self.event_io, self.stream_out)
+            self.node_id = b'\x00' + os.urandom(4)
+            ctx = zmq.Context.instance()
+            self.event_io = ctx.socket(zmq.DEALER)
+            self.stream_out = ctx.socket(zmq.XPUB)
+            self.topics = set()
+            self.connect()
+        return pid
+
     def quit(self):
         ''' Quit the simulation process. '''
         self.running = False
@@ -77,5 +105,13 @@ class Node:
         pydata = msgpack.packb(data, default=encode_ndarray, use_bin_type=True)
         self.event_io.send_multipart(target + [eventname, pydata])
 
-    def send_stream(self, name, data):
-        self.stream_out.send_multipart([name + self.node_id, msgpack.packb(data, default=encode_ndarray, use_bin_type=True)])
+    def subscribed(self, name):
+        ''' Returns True if a client is subscribed to stream name of this node. '''
+        topic = name + self.node_id
+        return any(topic.startswith(sub) for sub in self.topics)
+
+    def send_stream(self, name, data, copy=True):
+        ''' Send data on stream name. With copy=False, the data of arrays is
+            sent without copying it, and these arrays shouldn't be modified
+            in place afterwards. '''
+        self.stream_out.send_multipart([name + self.node_id] + packframes(data), copy=copy)
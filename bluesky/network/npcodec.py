@@ -1,5 +1,9 @@
+import msgpack
 import numpy as np
 
+# Msgpack extension type of arrays of which the data is in a separate frame
+EXT_NDARRAY = 1
+
 def encode_ndarray(o):
     '''Msgpack encoder for numpy arrays.'''
     if isinstance(o, np.ndarray):
@@ -12,5 +16,35 @@ def encode_ndarray(o):
 def decode_ndarray(o):
     '''Msgpack decoder for numpy arrays.'''
     if o.get(b'numpy'):
-        return np.fromstring(o[b'data'], dtype=np.dtype(o[b'type'])).reshape(o[b'shape'])
+        return np.frombuffer(o[b'data'], dtype=np.dtype(o[b'type'])).reshape(o[b'shape']).copy()
     return o
+
+def packframes(data):
+    ''' Pack data into a list of message frames: the msgpack data in the
+        first frame, and the data of each numpy array in a frame of its own,
+        which zmq sends without copying it. '''
+    buffers = []
+
+    def encode(o):
+        if isinstance(o, np.ndarray) and not o.dtype.hasobject:
+            buffers.append(np.ascontiguousarray(o))
+            header = msgpack.packb((o.dtype.str, o.shape, len(buffers)))
+            return msgpack.ExtType(EXT_NDARRAY, header)
+        if isinstance(o, np.generic):
+            return o.item()
+        return encode_ndarray(o)
+
+    data = msgpack.packb(data, default=encode, use_bin_type=True)
+    return [data] + buffers
+
+def unpackframes(frames):
+    ''' Unpack message frames packed with packframes. Arrays are decoded
+        without copying their data from the frames. '''
+    def decode(code, header):
+        if code == EXT_NDARRAY:
+            dtype, shape, i = msgpack.unpackb(header)
+            return np.frombuffer(frames[i], dtype=np.dtype(dtype)).reshape(shape)
+        return msgpack.ExtType(code, header)
+
+    return msgpack.unpackb(frames[0], ext_hook=decode,
+                           object_hook=decode_ndarray, raw=False)
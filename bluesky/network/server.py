@@ -66,6 +66,8 @@ class Server(Thread):
                 args.extend(['--configfile', self.altconfig])
             if startscn:
                 args.extend(['--scenfile', startscn])
+            if '--profile-startup' in sys.argv:
+                args.append('--profile-startup')
             p = Popen(args)
             self.spawned_processes.append(p)
 
@@ -128,15 +130,15 @@ class Server(Thread):
                         self.discovery.send_reply(bs.settings.event_port,
                             bs.settings.stream_port)
                     continue
-                # Receive the message
-                msg = sock.recv_multipart()
+                # Receive the message. Stream data is forwarded without copying it
+                msg = sock.recv_multipart(copy=(sock != self.be_stream))
                 if not msg:
                     # In the rare case that a message is empty, skip remaning processing
                     continue
 
                 # Check if this is a stream message: these should be forwarded unprocessed.
                 if sock == self.be_stream:
-                    self.fe_stream.send_multipart(msg)
+                    self.fe_stream.send_multipart(msg, copy=False)
                 elif sock == self.fe_stream:
                     self.be_stream.send_multipart(msg)
                 else:
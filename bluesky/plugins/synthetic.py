@@ -118,8 +118,8 @@ def sphere(numac:int):
         traf.cre(acid=acidh, actype="SUPER", aclat=lat, aclon=lon,
                  achdg=track, acalt=highalt*ft, acspd=hispd)
 
-        idxl = traf.id.index(acidl)
-        idxh = traf.id.index(acidh)
+        idxl = traf.id2idx(acidl)
+        idxh = traf.id2idx(acidh)
 
         traf.vs[idxl] = vs
         traf.vs[idxh] = -vs
@@ -221,7 +221,7 @@ def floor():
     traf.cre(acid="OWNSHIP", actype="FLOOR",
              aclat=-1, aclon=0,
              achdg=90, acalt=(20000+altdif)*ft, acspd=200)
-    idx = traf.id.index("OWNSHIP")
+    idx = traf.id2idx("OWNSHIP")
     traf.selvs[idx] = -10
     traf.selalt[idx] = 20000-altdif
     for i in range(20):
@@ -1,2 +1,3 @@
 from .simulation import Simulation
 from .screenio import ScreenIO
+from . import simstate
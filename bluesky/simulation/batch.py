@@ -0,0 +1,204 @@
+''' Headless batch runner: run scenarios in fast-time on a pool of detached
+    simulation processes, without a server or networking.
+
+    Usage: python -m bluesky.simulation.batch [options] scenario.scn ...
+'''
+import argparse
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from pathlib import Path
+
+import bluesky as bs
+from bluesky import settings
+
+
+# Register settings defaults
+settings.set_variable_defaults(batch_nworkers=0, batch_tmax=86400.0)
+
+
+def loadscenarios(fnames):
+    ''' Read scenario files into a list of scenarios (dicts with the name,
+        and the times and commands of each scenario).
+
+        A scenario file with SCEN commands is a batch file, which is split
+        into the individual scenarios, like the BATCH command does. '''
+    from bluesky.stack.simstack import readscn
+    from bluesky.network.server import split_scenarios
+    scenarios = []
+    for fname in fnames:
+        scentime, scencmd = [], []
+        for cmdtime, cmd in readscn(fname):
+            scentime.append(cmdtime)
+            scencmd.append(cmd)
+        if scencmd and scencmd[0][:4].upper() == 'SCEN':
+            scenarios.extend(split_scenarios(scentime, scencmd))
+        else:
+            scenarios.append(dict(name=Path(fname).stem, scentime=scentime, scencmd=scencmd))
+    return scenarios
+
+
+def readresults(resultfile):
+    ''' Read the results of earlier (possibly interrupted) batch runs. '''
+    results = dict()
+    try:
+        with open(resultfile) as fin:
+            for line in fin:
+                try:
+                    result = json.loads(line)
+                    results[result['name']] = result
+                except (ValueError, KeyError):
+                    # Skip the incomplete last line of a crashed run
+                    continue
+    except FileNotFoundError:
+        pass
+    return results
+
+
+def initworker(configfile, workdir):
+    ''' Initialise a detached simulation in a pool process. This process
+        keeps running, and is reset between scenarios. '''
+    bs.init(mode='sim', configfile=configfile, workdir=workdir, detached=True)
+
+    # Collect the echo messages of each scenario. A detached node drops all
+    # events, here the ECHO events are kept.
+    def send_event(eventname, data=None, target=None):
+        if eventname == b'ECHO':
+            messages.append(data['text'])
+    bs.net.send_event = send_event
+
+
+# Echo messages of the current scenario in a pool process
+messages = []
+
+
+def runscenario(scen, tmax):
+    ''' Run one scenario in fast-time in this pool process.
+
+        The scenario ends when the simulation is put in HOLD or stopped
+        (e.g., with HOLD or QUIT in the scenario), when nothing is left to
+        simulate, or after tmax seconds of simulation time. '''
+    from bluesky.stack.stackbase import Stack
+    from bluesky.tools import datalog
+    twall = time.perf_counter()
+    result = dict(name=scen['name'], status='ok')
+    try:
+        bs.sim.reset()
+        messages.clear()
+        bs.stack.set_scendata(list(scen['scentime']), list(scen['scencmd']))
+        Stack.scenname = scen['name']
+        bs.sim.op()
+        while bs.sim.state == bs.OP:
+            bs.net.update()
+            bs.sim.step()
+            if bs.sim.simt >= tmax:
+                result['status'] = 'tmax'
+                break
+            if bs.traf.ntraf == 0 and not bs.stack.get_scendata()[0]:
+                break
+    except Exception:
+        result['status'] = 'error'
+        result['error'] = traceback.format_exc()
+
+    # Close the log files of this scenario
+    result['logfiles'] = [str(log.fname) for log in datalog.allloggers.values()
+                          if log.isopen()]
+    datalog.reset()
+
+    result.update(simt=bs.sim.simt, ntraf=bs.traf.ntraf,
+                  walltime=time.perf_counter() - twall,
+                  messages=list(messages), pid=os.getpid())
+    return result
+
+
+def run(scenarios, nworkers=0, resultfile='batchresults.jsonl', resume=False,
+        tmax=None, configfile=None, workdir=None, progress=print):
+    ''' Run a list of scenarios (scenario or batch file names, or scenario
+        dicts) on a pool of detached simulation processes.
+
+        Arguments:
+        - scenarios: List of scenario files and/or scenario dicts
+        - nworkers: Number of processes (0: batch_nworkers, or number of cpus)
+        - resultfile: JSON lines file to which the result of each scenario is
+          appended as soon as it is finished
+        - resume: Skip the scenarios that already have a result in resultfile
+        - tmax: Maximum simulation time of each scenario [s]
+        - configfile, workdir: Passed to bluesky.init in each process
+        - progress: Function that is called with a progress message
+
+        Returns a dict with the result of each scenario in this run.
+    '''
+    # Scenario files are read here, which only needs the settings
+    if not all(isinstance(scen, dict) for scen in scenarios):
+        if not bs.mode:
+            from bluesky import pathfinder
+            pathfinder.init(workdir)
+            settings.init(configfile)
+        scenarios = [scen for item in scenarios for scen in
+                     ([item] if isinstance(item, dict) else loadscenarios([item]))]
+
+    done = readresults(resultfile) if resume else dict()
+    if not resume:
+        open(resultfile, 'w').close()
+    todo = [scen for scen in scenarios if scen['name'] not in done]
+    if len(todo) < len(scenarios):
+        progress(f'Resuming batch: {len(scenarios) - len(todo)} of '
+                 f'{len(scenarios)} scenarios already done')
+    if not todo:
+        return dict()
+
+    nworkers = min(len(todo), nworkers or settings.batch_nworkers or os.cpu_count() or 1)
+    tmax = tmax or settings.batch_tmax
+    progress(f'Running {len(todo)} scenarios on {nworkers} processes')
+
+    # Spawned processes start with a clean interpreter: nothing is shared
+    # with a BlueSky instance that is possibly running in this process
+    results = dict()
+    tstart = time.perf_counter()
+    with ProcessPoolExecutor(nworkers, mp_context=get_context('spawn'),
+                             initializer=initworker,
+                             initargs=(configfile, workdir)) as pool, \
+            open(resultfile, 'a') as fout:
+        futures = [pool.submit(runscenario, scen, tmax) for scen in todo]
+        for i, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results[result['name']] = result
+            fout.write(json.dumps(result) + '\n')
+            fout.flush()
+
+            twall = time.perf_counter() - tstart
+            progress(f'[{i}/{len(todo)}] {result["name"]}: {result["status"]}, '
+                     f'{result["simt"]:.0f} s simulated in {result["walltime"]:.1f} s, '
+                     f'ETA {twall / i * (len(todo) - i):.0f} s')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m bluesky.simulation.batch',
+                                     description='Run BlueSky scenarios in fast-time '
+                                     'on a pool of detached simulation processes.')
+    parser.add_argument('scenarios', nargs='+', help='Scenario or batch files')
+    parser.add_argument('--nworkers', type=int, default=0,
+                        help='Number of processes (default: number of cpus)')
+    parser.add_argument('--results', default='batchresults.jsonl',
+                        help='File with the results of each scenario')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip the scenarios with a result in the results file')
+    parser.add_argument('--tmax', type=float, default=None,
+                        help='Maximum simulation time per scenario [s]')
+    parser.add_argument('--configfile', help='Load an alternative configuration file.')
+    parser.add_argument('--workdir', help='Set BlueSky working directory.')
+    args = parser.parse_args()
+    results = run(args.scenarios, args.nworkers, args.results, args.resume,
+                  args.tmax, args.configfile, args.workdir)
+    failed = [name for name, result in results.items() if result['status'] == 'error']
+    if failed:
+        print('Failed scenarios:', ', '.join(failed))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -6,7 +6,17 @@ import numpy as np
 import bluesky as bs
 from bluesky import stack
 from bluesky.tools import areafilter, aero
+from bluesky.core import simprof
 from bluesky.core.walltime import Timer
+from bluesky.network.deltacodec import DeltaEncoder
+
+# Register settings defaults
+bs.settings.set_variable_defaults(stream_keyframe=25, stream_viewmargin=0.25,
+                                  stream_lodmax=5000)
+
+# Aircraft data fields that are only displayed, and sent in single precision
+displayfields = ('lat', 'lon', 'alt', 'tas', 'cas', 'gs', 'tcpamax', 'rpz',
+                 'trk', 'vs', 'vmin', 'vmax', 'asastas', 'asastrk')
 
 class ScreenIO:
     """Class within sim task which sends/receives data to/from GUI task"""
@@ -39,6 +49,11 @@ class ScreenIO:
         self.custacclr = dict()
         self.custgrclr = dict()
 
+        # Delta encoding of aircraft data for clients of the ACDELTA stream,
+        # and of the aircraft in view of each client
+        self.acencoder = DeltaEncoder(bs.settings.stream_keyframe)
+        self.client_acencoder = dict()
+
         # Timing bookkeeping counters
         self.prevtime    = 0.0
         self.samplecount = 0
@@ -67,6 +82,8 @@ class ScreenIO:
         self.route_all = ''
         self.custacclr = dict()
         self.custgrclr = dict()
+        self.acencoder.keyframe()
+        self.client_acencoder = dict()
         self.samplecount = 0
         self.prevcount   = 0
         self.prevtime    = 0.0
@@ -86,9 +103,9 @@ class ScreenIO:
     def getviewctr(self):
         return self.client_pan.get(stack.sender()) or self.def_pan
 
-    def getviewbounds(self):
+    def getviewbounds(self, sender=None):
         # Get appropriate lat/lon/zoom/aspect ratio
-        sender   = stack.sender()
+        sender   = sender or stack.sender()
         lat, lon = self.client_pan.get(sender) or self.def_pan
         zoom     = self.client_zoom.get(sender) or self.def_zoom
         ar       = self.client_ar.get(sender) or 1.0
@@ -220,6 +237,13 @@ class ScreenIO:
             self.client_ar[sender_rte[-1]]   = eventdata['ar']
             return True
 
+        if eventname == b'ACKEYFRAME':
+            # A client of the ACDELTA stream needs the full aircraft data
+            self.acencoder.keyframe()
+            if sender_rte[-1] in self.client_acencoder:
+                self.client_acencoder[sender_rte[-1]].keyframe()
+            return True
+
         return False
 
     # =========================================================================
@@ -231,6 +255,8 @@ class ScreenIO:
         speed = (self.samplecount - self.prevcount) / dt * bs.sim.simdt
         bs.net.send_stream(b'SIMINFO', (speed, bs.sim.simdt, bs.sim.simt,
             str(bs.sim.utc.replace(microsecond=0)), bs.traf.ntraf, bs.sim.state, stack.get_scenname()))
+        if simprof.active():
+            bs.net.send_stream(b'PROFILE', simprof.summary())
         self.prevtime  = t
         self.prevcount = self.samplecount
 
@@ -248,9 +274,21 @@ class ScreenIO:
             bs.net.send_stream(b'TRAILS', data)
 
     def send_aircraft_data(self):
+        # Aircraft data is sent to clients that subscribed to the full data
+        # (ACDATA), and/or to keyframes and changes (ACDELTA). Clients that
+        # subscribe to these streams with their own id receive only the
+        # aircraft in their view.
+        full = bs.net.subscribed(b'ACDATA')
+        delta = bs.net.subscribed(b'ACDELTA')
+        clients = [(client, bs.net.subscribed(b'ACDATA' + client),
+                    bs.net.subscribed(b'ACDELTA' + client))
+                   for client in bs.sim.clients.union(self.client_pan, self.client_zoom)]
+        clients = [client for client in clients if client[1] or client[2]]
+        if not (full or delta or clients):
+            return
         data = dict()
         data['simt']       = bs.sim.simt
-        data['id']         = bs.traf.id
+        data['id']         = list(bs.traf.id)
         data['lat']        = bs.traf.lat
         data['lon']        = bs.traf.lon
         data['alt']        = bs.traf.alt
@@ -280,7 +318,56 @@ class ScreenIO:
         data['asastas']  = bs.traf.cr.tas
         data['asastrk']  = bs.traf.cr.trk
 
-        bs.net.send_stream(b'ACDATA', data)
+        # The arrays are sent without copying them, and compared with
+        # the next frame: send copies, in single precision for display
+        for name, value in data.items():
+            if isinstance(value, np.ndarray):
+                data[name] = value.astype(np.float32) if name in displayfields \
+                    else value.copy()
+
+        if full:
+            bs.net.send_stream(b'ACDATA', data, copy=False)
+        if delta:
+            bs.net.send_stream(b'ACDELTA', self.acencoder.encode(data), copy=False)
+
+        lodkeys = None
+        for client, clientfull, clientdelta in clients:
+            if lodkeys is None:
+                # Random but fixed number per aircraft for decimation
+                lodkeys = np.fromiter(map(hash, bs.traf.id), np.int64, bs.traf.ntraf)
+                lodkeys = (lodkeys & 0xffffffff) / 2.0**32
+            clientdata = self.viewdata(client, data, lodkeys)
+            if clientfull:
+                bs.net.send_stream(b'ACDATA' + client, clientdata, copy=False)
+            if clientdelta:
+                encoder = self.client_acencoder.get(client)
+                if encoder is None:
+                    encoder = self.client_acencoder[client] = \
+                        DeltaEncoder(bs.settings.stream_keyframe)
+                bs.net.send_stream(b'ACDELTA' + client, encoder.encode(clientdata), copy=False)
+
+    def viewdata(self, client, data, lodkeys):
+        ''' Select the aircraft data for the view of a client: the aircraft
+            within the view bounds plus a margin. When there are more than
+            stream_lodmax aircraft in view, a fixed random selection of these
+            aircraft is sent, together with all aircraft in conflict. '''
+        lat0, lat1, lon0, lon1 = self.getviewbounds(client)
+        scale = 0.5 * (1.0 + bs.settings.stream_viewmargin)
+        dlat = np.abs(data['lat'] - 0.5 * (lat0 + lat1))
+        dlon = np.abs((data['lon'] - 0.5 * (lon0 + lon1) + 180.0) % 360.0 - 180.0)
+        inview = (dlat <= scale * (lat1 - lat0)) & (dlon <= scale * (lon1 - lon0))
+
+        ninview = np.count_nonzero(inview)
+        if 0 < bs.settings.stream_lodmax < ninview:
+            inview &= (lodkeys < bs.settings.stream_lodmax / ninview) | (data['inconf'] != 0)
+
+        idx = np.flatnonzero(inview)
+        ntraf = len(data['id'])
+        clientdata = {name: value[idx] if isinstance(value, np.ndarray) and
+                      value.ndim > 0 and len(value) == ntraf else value
+                      for name, value in data.items()}
+        clientdata['id'] = [data['id'][i] for i in idx]
+        return clientdata
 
     def send_route_data(self):
         ''' Send route data to client(s) '''
@@ -0,0 +1,176 @@
+''' Checkpoints of the simulation state, to restart experiments from a
+    (warmed-up) simulation state instead of from the start of a scenario. '''
+import inspect
+import pickle
+import random
+from pathlib import Path
+import numpy as np
+
+import bluesky as bs
+from bluesky import settings
+from bluesky.core import simtime
+from bluesky.core.entity import getproxied
+from bluesky.core.replaceable import replaceables
+from bluesky.core.trafficarrays import TrafficArrays, subtree, treepaths
+from bluesky.stack import command
+from bluesky.stack.stackbase import Stack
+from bluesky.tools.datalog import CSVLogger
+
+
+# File format version of saved states
+VERSION = 1
+
+# Attributes of traffic array objects that describe the traffic tree itself
+treeattrs = {'_parent', '_children', '_ArrVars', '_LstVars', '_buffers'}
+
+
+def nodepaths():
+    ''' Return the objects of the traffic tree by attribute path. Objects
+        that are not an attribute of their parent are named after their class. '''
+    paths = treepaths()
+    return {paths.get(id(obj), type(obj).__name__ + '.'): obj
+            for obj in subtree(bs.traf)}
+
+
+def isstate(value):
+    ''' Returns True if value is state data of a traffic tree object, and not
+        a child object, function, or log file. '''
+    return not (isinstance(getproxied(value), (TrafficArrays, CSVLogger))
+                or inspect.isroutine(value) or inspect.ismodule(value))
+
+
+def dumpnode(obj):
+    ''' Return the pickled state of one object of the traffic tree. '''
+    attrs = {name: value for name, value in obj.__dict__.items()
+             if name not in treeattrs and isstate(value)}
+    try:
+        return pickle.dumps(attrs, pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        # Leave out the attributes that can't be stored
+        for name, value in list(attrs.items()):
+            try:
+                pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            except (pickle.PicklingError, TypeError, AttributeError):
+                del attrs[name]
+        return pickle.dumps(attrs, pickle.HIGHEST_PROTOCOL)
+
+
+def loadnode(obj, data):
+    ''' Restore the state of one object of the traffic tree. '''
+    for name, value in pickle.loads(data).items():
+        old = obj.__dict__.get(name)
+        if name not in obj._ArrVars and name not in obj._LstVars and \
+                type(old) is type(value) and hasattr(old, '__dict__'):
+            # Objects can be referenced elsewhere: update them in place
+            old.__dict__.clear()
+            old.__dict__.update(value.__dict__)
+        else:
+            # Traffic arrays that are replaced are copied back into their
+            # buffers at the next create
+            obj.__dict__[name] = value
+
+
+def getstate():
+    ''' Return the current simulation state.
+
+        The state of each object of the traffic tree is pickled separately,
+        so that a state can be restored many times. '''
+    if TrafficArrays.stateblock is not None:
+        TrafficArrays.stateblock.sync()
+    return dict(
+        version=VERSION,
+        impl={name: base.selected().__name__.upper() for name, base in replaceables.items()},
+        traf={path: dumpnode(obj) for path, obj in nodepaths().items()},
+        sim=dict(simt=bs.sim.simt, simdt=bs.sim.simdt, utc=bs.sim.utc,
+                 dtmult=bs.sim.dtmult),
+        clock=simtime.getstate(),
+        scen=(Stack.scenname, list(Stack.scentime), list(Stack.scencmd)),
+        rng=(random.getstate(), np.random.get_state()))
+
+
+def setstate(state):
+    ''' Restore a simulation state obtained with getstate().
+
+        Returns a list with the names of the traffic tree objects in the state
+        that are not present in the simulation (e.g., of plugins that
+        are not loaded). '''
+    from bluesky.traffic.route import Route
+    # Select the implementations that were used when the state was saved
+    for name, implname in state['impl'].items():
+        base = replaceables.get(name)
+        impl = base.derived().get(implname) if base else None
+        if impl is not None and base.selected() is not impl:
+            impl.select()
+
+    nodes = nodepaths()
+    for path, data in state['traf'].items():
+        obj = nodes.pop(path, None)
+        if obj is not None:
+            loadnode(obj, data)
+
+    # Objects that didn't exist when the state was saved get default values
+    ntraf = bs.traf.ntraf
+    for obj in nodes.values():
+        for name in obj._ArrVars:
+            obj.__dict__[name] = obj.__dict__[name][:0]
+        for name in obj._LstVars:
+            obj.__dict__[name] = []
+        obj.create(ntraf)
+
+    if TrafficArrays.stateblock is not None:
+        TrafficArrays.stateblock.sync()
+
+    # Register the restored routes of the aircraft
+    for route in bs.traf.ap.route:
+        Route._routes[route.acid] = route
+
+    for name, value in state['sim'].items():
+        setattr(bs.sim, name, value)
+    simtime.setstate(state['clock'])
+
+    Stack.scenname, scentime, scencmd = state['scen']
+    Stack.scentime, Stack.scencmd = list(scentime), list(scencmd)
+
+    pystate, npstate = state['rng']
+    random.setstate(pystate)
+    np.random.set_state(npstate)
+    nodes = nodepaths()
+    return [path for path in state['traf'] if path not in nodes]
+
+
+def statefile(fname):
+    ''' Return the path of a state file. Relative paths are in the log directory. '''
+    fpath = Path(fname).with_suffix('.state')
+    return fpath if fpath.is_absolute() else bs.resource(settings.log_path) / fpath
+
+
+@command
+def savestate(fname: 'word'):
+    ''' SAVESTATE filename: Save the simulation state to a file.
+
+        Stores all traffic data (including routes, conditional commands, and
+        the data of plugins), the simulation clock and timers, the remaining
+        scenario commands, and the state of the random generators. '''
+    fpath = statefile(fname)
+    fpath.parent.mkdir(parents=True, exist_ok=True)
+    with open(fpath, 'wb') as fout:
+        pickle.dump(getstate(), fout, pickle.HIGHEST_PROTOCOL)
+    return True, f'Simulation state saved to {fpath}'
+
+
+@command
+def loadstate(fname: 'word'):
+    ''' LOADSTATE filename: Restore a simulation state saved with SAVESTATE. '''
+    fpath = statefile(fname)
+    try:
+        with open(fpath, 'rb') as fin:
+            state = pickle.load(fin)
+    except FileNotFoundError:
+        return False, f'LOADSTATE: File not found: {fpath}'
+    if state.get('version') != VERSION:
+        return False, f'LOADSTATE: {fpath} has an unsupported format'
+    missing = setstate(state)
+    msg = f'Simulation state loaded from {fpath} at t={bs.sim.simt:.2f} s'
+    if missing:
+        msg += '\nState of missing objects skipped: ' + ', '.join(missing)
+    return True, msg
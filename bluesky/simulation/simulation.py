@@ -1,14 +1,18 @@
 ''' BlueSky simulation control object. '''
+import os
+import sys
 import time
 import datetime
 import numpy as np
 from random import seed
+from pathlib import Path
 
 # Local imports
 import bluesky as bs
 import bluesky.core as core
-from bluesky.core import plugin, simtime
+from bluesky.core import plugin, simtime, simprof
 from bluesky.stack import simstack, recorder
+from bluesky.stack.stackbase import Stack
 from bluesky.tools import datalog, areafilter, plotter
 
 # Minimum sleep interval
@@ -52,6 +56,9 @@ class Simulation:
         # Keep track of known clients
         self.clients = set()
 
+        # Process ids of the branches forked from this simulation
+        self.branches = dict()
+
     def step(self, dt_increment=0):
         ''' Perform one simulation timestep.
         
@@ -64,12 +71,16 @@ class Simulation:
                 self.op()
 
         # Always update stack
+        t0 = tstep = simprof.tic()
         simstack.process()
+        t0 = simprof.toc('stack', t0)
 
         if self.state == bs.OP:
             # Plot/log the current timestep, and call preupdate functions
             plotter.update()
+            t0 = simprof.toc('plotter', t0)
             datalog.update()
+            t0 = simprof.toc('datalog', t0)
             simtime.preupdate()
 
             # Determine interval towards next timestep                
@@ -79,8 +90,12 @@ class Simulation:
             self.utc += datetime.timedelta(seconds=self.simdt)
 
             # Update traffic and other update functions for the next timestep
+            t0 = simprof.tic()
             bs.traf.update()
+            simprof.toc('traffic', t0)
             simtime.update()
+            simprof.step()
+        simprof.toc('step', tstep)
 
     def update(self):
         ''' Perform a simulation update. 
@@ -217,6 +232,59 @@ class Simulation:
 
         return True
 
+    def fork(self, *fnames):
+        ''' Fork the simulation into a new simulation node per scenario file.
+
+            Each branch continues from the current simulation state, with
+            the commands of its scenario file added relative to the current
+            simulation time, like PCALL. '''
+        if not fnames:
+            return False, 'FORK: Give at least one scenario file'
+        # Read the scenario files before forking, so that no branch is
+        # started when one of the files doesn't exist
+        branches = []
+        for fname in fnames:
+            try:
+                branches.append((Path(fname).stem, list(simstack.readscn(fname))))
+            except FileNotFoundError:
+                return False, f'FORK: File not found: {fname}'
+
+        # Forget the branches that have ended
+        for pid in list(self.branches):
+            if os.waitpid(pid, os.WNOHANG)[0]:
+                del self.branches[pid]
+
+        # Output that is still buffered shouldn't be repeated by the branches
+        sys.stdout.flush()
+        sys.stderr.flush()
+        started = []
+        for name, source in branches:
+            pid = bs.net.fork()
+            if pid == 0:
+                return self.startbranch(name, source)
+            self.branches[pid] = name
+            started.append(f'{name} (pid {pid})')
+
+        return True, 'FORK: Started branches ' + ', '.join(started)
+
+    def startbranch(self, name, source):
+        ''' Continue as branch in a forked simulation process. '''
+        self.branches.clear()
+        scenname = Stack.scenname
+        Stack.scenname = f'{scenname}_{name}' if scenname else name
+
+        # Open log and recording files belong to the parent simulation:
+        # logging continues in new files of this branch
+        datalog.fork()
+        if recorder.savefile is not None:
+            datalog.detachfile(recorder.savefile)
+            recorder.saveclose()
+
+        # Let the server know the state of this new node
+        self.prevstate = None
+        simstack.merge(source)
+        return True, f'FORK: Continuing as branch {name}'
+
     def event(self, eventname, eventdata, sender_rte):
         ''' Handle events coming from the network. '''
         # Keep track of event processing
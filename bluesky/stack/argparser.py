@@ -2,7 +2,6 @@
 import inspect
 import re
 from types import SimpleNamespace
-from matplotlib import colors
 from bluesky.tools.misc import txt2bool, txt2lat, txt2lon, txt2alt, txt2tim, \
     txt2hdg, txt2vs, txt2spd
 from bluesky.tools.position import Position, islat
@@ -193,7 +192,7 @@ class WptArg(Parser):
             name = name + "," + arg
 
         # apt,runway ? Combine into one string with a slash as separator
-        elif argstring[:2].upper() == "RW" and name in bs.navdb.aptid:
+        elif argstring[:2].upper() == "RW" and name in bs.navdb.aptindex:
             arg, argstring = re_getarg.match(argstring).groups()
             name = name + "/" + arg.upper()
 
@@ -231,7 +230,7 @@ class PosArg(Parser):
             return txt2lat(argu), txt2lon(nextarg), argstring
 
         # apt,runway ? Combine into one string with a slash as separator
-        if argstring[:2].upper() == "RW" and argu in bs.navdb.aptid:
+        if argstring[:2].upper() == "RW" and argu in bs.navdb.aptindex:
             arg, argstring = re_getarg.match(argstring).groups()
             argu = argu + "/" + arg.upper()
 
@@ -269,6 +268,8 @@ class ColorArg(Parser):
                 g, argstring = re_getarg.match(argstring).groups()
                 b, argstring = re_getarg.match(argstring).groups()
                 return int(arg), int(g), int(b), argstring
+            # Colour names need matplotlib, which is slow to import
+            from matplotlib import colors
             r, g, b = [int(255 * i) for i in colors.to_rgb(arg.upper())]
             return r, g, b, argstring
         except ValueError:
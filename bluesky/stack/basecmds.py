@@ -4,7 +4,7 @@ from pathlib import Path
 
 import bluesky as bs
 from bluesky import settings
-from bluesky.core import select_implementation, simtime, varexplorer as ve
+from bluesky.core import select_implementation, simtime, simprof, varexplorer as ve
 from bluesky.tools import geo, aero, areafilter, plotter
 from bluesky.tools.calculator import calculator
 from bluesky.stack.cmdparser import append_commands
@@ -50,6 +50,13 @@ def initbasecmds():
     #
     # --------------------------------------------------------------------
     cmddict = {
+        "ADAPTDT": [
+            "ADAPTDT [schedule,nsub]",
+            "[txt,int]",
+            simtime.setschedule,
+            "Update aircraft without priority once every nsub intervals in the\n"
+            + "adaptive schedule of a timed function (e.g., ASAS)",
+        ],
         "ADDNODES": [
             "ADDNODES number",
             "int",
@@ -239,6 +246,13 @@ def initbasecmds():
             lambda flag, *args: bs.sim.ff(*args) if flag else bs.op(),
             "Legacy function for TMX compatibility",
         ],
+        "FORK": [
+            "FORK scenfile,[scenfile,...]",
+            "word,[word,...]",
+            bs.sim.fork,
+            "Fork the simulation into a new node per scenario file, which continues\n"
+            + "from the current state with the commands of that file",
+        ],
 
         "GROUP": [
             "GROUP [grname, (areaname OR acid,...) ]",
@@ -367,6 +381,12 @@ def initbasecmds():
             bs.sim.setseed,
             "Set seed for all functions using a randomizer (e.g.mcre,noise)",
         ],
+        "SIMPROF": [
+            "SIMPROF [ON/OFF/DUMP,filename]",
+            "[txt,word]",
+            simprof.simprof,
+            "Profile the wall time of the phases of the simulation step",
+        ],
         "SSD": [
             "SSD ALL/CONFLICTS/OFF or SSD acid0, acid1, ...",
             "txt,[...]",
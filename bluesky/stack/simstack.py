@@ -7,7 +7,7 @@ from bluesky.stack.stackbase import Stack, stack, checkscen, forward
 from bluesky.stack.cmdparser import Command, command
 from bluesky.stack.basecmds import initbasecmds
 from bluesky.stack import recorder
-from bluesky.stack import argparser, ArgumentError
+from bluesky.stack import argparser, ArgumentError, refdata
 from bluesky import settings
 
 
@@ -53,6 +53,10 @@ def process(from_pcall=None):
     if from_pcall is None:
         checkscen()
 
+    # Consecutive CRE commands from scenario files are collected, and
+    # the aircraft are created together in one batch
+    crebatch = []
+
     # Process stack of commands
     for cmdline in Stack.commands(from_pcall):
         success = True
@@ -64,6 +68,17 @@ def process(from_pcall=None):
         cmdu = cmd.upper()
         cmdobj = Command.cmddict.get(cmdu)
 
+        if cmdobj is not None and cmdobj is Command.cmddict.get('CRE') \
+                and Stack.sender_rte is None:
+            try:
+                crebatch.append((cmdline, creargs(cmdobj.parse(argstring))))
+                continue
+            except Exception:
+                # Let the regular processing below report the error
+                pass
+        # All other commands can depend on the aircraft of a pending batch
+        flushcre(crebatch)
+
         # If no function is found for 'cmd', check if cmd is actually an aircraft id
         if not cmdobj and cmdu in bs.traf.id:
             cmd, argstring = argparser.getnextarg(argstring)
@@ -130,11 +145,47 @@ def process(from_pcall=None):
         if echotext:
             bs.scr.echo(echotext, echoflags)
 
+    flushcre(crebatch)
+
     # Clear the processed commands
     if from_pcall is None:
         Stack.clear()
 
 
+def creargs(args):
+    ''' Complete parsed CRE arguments with the defaults of Traffic.cre. '''
+    acid, actype, aclat, aclon, *optional = args
+    achdg, acalt, acspd = optional + [None] * (3 - len(optional))
+    # The default heading depends on the parser reference of this command line
+    achdg = (refdata.hdg or 0.0) if achdg is None else achdg
+    return acid, actype, aclat, aclon, achdg, acalt or 0.0, acspd or 0.0
+
+
+def flushcre(crebatch):
+    ''' Create all aircraft of a batch of parsed CRE commands at once. '''
+    if not crebatch:
+        return
+    cmdlines, args = zip(*crebatch)
+    crebatch.clear()
+    # Errors are reported as commands from a scenario file
+    sender_rte, Stack.sender_rte = Stack.sender_rte, None
+    try:
+        created = bs.traf.cre_batch(*zip(*args))
+    except Exception as e:
+        header = e.args[0] if e.args else 'Function error.'
+        bs.scr.echo(f'Error calling function implementation of CRE: {header}\n'
+                    'Traceback printed to terminal.', bs.BS_FUNERR)
+        traceback.print_exc()
+    else:
+        for cmdline, success, (acid, *_) in zip(cmdlines, created, args):
+            if success:
+                recorder.savecmd('CRE', cmdline)
+            else:
+                bs.scr.echo(f'{cmdline}\nSyntax error: {acid} already exists.',
+                            bs.BS_FUNERR)
+    Stack.sender_rte = sender_rte
+
+
 def readscn(fname):
     ''' Read a scenario file. '''
     if not fname:
@@ -0,0 +1,96 @@
+''' Startup profiler: timing of module imports and initialisation steps.
+
+    Start BlueSky with --profile-startup to print a report of the slowest
+    imports and the duration of each step of bluesky.init().
+'''
+import builtins
+import sys
+import time
+from contextlib import contextmanager
+
+
+# The original import function, while the profiler is active
+_import = None
+
+# Timed imports: list of (name, self time, cumulative time, depth)
+imports = list()
+
+# Timed initialisation steps: list of (name, duration)
+steps = list()
+
+# Stack of [self time] of the imports in progress, to subtract child imports
+_stack = list()
+
+# Time at which the profiler was started
+_t0 = 0.0
+
+
+def _timedimport(name, globals=None, locals=None, fromlist=(), level=0):
+    ''' Replacement of builtins.__import__ that times first-time imports. '''
+    args = (name, globals, locals, fromlist, level)
+    if level > 0 and globals:
+        # Full name of relative imports
+        package = globals.get('__package__') or ''
+        package = package.rsplit('.', level - 1)[0] if level > 1 else package
+        name = f'{package}.{name}' if name else package
+    if name in sys.modules:
+        return _import(*args)
+    depth = len(_stack)
+    _stack.append(0.0)
+    t0 = time.perf_counter()
+    try:
+        return _import(*args)
+    finally:
+        cumulative = time.perf_counter() - t0
+        children = _stack.pop()
+        if _stack:
+            _stack[-1] += cumulative
+        imports.append((name, cumulative - children, cumulative, depth))
+
+
+def start():
+    ''' Start timing imports. '''
+    global _import, _t0
+    if _import is None:
+        _import = builtins.__import__
+        builtins.__import__ = _timedimport
+        _t0 = time.perf_counter()
+
+
+def stop():
+    ''' Stop timing imports. '''
+    global _import
+    if _import is not None:
+        builtins.__import__ = _import
+        _import = None
+
+
+def active():
+    ''' True when the profiler is timing imports. '''
+    return _import is not None
+
+
+@contextmanager
+def step(name):
+    ''' Time an initialisation step. Does nothing when the profiler is not
+        active. '''
+    if not active():
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        steps.append((name, time.perf_counter() - t0))
+
+
+def report(nimports=20):
+    ''' Return a text report of the initialisation steps and the nimports
+        slowest imports. '''
+    lines = [f'Startup profile: {time.perf_counter() - _t0:.3f} s since start of profiling',
+             '', f'{"step":<50s} {"time [ms]":>10s}']
+    lines += [f'{name:<50s} {1e3 * dt:10.1f}' for name, dt in steps]
+    lines += ['', f'{"import":<50s} {"self [ms]":>10s} {"cumul. [ms]":>12s}']
+    for name, tself, tcum, depth in sorted(imports, key=lambda imp: -imp[1])[:nimports]:
+        lines.append(f'{(depth * " " + name)[:50]:<50s} {1e3 * tself:10.1f} {1e3 * tcum:12.1f}')
+    return '\n'.join(lines)
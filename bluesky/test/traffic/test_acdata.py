@@ -0,0 +1,84 @@
+"""
+Tests the vectorised preparation of aircraft labels, colours and CPA lines
+for the traffic display.
+"""
+
+import numpy as np
+from bluesky.tools import geo
+from bluesky.tools.aero import ft, nm, kts
+from bluesky.ui import acdata
+
+
+def test_itoa():
+    """
+    Test formatting integers as text.
+
+    Expects the same text as printf-style formatting for values that fit
+    in the field, and the leading digits of values that don't.
+    """
+    values = np.array([0, 7, -7, 42, 12345, -1234, 99999, 100])
+    text = acdata.itoa(values, 5).view('S5').ravel().astype(str)
+    assert list(text) == ['%-5d' % v for v in values]
+    text = acdata.itoa(values[values >= 0], 3, zeropad=True)
+    assert [bytes(row).decode() for row in text] == ['000', '007', '042', '123', '999', '100']
+
+
+def test_labels_colors_cpalines():
+    """
+    Test making the labels, colours, SSD selection and CPA lines of a set
+    of aircraft.
+
+    Expects the same results as formatting the labels, and computing the
+    colours and CPA lines per aircraft.
+    """
+    rng = np.random.default_rng(3)
+    n = 500
+    acid = [f'AC{i}' for i in range(n - 1)] + ['LONGCALLSIGN']
+    alt = rng.uniform(-100.0, 12000.0, n)
+    vs = rng.uniform(-10.0, 10.0, n)
+    cas = rng.uniform(0.0, 200.0, n)
+    lat, lon = rng.uniform(50.0, 54.0, n), rng.uniform(2.0, 7.0, n)
+    trk, gs, tcpa = rng.uniform(0.0, 360.0, n), rng.uniform(50.0, 250.0, n), rng.uniform(0.0, 300.0, n)
+    inconf = rng.uniform(size=n) < 0.1
+    ingroup = rng.integers(0, 4, n)
+    translvl = 5000.0 * ft
+    groupcolors = {1: (255, 0, 0), 2: (0, 0, 255)}
+    accolors = {'AC3': (1, 2, 3), 'AC4': (4, 5, 6)}
+
+    rawlabel = ''
+    for i in range(n):
+        rawlabel += '%-8s' % acid[i][:8]
+        if alt[i] <= translvl:
+            rawlabel += '%-5d' % int(alt[i] / ft + 0.5)
+        else:
+            rawlabel += 'FL%03d' % int(alt[i] / ft / 100. + 0.5)
+        vsarrow = 30 if vs[i] > 0.25 else 31 if vs[i] < -0.25 else 32
+        rawlabel += '%1s  %-8d' % (chr(vsarrow), int(cas[i] / kts + 0.5))
+    labels = acdata.make_labels(acid, alt, vs, cas, translvl, 2)
+    assert labels.shape == (n, acdata.LABEL_SIZE)
+    assert labels.tobytes() == rawlabel.encode('ascii')
+    assert acdata.make_labels(acid, alt, vs, cas, translvl, 1)[-1].tobytes() == b'LONGCALL' + 16 * b' '
+    assert len(acdata.make_labels(acid, alt, vs, cas, translvl, 0)) == 0
+
+    color = acdata.make_colors(acid, ingroup, inconf, (0, 255, 0), (255, 160, 0),
+                               groupcolors, accolors)
+    for i in range(n):
+        rgb = (0, 255, 0)
+        if inconf[i]:
+            rgb = (255, 160, 0)
+        elif acid[i] in accolors:
+            rgb = accolors[acid[i]]
+        elif ingroup[i]:
+            rgb = groupcolors[1] if ingroup[i] & 1 else groupcolors[2]
+        assert tuple(color[i]) == rgb + (255,)
+
+    selssd = acdata.make_selssd(acid, inconf, ssd_conflicts=True, ssd_ownship={'AC1'})
+    assert np.array_equal(selssd == 255, inconf | (np.arange(n) == 1))
+    assert np.all(acdata.make_selssd(acid, inconf, ssd_all=True) == 255)
+
+    cpalines = acdata.make_cpalines(lat, lon, trk, tcpa, gs, inconf)
+    assert len(cpalines) == 4 * np.count_nonzero(inconf)
+    for line, i in zip(cpalines.reshape(-1, 4), np.flatnonzero(inconf)):
+        lat1, lon1 = geo.qdrpos(lat[i], lon[i], trk[i], tcpa[i] * gs[i] / nm)
+        assert np.allclose(line, [lat[i], lon[i], lat1, lon1], atol=1e-4)
+    assert len(acdata.make_cpalines(lat, lon, trk, tcpa, gs, np.zeros(n, dtype=bool))) == 0
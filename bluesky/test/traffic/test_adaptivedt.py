@@ -0,0 +1,59 @@
+"""
+Tests the adaptive schedule of conflict detection set with ADAPTDT.
+"""
+
+import numpy as np
+import bluesky
+from bluesky import stack
+from bluesky.core import simtime
+from bluesky.stack import simstack
+from bluesky.traffic.asas import ConflictDetection, StateBased
+
+
+def test_adaptive_asas(traffic_, monkeypatch):
+    """
+    Test detecting conflicts in a field of cruising aircraft with two
+    converging pairs, with and without an adaptive ASAS schedule.
+
+    Expects the same conflicts with the adaptive schedule, detected at
+    most nsub - 1 ASAS intervals later, while most aircraft pairs are
+    skipped.
+    """
+    monkeypatch.setattr(bluesky.scr, 'echo', lambda text='', flags=0: None)
+    for name in ('state', 'simt', 'simdt', 'utc', 'syst'):
+        monkeypatch.setattr(bluesky.sim, name, getattr(bluesky.sim, name))
+
+    def run(nsub):
+        simtime.reset()
+        simstack.reset()
+        traffic_.reset()
+        StateBased.select()
+        stack.stack('ZONER 5; ZONEDH 1000; DTLOOK 300')
+        # A grid of aircraft that are far apart, and two pairs that meet head-on
+        for i in range(100):
+            stack.stack(f'CRE GR{i} B744 {50 + 0.5 * (i // 10)} {i % 10} 0 FL{300 + 20 * (i % 3)} 250')
+        stack.stack('CRE HA B744 55 0 90 FL250 250; CRE HB B744 55 1.6 270 FL250 250')
+        stack.stack('CRE HC B744 56 0 90 FL250 250; CRE HD B744 56 1.65 270 FL250 250')
+        stack.stack(f'ADAPTDT ASAS {nsub}')
+        bluesky.sim.op()
+        for _ in range(1800):
+            bluesky.sim.step()
+        return dict(zip(traffic_.cd.conftable.unique, traffic_.cd.conftable.tstart))
+
+    ref = run(1)
+    assert simtime.setschedule('ASAS', 4)[0] and simtime._schedules['ASAS'].saved() == 0.0
+    res = run(4)
+    saved = simtime._schedules['ASAS'].saved()
+    assert 'work saved' in simtime.setschedule()[1]
+
+    assert set(ref) == set(res) == {frozenset(('HA', 'HB')), frozenset(('HC', 'HD'))}
+    for pair, tstart in ref.items():
+        assert tstart <= res[pair] <= tstart + 3.0 * bluesky.settings.asas_dt
+    assert saved > 0.5
+    assert len(traffic_.cd.confpairs) == 4
+
+    simtime.reset()
+    assert simtime._schedules['ASAS'].nsub == 1
+    simstack.reset()
+    traffic_.reset()
+    ConflictDetection.selectdefault()
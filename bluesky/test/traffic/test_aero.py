@@ -0,0 +1,67 @@
+"""
+Tests the exact and tabulated atmosphere and speed conversion functions.
+"""
+
+import numpy as np
+import pytest
+from bluesky import settings
+from bluesky.tools import aero
+
+
+def isa(h):
+    """ Reference ISA pressure, density and temperature. """
+    T = np.maximum(288.15 - 0.0065 * h, 216.65)
+    rho = 1.225 * (T / 288.15)**4.256848030018761 * \
+        np.exp(-np.maximum(0.0, h - 11000.0) / 6341.552161)
+    return rho * aero.R * T, rho, T
+
+
+def cas2tas(cas, h):
+    """ Reference CAS to TAS conversion. """
+    p, rho, _ = isa(h)
+    qdyn = aero.p0 * ((1.0 + aero.rho0 * cas * cas / (7.0 * aero.p0))**3.5 - 1.0)
+    return np.sign(cas) * np.sqrt(7.0 * p / rho * ((1.0 + qdyn / p)**(2.0 / 7.0) - 1.0))
+
+
+def tas2cas(tas, h):
+    """ Reference TAS to CAS conversion. """
+    p, rho, _ = isa(h)
+    qdyn = p * ((1.0 + rho * tas * tas / (7.0 * p))**3.5 - 1.0)
+    return np.sign(tas) * np.sqrt(7.0 * aero.p0 / aero.rho0 * ((qdyn / aero.p0 + 1.0)**(2.0 / 7.0) - 1.0))
+
+
+@pytest.mark.parametrize('table, rtol', [(False, 1e-12), (True, 1e-6)])
+def test_atmos_accuracy(table, rtol, monkeypatch):
+    """
+    Test the atmosphere and speed conversions over the altitude range of
+    the lookup tables and beyond, and for scalars.
+
+    Expects the exact functions to match the ISA formulas, and the
+    tabulated functions to be within the accuracy bound of the tables,
+    also with the atmosphere passed to the conversions.
+    """
+    monkeypatch.setattr(settings, 'atmos_table', table)
+    h = np.linspace(-3000.0, 35000.0, 100001)
+    spd = np.random.default_rng(1).uniform(-350.0, 350.0, len(h))
+    spd[::1000] = 0.0
+
+    for value, ref in zip(aero.vatmosa(h), isa(h) + (np.sqrt(1.4 * aero.R * isa(h)[2]),)):
+        assert np.allclose(value, ref, rtol=rtol, atol=0.0)
+    atmos = aero.vatmos(h)
+    for tas in (aero.vcas2tas(spd, h), aero.vcas2tas(spd, h, atmos)):
+        assert np.allclose(tas, cas2tas(spd, h), rtol=rtol, atol=1e-6)
+        assert np.array_equal(np.sign(tas), np.sign(spd))
+    for cas in (aero.vtas2cas(spd, h), aero.vtas2cas(spd, h, atmos)):
+        assert np.allclose(cas, tas2cas(spd, h), rtol=rtol, atol=1e-6)
+    mach = aero.vcas2mach(spd, h, atmos)
+    assert np.allclose(aero.vmach2cas(mach, h), spd, rtol=10 * rtol, atol=1e-6)
+
+    # The result can be stored in a given array
+    out = np.empty_like(h)
+    assert aero.vcas2tas(spd, h, atmos, out=out) is out
+    assert np.allclose(out, cas2tas(spd, h), rtol=rtol, atol=1e-6)
+
+    # Scalars and values that can't be interpolated are calculated exactly
+    assert isinstance(aero.vcas2tas(150.0, 3000.0), float)
+    assert aero.vcas2tas(150.0, 3000.0) == pytest.approx(cas2tas(150.0, 3000.0), rel=1e-12)
+    assert np.all(np.isnan(aero.vatmos(np.array([np.nan, 0.0]))[1][:1]))
@@ -0,0 +1,277 @@
+"""
+Tests conflict detection implementations.
+"""
+import numpy as np
+import pytest
+
+import bluesky as bs
+from bluesky.tools.aero import ft, kts, nm
+from bluesky.traffic.asas import ConflictDetection, StateBased, SpatialStateBased, \
+    ParallelStateBased, ConflictResolution, MVP, BatchMVP
+from bluesky.traffic.asas.conflicttable import ConflictTable, PairHistory
+
+
+@pytest.fixture
+def random_traffic(traffic_):
+    """
+    Fills the traffic object with random traffic in a small area,
+    dense enough to generate a sizeable number of conflicts.
+    """
+    rng = np.random.default_rng(42)
+    ntraf = 300
+    acid = [f'AC{i:04d}' for i in range(ntraf)]
+    lat = 52.0 + rng.uniform(-0.5, 0.5, ntraf)
+    lon = 4.0 + rng.uniform(-0.8, 0.8, ntraf)
+    hdg = rng.uniform(0.0, 360.0, ntraf)
+    alt = rng.choice([2000.0, 2500.0, 3000.0, 4000.0], ntraf) * ft
+    spd = rng.uniform(100.0, 250.0, ntraf) * kts
+
+    traffic_.reset()
+    traffic_.cre(acid, 'B744', lat, lon, hdg, alt, spd)
+    traffic_.vs[:] = rng.choice([0.0, 0.0, 5.0, -5.0], ntraf)
+
+    yield traffic_
+
+    traffic_.reset()
+    ConflictDetection.selectdefault()
+
+
+def detect(method, traf, rpz, hpz, dtlookahead):
+    """ Run detection with the given CD implementation. """
+    method.select()
+    return method.implinstance().detect(traf, traf, rpz, hpz, dtlookahead)
+
+
+def cdsettings(ntraf, rpzvar):
+    """ Protected zone and lookahead settings for the detection tests. """
+    rpz = np.full(ntraf, 5.0 * nm)
+    if rpzvar:
+        rpz[::3] = 2.5 * nm
+    hpz = np.full(ntraf, 1000.0 * ft)
+    dtlookahead = np.full(ntraf, 300.0)
+    return rpz, hpz, dtlookahead
+
+
+@pytest.mark.parametrize('rpzvar', [False, True])
+def test_spatialstatebased_equals_statebased(random_traffic, rpzvar):
+    """
+    Test whether the pruned state-based detection gives the same
+    conflicts, losses of separation and conflict geometry as
+    the full-matrix state-based detection.
+    """
+    traf = random_traffic
+    rpz, hpz, dtlookahead = cdsettings(traf.ntraf, rpzvar)
+
+    ref = StateBased.detect_matrix(traf, traf, rpz, hpz, dtlookahead)
+    res = detect(SpatialStateBased, traf, rpz, hpz, dtlookahead)
+
+    # Make sure the test actually covers conflicts and LoS
+    assert len(ref[0]) > 0
+    assert len(ref[1]) > 0
+
+    # confpairs and lospairs should be identical, also in their order
+    assert res[0] == ref[0]
+    assert res[1] == ref[1]
+
+    # inconf, tcpamax, qdr, dist, dcpa, tcpa, tLOS
+    for resval, refval in zip(res[2:], ref[2:]):
+        assert np.shape(resval) == np.shape(refval)
+        assert np.allclose(resval, refval)
+
+
+@pytest.mark.parametrize('tilesize', [1, 1000, 65536])
+def test_statebased_tiled_equals_matrix(random_traffic, tilesize):
+    """
+    Test whether the tiled state-based detection gives the same
+    results as the full-matrix state-based detection.
+    """
+    traf = random_traffic
+    rpz, hpz, dtlookahead = cdsettings(traf.ntraf, True)
+
+    ref = StateBased.detect_matrix(traf, traf, rpz, hpz, dtlookahead)
+    res = StateBased.detect_tiled(traf, traf, rpz, hpz, dtlookahead, tilesize)
+
+    assert res[0] == ref[0]
+    assert res[1] == ref[1]
+    for resval, refval in zip(res[2:], ref[2:]):
+        assert np.shape(resval) == np.shape(refval)
+        assert np.allclose(resval, refval)
+
+
+def test_statebased_tiled_float32(random_traffic):
+    """
+    Test the single-precision tiled state-based detection against
+    the full-matrix state-based detection.
+    """
+    traf = random_traffic
+    rpz, hpz, dtlookahead = cdsettings(traf.ntraf, False)
+    # Avoid altitude differences of exactly hpz, where the vertical
+    # conflict window depends on rounding
+    rng = np.random.default_rng(42)
+    traf.alt[:] = rng.choice([2000.0, 2600.0, 3300.0, 4500.0], traf.ntraf) * ft
+
+    ref = StateBased.detect_matrix(traf, traf, rpz, hpz, dtlookahead)
+    res = StateBased.detect_tiled(traf, traf, rpz, hpz, dtlookahead,
+                                  4096, dtype=np.float32)
+
+    # Single precision can flip the odd borderline case
+    assert len(set(res[0]) ^ set(ref[0])) <= 0.01 * len(ref[0])
+    assert res[1] == ref[1]
+    assert res[4].dtype == np.float32
+
+
+@pytest.mark.parametrize('nworkers', [1, 4])
+def test_parallelstatebased_equals_statebased(random_traffic, nworkers, monkeypatch):
+    """
+    Test whether the multi-threaded state-based detection gives the same
+    results, in the same order, as the full-matrix state-based detection.
+    """
+    traf = random_traffic
+    rpz, hpz, dtlookahead = cdsettings(traf.ntraf, True)
+    monkeypatch.setattr(bs.settings, 'asas_nworkers', nworkers)
+
+    ref = StateBased.detect_matrix(traf, traf, rpz, hpz, dtlookahead)
+    res = detect(ParallelStateBased, traf, rpz, hpz, dtlookahead)
+
+    assert res[0] == ref[0]
+    assert res[1] == ref[1]
+    for resval, refval in zip(res[2:], ref[2:]):
+        assert np.shape(resval) == np.shape(refval)
+        assert np.allclose(resval, refval)
+
+    # The worker threads are stopped when another CD method is selected
+    assert (ParallelStateBased.pool is not None) == (nworkers > 1)
+    StateBased.select()
+    assert ParallelStateBased.pool is None
+
+
+@pytest.mark.parametrize('method', [StateBased, SpatialStateBased, ParallelStateBased])
+def test_partial_detection(random_traffic, method, monkeypatch):
+    """
+    Test detection of only the pairs with at least one active aircraft,
+    as used by the adaptive ASAS schedule.
+
+    Expects the conflicts and LoS of the full detection of which the
+    ownship or the intruder is active, with the same geometry.
+    """
+    traf = random_traffic
+    rpz, hpz, dtlookahead = cdsettings(traf.ntraf, True)
+    monkeypatch.setattr(bs.settings, 'asas_nworkers', 4)
+    active = np.arange(traf.ntraf) % 4 == 1
+
+    ref = StateBased.detect_matrix(traf, traf, rpz, hpz, dtlookahead)
+    method.select()
+    res = method.implinstance().detect(traf, traf, rpz, hpz, dtlookahead, active=active)
+
+    keep = active[ref[0].i] | active[ref[0].j]
+    assert 0 < np.count_nonzero(keep) < len(ref[0])
+    assert list(res[0]) == [pair for pair, k in zip(ref[0], keep) if k]
+    assert list(res[1]) == [pair for pair, i, j in zip(ref[1], ref[1].i, ref[1].j)
+                            if active[i] or active[j]]
+    assert np.array_equal(res[2], np.isin(np.arange(traf.ntraf), ref[0].i[keep]))
+    for resval, refval in zip(res[4:], ref[4:]):
+        assert np.allclose(resval, refval[keep])
+    StateBased.select()
+
+
+def test_conflicttable():
+    """
+    Test the incremental bookkeeping of new, continuing and ended
+    conflicts in the conflict table.
+    """
+    names = ['A', 'B', 'C', 'D']
+    table = ConflictTable(names, {name: uid for uid, name in enumerate(names)})
+
+    # Conflicts are detected from both sides
+    table.update([0, 1, 2, 3], [1, 0, 3, 2], 10.0)
+    assert set(table.unique) == {frozenset('AB'), frozenset('CD')}
+    assert len(table.new) == 2 and len(table.gone) == 0
+
+    table.update([1, 0, 2], [0, 1, 0], 20.0)
+    assert set(table.unique) == {frozenset('AB'), frozenset('AC')}
+    assert list(table.new) == [frozenset('AC')]
+    assert list(table.gone) == [frozenset('CD')]
+    assert list(table.tstart) == [10.0, 20.0]
+    assert ('C', 'A') in table.unique and frozenset('AB') in table.unique
+    assert ('C', 'D') not in table.unique and ('A', 'E') not in table.unique
+
+    table.update([], [], 30.0)
+    assert len(table.unique) == 0
+    assert len(table.all) == 3
+    endkey, tstart, tend = table.ended
+    assert list(PairHistory(names, endkey)) == \
+        [frozenset('CD'), frozenset('AB'), frozenset('AC')]
+    assert list(tstart) == [10.0, 10.0, 20.0]
+    assert list(tend) == [20.0, 30.0, 30.0]
+
+    # A recurring conflict is a new entry in all, but not in allunique
+    table.update([0], [1], 40.0)
+    assert len(table.all) == 4
+    assert list(table.allunique) == [frozenset('AB'), frozenset('CD'), frozenset('AC')]
+
+
+def test_cd_update_tables(random_traffic):
+    """
+    Test whether the unique conflict views of ConflictDetection match
+    the conflict pairs detected in the current timestep.
+    """
+    traf = random_traffic
+    StateBased.select()
+    cd = traf.cd
+    cd.rpz[:], cd.hpz[:], cd.dtlookahead[:] = cdsettings(traf.ntraf, False)
+    cd.update(traf, traf)
+
+    assert len(cd.confpairs) > 0
+    assert set(cd.confpairs_unique) == {frozenset(pair) for pair in cd.confpairs}
+    assert set(cd.lospairs_unique) == {frozenset(pair) for pair in cd.lospairs}
+    assert len(cd.confpairs_all) == len(cd.confpairs_unique)
+    assert all(pair in cd.confpairs_unique for pair in cd.confpairs)
+
+    # Pairs stay valid when aircraft are deleted before the next detection
+    pairs = list(cd.confpairs)
+    traf.delete([0, traf.ntraf - 1])
+    assert list(cd.confpairs) == pairs
+
+
+@pytest.mark.parametrize('mode', ['horizontal', 'vertical', 'combined'])
+@pytest.mark.parametrize('priocode', [None, 'FF1', 'FF2', 'FF3', 'LAY1', 'LAY2'])
+def test_batchmvp_equals_mvp(random_traffic, priocode, mode):
+    """
+    Test whether the vectorised MVP resolution gives the same resolutions
+    as the per-pair MVP resolution, including priority rules, noreso and
+    resooff aircraft, for horizontal, vertical, and combined resolutions.
+    Expects no invalid values (NaN) to be created by the vectorised version.
+    """
+    traf = random_traffic
+    StateBased.select()
+    cd = traf.cd
+    cd.rpz[:], cd.hpz[:], cd.dtlookahead[:] = cdsettings(traf.ntraf, True)
+    cd.update(traf, traf)
+    assert len(cd.confpairs) > 0
+
+    results = []
+    for method in (MVP, BatchMVP):
+        method.select()
+        reso = method.implinstance()
+        reso.swprio = priocode is not None
+        reso.priocode = priocode or ''
+        reso.swresohoriz = mode == 'horizontal'
+        reso.swresovert = mode == 'vertical'
+        reso.noresoac[::7] = True
+        reso.resooffac[::11] = True
+        if method is MVP:
+            # MVP can give infinite and NaN resolutions
+            with np.errstate(all='ignore'):
+                results.append(reso.resolve(cd, traf, traf))
+        else:
+            with np.errstate(all='raise'):
+                results.append(reso.resolve(cd, traf, traf))
+        reso.swresohoriz, reso.swresovert = True, False
+    ConflictResolution.selectdefault()
+
+    # Compare the aircraft for which MVP gives a valid resolution
+    valid = np.all(np.isfinite(results[0]), axis=0)
+    assert np.count_nonzero(valid) > traf.ntraf // 2
+    for refval, resval in zip(*results):
+        assert np.isfinite(resval).all()
+        assert np.allclose(resval[valid], refval[valid])
@@ -0,0 +1,44 @@
+"""
+Tests the headless batch runner.
+"""
+
+from bluesky.simulation import batch
+
+
+def test_batch_run(tmp_path):
+    """
+    Test running a scenario file and a batch file with two scenarios on
+    a process pool, and resuming an interrupted batch.
+
+    Expects a result per scenario, ended by HOLD, QUIT or deletion of all
+    traffic, with the echo messages of the scenario.
+    """
+    (tmp_path / 'a.scn').write_text(
+        '00:00:00.00>CRE KL1 B744 52 4 90 FL100 250\n'
+        '00:00:30.00>ECHO halfway\n'
+        '00:01:00.00>HOLD\n')
+    (tmp_path / 'b.scn').write_text(
+        '00:00:00.00>SCEN B1\n'
+        '00:00:00.00>CRE KL1 B744 52 4 90 FL100 250\n'
+        '00:00:00.00>SCHEDULE 00:00:20 DEL KL1\n'
+        '00:00:00.00>SCEN B2\n'
+        '00:00:00.00>CRE KL1 B744 52 4 90 FL100 250\n'
+        '00:00:00.00>CRE KL2 B744 52 4 90 FL100 250\n'
+        '00:00:10.00>QUIT\n')
+    resultfile = tmp_path / 'results.jsonl'
+    messages = []
+
+    # First run is interrupted after the first scenario
+    results = batch.run([str(tmp_path / 'a.scn')], 1, resultfile, progress=messages.append)
+    assert list(results) == ['a']
+    assert results['a']['status'] == 'ok' and results['a']['simt'] == 60.0
+    assert results['a']['messages'] == ['halfway']
+
+    results = batch.run([str(tmp_path / 'a.scn'), str(tmp_path / 'b.scn')], 2,
+                        resultfile, resume=True, progress=messages.append)
+    assert sorted(results) == ['B1', 'B2']
+    assert results['B1']['ntraf'] == 0 and round(results['B1']['simt']) == 20
+    assert results['B2']['ntraf'] == 2 and results['B2']['simt'] == 10.0
+    assert all(result['status'] == 'ok' for result in results.values())
+    assert any('Resuming batch' in msg for msg in messages)
+    assert len(batch.readresults(resultfile)) == 3
@@ -0,0 +1,47 @@
+"""
+Tests the data logger, with text and binary log files.
+"""
+
+import numpy as np
+import bluesky
+from bluesky.tools import datalog
+
+
+def test_datalog_binary(traffic_, tmp_path, monkeypatch):
+    """
+    Test a periodic binary logger with variables selected with
+    ADD FROM parent var, written in several row groups.
+
+    Expects the reader to return the same columns as the CSV logger.
+    """
+    monkeypatch.setattr(bluesky.settings, 'log_path', str(tmp_path))
+    monkeypatch.setattr(bluesky.settings, 'log_rowgroup', 25)
+    traffic_.reset()
+    traffic_.cre([f'AC{i}' for i in range(10)], aclat=np.arange(10.0))
+
+    logs = []
+    for fmt in ('CSV', 'BIN'):
+        log = datalog.crelog('TEST' + fmt, 1.0, 'test header', fmt)
+        assert log.stackio('ADD', 'FROM', 'traf', 'id', 'lat', 'alt')
+        bluesky.sim.simt = 0.0
+        log.start()
+        for i in range(6):
+            bluesky.sim.simt = float(i)
+            log.log()
+        logs.append(log.fname)
+        log.reset()
+        assert log.stackio('FORMAT', 'CSV')
+        del datalog.allloggers[log.name], datalog.periodicloggers[log.name]
+
+    assert logs[0].suffix == '.log' and logs[1].suffix == '.npz'
+    header, table = datalog.readlog(logs[1])
+    assert header == ['test header']
+    assert list(table) == ['simt', 'id', 'lat', 'alt']
+
+    text = np.loadtxt(logs[0], delimiter=',', dtype=str)
+    assert len(table['simt']) == len(text) == 60
+    assert list(table['id']) == list(text[:, 1])
+    assert np.allclose(table['lat'], text[:, 2].astype(float))
+    assert np.array_equal(table['simt'], np.repeat(np.arange(6.0), 10))
+    bluesky.sim.simt = 0.0
+    traffic_.reset()
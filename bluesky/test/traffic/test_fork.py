@@ -0,0 +1,93 @@
+"""
+Tests forking a running simulation into branches with FORK.
+"""
+
+import os
+import numpy as np
+import bluesky
+from bluesky import stack
+from bluesky.core import simtime
+from bluesky.network import detached
+from bluesky.stack import simstack
+from bluesky.stack.stackbase import Stack
+from bluesky.tools import datalog
+
+
+def test_fork(traffic_, tmp_path, monkeypatch):
+    """
+    Test forking a simulation with a periodic log into two branches that
+    each get a different altitude command.
+
+    Expects the branches to continue from the state of the parent, with the
+    commands of their own scenario file, and with their own log files,
+    while the parent continues unchanged.
+    """
+    monkeypatch.setattr(bluesky, 'net', detached.Node())
+    monkeypatch.setattr(bluesky.settings, 'log_path', str(tmp_path))
+    monkeypatch.setattr(bluesky.scr, 'echo', lambda text='', flags=0: None)
+    for name in ('state', 'simt', 'simdt', 'utc', 'syst', 'branches'):
+        monkeypatch.setattr(bluesky.sim, name, getattr(bluesky.sim, name))
+    simtime.reset()
+    simstack.reset()
+    traffic_.reset()
+    Stack.scenname = 'WARM'
+    (tmp_path / 'low.scn').write_text('00:00:00.00>ALT KL1 FL50\n')
+    (tmp_path / 'high.scn').write_text('00:00:00.00>ALT KL1 FL150\n')
+    stack.stack('CRE KL1 B744 52 4 90 FL100 250')
+    log = datalog.crelog('FORKLOG', 1.0, 'fork test')
+    log.addvars(['traf.alt'])
+    log.start()
+    bluesky.sim.op()
+
+    def run(nsteps):
+        for _ in range(nsteps):
+            bluesky.sim.step()
+
+    run(200)
+    assert not bluesky.sim.fork(str(tmp_path / 'nofile'))[0]
+    assert not bluesky.sim.branches
+
+    parent = os.getpid()
+    simt = bluesky.sim.simt
+    ok, msg = bluesky.sim.fork(str(tmp_path / 'low'), str(tmp_path / 'high'))
+    if os.getpid() != parent:
+        # This is a branch: save its results, and end it without returning
+        # to the test runner
+        status = 1
+        try:
+            run(400)
+            np.save(tmp_path / f'{Stack.scenname}.npy', [traffic_.alt[0],
+                    traffic_.selalt[0], bluesky.sim.simt])
+            datalog.reset()
+            status = 0
+        finally:
+            os._exit(status)
+
+    assert ok and sorted(bluesky.sim.branches.values()) == ['high', 'low']
+    for pid in bluesky.sim.branches:
+        assert os.waitpid(pid, 0)[1] == 0
+    run(400)
+    assert round(traffic_.selalt[0] / 0.3048) == 10000
+    datalog.reset()
+
+    for name, fl in (('low', 50), ('high', 150)):
+        alt, selalt, tend = np.load(tmp_path / f'WARM_{name}.npy')
+        assert round(selalt / 0.3048) == fl * 100 and tend == bluesky.sim.simt
+        assert (alt < traffic_.alt[0]) if fl < 100 else (alt > traffic_.alt[0])
+
+        # The log of a branch starts at the fork
+        logfile, = tmp_path.glob(f'FORKLOG_WARM_{name}_*.log')
+        data = np.loadtxt(logfile, delimiter=',')
+        assert data[0, 0] == simt and data[-1, 0] > simt + 15.0
+
+    # The log of the parent is not affected by the branches
+    logfile, = tmp_path.glob('FORKLOG_WARM_2*.log')
+    data = np.loadtxt(logfile, delimiter=',')
+    assert data[0, 0] == 0.0 and np.all(np.diff(data[:, 0]) > 0.0)
+    assert data[-1, 0] > simt + 15.0
+
+    datalog.allloggers.pop('FORKLOG')
+    datalog.periodicloggers.pop('FORKLOG')
+    simtime.reset()
+    simstack.reset()
+    traffic_.reset()
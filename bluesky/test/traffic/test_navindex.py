@@ -0,0 +1,127 @@
+"""
+Tests the name and spatial indices of the navigation database, and its
+cache.
+"""
+
+import numpy as np
+import pytest
+import bluesky
+from bluesky.tools import cachefile, geo
+from bluesky.navdatabase.navindex import GridIndex
+
+
+def test_gridindex():
+    """
+    Test nearest point and box queries on a spatial index of random points,
+    also around the date line and near the poles.
+
+    Expects the same points as a search through all points.
+    """
+    rng = np.random.default_rng(5)
+    lat = np.degrees(np.arcsin(rng.uniform(-1.0, 1.0, 5000)))
+    lon = rng.uniform(-180.0, 180.0, 5000)
+    grid = GridIndex(lat, lon, cellsize=2.0)
+    navdb = bluesky.navdatabase.Navdatabase.__new__(bluesky.navdatabase.Navdatabase)
+
+    for qlat, qlon in zip(rng.uniform(-89.0, 89.0, 200), rng.uniform(-180.0, 180.0, 200)):
+        assert grid.nearest(lat, lon, qlat, qlon) == navdb.getinear(lat, lon, qlat, qlon)
+    assert grid.nearest(lat, lon, 10.0, 179.9) == navdb.getinear(lat, lon, 10.0, 179.9)
+
+    for lat0, lon0 in zip(rng.uniform(-90.0, 80.0, 100), rng.uniform(-180.0, 170.0, 100)):
+        box = (lat0, lat0 + rng.uniform(0.0, 10.0), lon0, lon0 + rng.uniform(0.0, 10.0))
+        assert list(grid.inside(lat, lon, *box)) == navdb.getinside(lat, lon, *box)
+    box = (-90.0, 90.0, -180.0, 180.0)
+    assert list(grid.inside(lat, lon, *box)) == navdb.getinside(lat, lon, *box)
+
+    # Points that are added after building the index are found as well
+    lat, lon = np.append(lat, 45.1), np.append(lon, 5.1)
+    grid.add(len(lat) - 1)
+    assert grid.nearest(lat, lon, 45.1, 5.1) == len(lat) - 1
+    assert len(lat) - 1 in grid.inside(lat, lon, 45.0, 46.0, 5.0, 6.0)
+
+
+def test_navdb_lookup(traffic_, monkeypatch):
+    """
+    Test looking up waypoints and airports by name and position, and
+    adding and deleting waypoints.
+
+    Expects the same waypoints as searching the lists of identifiers, and
+    indices that follow the added and deleted waypoints.
+    """
+    navdb = bluesky.navdb
+    monkeypatch.setattr(bluesky.scr, 'addnavwpt', lambda *args: None)
+    monkeypatch.setattr(bluesky.scr, 'removenavwpt', lambda *args: None)
+
+    # Waypoints with the most duplicates
+    names = sorted(navdb.wpindex, key=lambda name: len(navdb.wpindex[name]))[-20:]
+    for name in names:
+        idx = [i for i, wpid in enumerate(navdb.wpid) if wpid == name]
+        assert navdb.wpindex[name] == idx
+        assert navdb.getwpidx(name.lower()) == idx[0]
+        dist = [geo.kwikdist(52.0, 4.0, navdb.wplat[i], navdb.wplon[i]) for i in idx]
+        assert navdb.getwpidx(name, 52.0, 4.0) == idx[int(np.argmin(dist))]
+        assert navdb.getwpindices(name, 52.0, 4.0)[0] == idx[int(np.argmin(dist))]
+    assert navdb.getwpidx('NOSUCHWPT') == -1 and navdb.getwpindices('NOSUCHWPT') == [-1]
+    assert navdb.getaptidx('EHAM') == navdb.aptid.index('EHAM')
+    assert navdb.getapinear(52.3, 4.76) == navdb.getinear(navdb.aptlat, navdb.aptlon, 52.3, 4.76)
+    assert navdb.getwpinside(51.0, 53.0, 3.0, 6.0) == \
+        navdb.getinside(navdb.wplat, navdb.wplon, 51.0, 53.0, 3.0, 6.0)
+
+    nwp = len(navdb.wpid)
+    assert navdb.defwpt('TESTWPT', 45.123, 5.123)[0]
+    assert navdb.getwpidx('TESTWPT') == nwp
+    assert navdb.getwpinear(45.123, 5.123) == nwp
+    assert navdb.delwpt('TESTWPT')[0]
+    assert navdb.getwpidx('TESTWPT') == -1
+    assert len(navdb.wplat) == len(navdb.wpid) == nwp
+    assert navdb.getwpidx(names[0]) == navdb.wpid.index(names[0])
+
+
+def test_arraycache(tmp_path, monkeypatch):
+    """
+    Test storing and loading dicts of data columns in an array cache.
+
+    Expects the same data after loading, with memory-mapped arrays, and a
+    cache error for a missing or outdated cache.
+    """
+    monkeypatch.setattr(bluesky.settings, 'cache_path', str(tmp_path))
+    data = dict(lat=np.linspace(50.0, 54.0, 5), id=['EHAM', 'LFPG', 'Zürich', ''], nul=['A\0B', 'C'],
+                elev=[0.0, 1.5], empty=[], idx=dict(EHAM=[0]), names=np.array(['A', 'BC']))
+    with cachefile.openarrays('test', 'v1') as cache:
+        with pytest.raises(cachefile.CacheError):
+            cache.load('data')
+        cache.dump('data', data)
+    assert not list(tmp_path.glob('*.tmp*'))
+
+    with cachefile.openarrays('test', 'v1') as cache:
+        result = cache.load('data')
+    assert list(result) == list(data)
+    assert isinstance(result['lat'], np.memmap) and np.array_equal(result['lat'], data['lat'])
+    assert np.array_equal(result['names'], data['names'])
+    for key in ('id', 'nul', 'elev', 'empty', 'idx'):
+        assert result[key] == data[key]
+
+    with cachefile.openarrays('test', 'v2') as cache:
+        with pytest.raises(cachefile.CacheError):
+            cache.load('data')
+
+
+def test_navdb_reset(traffic_, monkeypatch):
+    """
+    Test resetting the navigation database.
+
+    Expects that the database is only reloaded when waypoints were added
+    or deleted.
+    """
+    navdb = bluesky.navdb
+    monkeypatch.setattr(bluesky.scr, 'addnavwpt', lambda *args: None)
+    navdb.reset()
+    wpid = navdb.wpid
+    navdb.reset()
+    assert navdb.wpid is wpid and not navdb.changed
+    assert isinstance(navdb.wplat, np.memmap)
+
+    navdb.defwpt('TESTWPT', 45.123, 5.123)
+    navdb.reset()
+    assert navdb.wpid is not wpid and 'TESTWPT' not in navdb.wpindex
+    assert len(navdb.wpid) == len(wpid) - 1
@@ -0,0 +1,113 @@
+"""
+Tests the compiled OpenAP coefficient table, and creating aircraft of
+mixed types with the OpenAP performance model.
+"""
+
+import numpy as np
+import bluesky
+from bluesky.traffic.performance.perfbase import PerfBase
+from bluesky.traffic.performance.openap import coeff, thrust, OpenAP
+
+
+def lookup(c, actype):
+    """ Reference per-aircraft lookup of the performance parameters, from
+        the nested dicts of the coefficients. """
+    values = {}
+    if actype not in c.actypes_rotor and actype not in c.dragpolar_fixwing:
+        actype = c.synodict.get(actype, actype)
+
+    if actype in c.actypes_rotor:
+        values['lifttype'] = coeff.LIFT_ROTOR
+        values['mass'] = 0.5 * (c.acs_rotor[actype]['oew'] + c.acs_rotor[actype]['mtow'])
+        values['engnum'] = int(c.acs_rotor[actype]['n_engines'])
+        values['engpower'] = c.acs_rotor[actype]['engines'][0][1]
+    else:
+        if actype not in c.actypes_fixwing:
+            actype = 'B744'
+        es = c.acs_fixwing[actype]['engines']
+        e = es[list(es.keys())[0]]
+        values['ff_coeff_a'], values['ff_coeff_b'], values['ff_coeff_c'] = \
+            thrust.compute_eng_ff_coeff(e['ff_idl'], e['ff_app'], e['ff_co'], e['ff_to'])
+        values['lifttype'] = coeff.LIFT_FIXWING
+        values['Sref'] = c.acs_fixwing[actype]['wa']
+        values['mass'] = 0.5 * (c.acs_fixwing[actype]['oew'] + c.acs_fixwing[actype]['mtow'])
+        values['engnum'] = int(c.acs_fixwing[actype]['n_engines'])
+        values['engthrmax'] = e['thr']
+        values['engbpr'] = e['bpr']
+
+    if actype in c.limits_rotor:
+        for name in ('vmin', 'vmax', 'vsmin', 'vsmax', 'hmax'):
+            values[name] = c.limits_rotor[actype][name]
+        for name in ('cd0_clean', 'k_clean', 'cd0_to', 'k_to', 'cd0_ld', 'k_ld', 'delta_cd_gear'):
+            values[name] = np.nan
+    else:
+        if actype not in c.limits_fixwing:
+            actype = 'B744'
+        limits = c.limits_fixwing[actype]
+        for name in ('vminic', 'vminer', 'vminap', 'vmaxic', 'vmaxer', 'vmaxap',
+                     'vsmin', 'vsmax', 'hmax', 'axmax', 'vminto', 'mmo'):
+            values[name] = limits[name]
+        values['hcross'] = limits['crosscl']
+        dragpolar = c.dragpolar_fixwing.get(actype, c.dragpolar_fixwing['NA'])
+        for name in ('cd0_clean', 'k_clean', 'cd0_to', 'k_to', 'cd0_ld', 'k_ld', 'delta_cd_gear'):
+            values[name] = dragpolar[name]
+    return actype, values
+
+
+def test_coefftable(traffic_, tmp_path, monkeypatch):
+    """
+    Test compiling and caching the coefficient table.
+
+    Expects the same parameters as looking them up per type, also for
+    synonyms, lower case and unknown types, and the same table when it is
+    loaded from the cache.
+    """
+    monkeypatch.setattr(bluesky.settings, 'cache_path', str(tmp_path))
+    c = coeff.Coefficient()
+    table = coeff.load_table()
+    assert (tmp_path / 'openap.p').is_file()
+
+    actypes = list(c.actypes_fixwing) + list(c.actypes_rotor) + list(c.synodict) + ['NOSUCHTYPE', 'a320']
+    codes = table.typecodes(actypes)
+    for actype, code in zip(actypes, codes):
+        mdl, values = lookup(c, actype.upper())
+        assert table.actype[code] == mdl
+        for name, value in values.items():
+            assert np.allclose(table.params[name][code], value, equal_nan=True), (actype, name)
+
+    def compile(coeff):
+        raise AssertionError('Table compiled again')
+
+    monkeypatch.setattr(coeff.CoeffTable, 'compile', compile)
+    cached = coeff.load_table()
+    assert np.array_equal(cached.names, table.names) and cached.actype == table.actype
+    for name, value in table.params.items():
+        assert np.array_equal(cached.params[name], value, equal_nan=True)
+
+
+def test_create_mixed_types(traffic_):
+    """
+    Test creating a batch of aircraft of mixed types with OpenAP.
+
+    Expects the parameters of the type of each aircraft, instead of those
+    of the last aircraft in the batch.
+    """
+    previous = PerfBase.selected()
+    OpenAP.select()
+    PerfBase()
+    try:
+        traffic_.reset()
+        actypes = ['A320', 'EC35', 'B738', 'NOSUCHTYPE', 'EC35', 'a320']
+        traffic_.cre([f'AC{i}' for i in range(len(actypes))], actypes)
+        perf = traffic_.perf
+        c = perf.coeff
+        for i, actype in enumerate(actypes):
+            mdl, values = lookup(c, actype.upper())
+            assert perf.actype[i] == mdl
+            for name, value in values.items():
+                assert np.allclose(getattr(perf, name)[i], value, equal_nan=True), (actype, name)
+        assert perf.Sref[1] == 0.0 and perf.engpower[0] == 0.0
+    finally:
+        traffic_.reset()
+        previous.select()
+        PerfBase()
@@ -7,6 +7,9 @@ GNU General Public License v3.
 Author <ahfarrell@sparkl.com> Andrew Farrell
 Tests route module, wpt functionality
 """
+import numpy as np
+from bluesky.tools import geo
+from bluesky.tools.aero import nm
 from . import assert_fl
 
 
@@ -399,3 +402,79 @@ def test_before_addwpt_stack(traffic_):
     assert route.wpspd[1] == 200.
     assert route.wpname[1] == 'BA222001'
     assert route.wptype[1] == 0
+
+
+def test_route_getnextwps(traffic_, route_):
+    """
+    Test switching several routes to their next waypoint at once, with
+    the waypoint data gathered from the route table.
+
+    Expects the same waypoint data as getnextwp and getnextturnwp of each
+    route, also after a waypoint was deleted from one of the routes.
+    """
+    import copy
+    traffic_.reset()
+    traffic_.cre(['R0', 'R1', 'R2'], aclat=52., aclon=4.)
+    routes = list(traffic_.ap.route)
+    for i, route in enumerate(routes):
+        route.swflyturn = i != 1
+        route.turnrad = 500. if i == 2 else -999.
+        for k in range(4 + i):
+            alt = 1000. * k if k % 2 else -999.
+            route.addwpt(i, traffic_.id[i], route.wplatlon,
+                         52. + 0.01 * k, 4. + 0.02 * k * (k % 3), alt, 100.)
+        route.calcfp()
+        route.iactwp = 0
+
+    for step in range(6):
+        if step == 2:
+            route_.Route.delwpt(1, routes[1].wpname[2])
+        active = [route for route in routes if route.iactwp < route.nwp - 1]
+        route_.Route.table.update()
+        refs = [copy.deepcopy(route) for route in active]
+        wp = route_.Route.getnextwps(active)
+        for j, ref in enumerate(refs):
+            lat, lon, alt, spd, xtoalt, toalt, xtorta, torta, lnavon, \
+                flyby, flyturn, turnrad, turnspd, turnhdgr, nextqdr, swlastwp = \
+                ref.getnextwp()
+            assert active[j].iactwp == ref.iactwp
+            assert [wp['lat'][j], wp['lon'][j], wp['alt'][j], wp['toalt'][j],
+                    wp['xtoalt'][j], wp['flyturn'][j], wp['turnrad'][j]] == \
+                [lat, lon, alt, toalt, xtoalt, flyturn, turnrad]
+            assert wp['lnavon'][j] == lnavon and wp['swlastwp'][j] == swlastwp
+            assert wp['nextqdr'][j] == nextqdr
+            assert [wp[name][j] for name in ('nextturnlat', 'nextturnlon',
+                    'nextturnspd', 'nextturnrad', 'nextturnhdgr', 'nextturnidx')] == \
+                ref.getnextturnwp()
+    traffic_.reset()
+
+
+def test_route_calcfp(traffic_, route_):
+    """
+    Test the flight plan calculations of the route table, for a route
+    along a meridian with one altitude constraint.
+
+    Expects leg lengths and directions, and the distance to the next
+    altitude constraint at each waypoint.
+    """
+    traffic_.reset()
+    traffic_.cre('FP1', aclat=51.9, aclon=4.)
+    route = traffic_.ap.route[0]
+    for k, alt in enumerate([-999., -999., 3000., -999.]):
+        route.addwpt(0, 'FP1', route.wplatlon, 52. + 0.1 * k, 4., alt, -999.)
+    route.calcfp()
+
+    legs = [geo.qdrdist(52. + 0.1 * k, 4., 52.1 + 0.1 * k, 4.)[1] for k in range(3)]
+    assert_fl(legs[0], 6.0)
+    assert np.allclose(route.wpdistto, [0.] + legs)
+    assert np.allclose(route.wpdirfrom, 0.) and np.allclose(route.wpdirto, 0.)
+    assert list(route.wpialt) == [2, 2, 2, -1]
+    assert list(route.wptoalt) == [3000., 3000., 3000., -999.]
+    assert np.allclose(route.wpxtoalt, [(legs[0] + legs[1]) * nm, legs[1] * nm, 0., 0.])
+    assert list(route.wptorta) == 4 * [-999.]
+
+    # A destination is an altitude constraint at the ground
+    route.addwpt(0, 'EHAM', route.dest, 52.3, 4.76, -999., -999.)
+    route.calcfp()
+    assert list(route.wptoalt) == [3000., 3000., 3000., 0., 0.]
+    traffic_.reset()
@@ -0,0 +1,55 @@
+"""
+Tests the profiler of the simulation step.
+"""
+
+import bluesky
+from bluesky.core import simprof
+from bluesky.stack import simstack
+
+
+def test_simprof(traffic_, tmp_path, monkeypatch):
+    """
+    Test profiling a number of simulation steps with SIMPROF ON/DUMP/OFF.
+
+    Expects wall time samples of the phases of the simulation and traffic
+    update, a histogram with all samples, and a profile file.
+    """
+    monkeypatch.setattr(bluesky.settings, 'log_path', str(tmp_path))
+    monkeypatch.setattr(bluesky.scr, 'echo', lambda text='', flags=0: None)
+    # Restore the simulation state afterwards: a reset of the simulation
+    # would send events over the network
+    for name in ('state', 'simt', 'simdt', 'utc', 'syst'):
+        monkeypatch.setattr(bluesky.sim, name, getattr(bluesky.sim, name))
+    simstack.reset()
+    traffic_.reset()
+    traffic_.cre([f'AC{i}' for i in range(10)])
+
+    assert not simprof.active() and simprof.tic() == 0.0
+    assert simprof.simprof('ON')[0]
+    bluesky.sim.op()
+    for _ in range(20):
+        bluesky.sim.step()
+    ok, msg = simprof.simprof('OFF')
+    assert ok and 'traffic.autopilot' in msg
+
+    summary = simprof.summary()
+    assert summary['nsteps'] == 20
+    assert {'step', 'traffic', 'traffic.atmosphere', 'traffic.autopilot',
+            'traffic.kinematics'} <= set(summary['names'])
+    istep = summary['names'].index('step')
+    assert summary['count'][istep] == 20
+    assert all(summary['hist'].sum(axis=1) == summary['count'])
+    assert all(summary['tmin'] <= summary['mean']) and all(summary['mean'] <= summary['tmax'])
+
+    # Phases are not recorded while the profiler is off
+    bluesky.sim.step()
+    assert simprof.phases['step'].count == 20
+
+    ok, _ = simprof.simprof('DUMP', 'prof.log')
+    lines = (tmp_path / 'prof.log').read_text().splitlines()
+    assert ok and len(lines) == 3 + len(summary['names'])
+    assert lines[3].split(', ')[0] == summary['names'][0]
+    assert not simprof.simprof('ONN')[0]
+
+    simprof.reset()
+    traffic_.reset()
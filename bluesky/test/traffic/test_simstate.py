@@ -0,0 +1,59 @@
+"""
+Tests checkpoints of the simulation state with SAVESTATE and LOADSTATE.
+"""
+
+import numpy as np
+import bluesky
+from bluesky import stack
+from bluesky.stack import simstack
+from bluesky.simulation import simstate
+
+
+def test_simstate(traffic_, tmp_path, monkeypatch):
+    """
+    Test saving the state of aircraft with routes and conditional
+    commands, and continuing the simulation twice from the saved state.
+
+    Expects the same aircraft states as the simulation that continued after
+    saving the state, also for the commands scheduled after the checkpoint.
+    """
+    monkeypatch.setattr(bluesky.scr, 'echo', lambda text='', flags=0: None)
+    for name in ('state', 'simt', 'simdt', 'utc', 'syst'):
+        monkeypatch.setattr(bluesky.sim, name, getattr(bluesky.sim, name))
+    simstack.reset()
+    traffic_.reset()
+    for i in range(5):
+        stack.stack(f'CRE AC{i} B744 52 {4 + 0.1 * i} 0 FL100 250')
+        stack.stack(f'ADDWPT AC{i} 52.02 {4 + 0.1 * i} FL200')
+        stack.stack(f'ADDWPT AC{i} 52.5 4.5 FL150')
+        stack.stack(f'AC{i} LNAV ON; AC{i} VNAV ON; AC{i} ATALT FL120 SPD AC{i} 200')
+    stack.stack('SCHEDULE 00:00:20 CRE LATE B738 52 4 90 FL200 250')
+    bluesky.sim.op()
+
+    def run(nsteps):
+        for _ in range(nsteps):
+            bluesky.sim.step()
+
+    run(200)
+    fname = tmp_path / 'warm'
+    assert simstate.savestate(str(fname))[0]
+    simt = bluesky.sim.simt
+    run(600)
+    ids = list(traffic_.id)
+    ref = [np.copy(getattr(traffic_, v)) for v in ('lat', 'lon', 'alt', 'cas')]
+    iactwp = [route.iactwp for route in traffic_.ap.route]
+    assert 'LATE' in ids and all(i > 0 for i in iactwp[:5])
+
+    for _ in range(2):
+        ok, msg = simstate.loadstate(str(fname))
+        assert ok and bluesky.sim.simt == simt
+        assert 'LATE' not in traffic_.id
+        run(600)
+        assert list(traffic_.id) == ids
+        assert [route.iactwp for route in traffic_.ap.route] == iactwp
+        for v1, v2 in zip(ref, (getattr(traffic_, v) for v in ('lat', 'lon', 'alt', 'cas'))):
+            assert np.array_equal(v1, v2)
+
+    assert not simstate.loadstate(str(tmp_path / 'nostate'))[0]
+    simstack.reset()
+    traffic_.reset()
@@ -0,0 +1,85 @@
+"""
+Tests lazy startup: the deferred loading of the navigation database, the
+cache of the plugin discovery, and the startup profiler.
+"""
+
+import bluesky
+from bluesky import startupprof
+from bluesky.core.plugin import Plugin
+
+
+def test_lazy_navdb(traffic_, monkeypatch):
+    """
+    Test the navigation database with lazy startup.
+
+    Expects that the database is only loaded when one of its variables is
+    first used, and not by a reset before that.
+    """
+    monkeypatch.setattr(bluesky.settings, 'lazy_startup', True)
+    navdb = bluesky.navdatabase.Navdatabase()
+    assert not navdb.loaded
+    navdb.reset()
+    assert not navdb.loaded
+    assert navdb.getaptidx('EHAM') == bluesky.navdb.getaptidx('EHAM')
+    assert navdb.loaded and len(navdb.wpid) == len(bluesky.navdb.wpid)
+    assert not hasattr(navdb, 'nosuchvariable')
+
+
+def test_plugin_cache(traffic_, tmp_path, monkeypatch):
+    """
+    Test finding plugins with the cache of parsed plugin files.
+
+    Expects the same plugins when they are found from the cache, without
+    parsing the plugin files again.
+    """
+    monkeypatch.setattr(bluesky.settings, 'cache_path', str(tmp_path))
+    monkeypatch.setattr(Plugin, 'plugins', dict())
+    monkeypatch.setattr(Plugin, 'plugins_ext', list())
+    Plugin.find_plugins('sim')
+    assert (tmp_path / 'plugins.p').is_file()
+    found = {name: (p.fullname, p.plugin_doc, p.plugin_stack) for name, p in Plugin.plugins.items()}
+    ext = list(Plugin.plugins_ext)
+    assert 'AREA' in found and ext
+
+    def parse_plugin(fname):
+        raise AssertionError(f'{fname} parsed again')
+
+    monkeypatch.setattr(Plugin, 'parse_plugin', staticmethod(parse_plugin))
+    monkeypatch.setattr(Plugin, 'plugins', dict())
+    monkeypatch.setattr(Plugin, 'plugins_ext', list())
+    Plugin.find_plugins('sim')
+    assert {name: (p.fullname, p.plugin_doc, p.plugin_stack)
+            for name, p in Plugin.plugins.items()} == found
+    assert Plugin.plugins_ext == ext
+
+
+def test_startupprof(tmp_path, monkeypatch):
+    """
+    Test timing imports and initialisation steps with the startup profiler.
+
+    Expects the imported modules and the steps in the report, and the
+    original import function after stopping the profiler.
+    """
+    (tmp_path / 'profmod_a.py').write_text('import profmod_b\n')
+    (tmp_path / 'profmod_b.py').write_text('x = 1\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(startupprof, 'imports', list())
+    monkeypatch.setattr(startupprof, 'steps', list())
+    import builtins
+    original = builtins.__import__
+
+    startupprof.start()
+    try:
+        assert startupprof.active()
+        with startupprof.step('teststep'):
+            import profmod_a
+    finally:
+        startupprof.stop()
+    assert not startupprof.active() and builtins.__import__ is original
+
+    names = {name: (tself, tcum, depth) for name, tself, tcum, depth in startupprof.imports}
+    assert names['profmod_a'][2] == 0 and names['profmod_b'][2] == 1
+    assert names['profmod_a'][1] >= names['profmod_b'][1]
+    assert [name for name, _ in startupprof.steps] == ['teststep']
+    report = startupprof.report()
+    assert 'teststep' in report and 'profmod_a' in report and ' profmod_b' in report
@@ -0,0 +1,215 @@
+"""
+Tests the encoding of stream data in message frames, and the delta
+encoding of the aircraft data stream.
+"""
+
+import time
+import msgpack
+import numpy as np
+import zmq
+import bluesky
+from bluesky.network import node
+from bluesky.network.deltacodec import DeltaEncoder, DeltaDecoder
+from bluesky.network.npcodec import packframes, unpackframes, encode_ndarray
+
+
+def test_packframes():
+    """
+    Test packing nested data with arrays in message frames.
+
+    Expects the same data after unpacking, with arrays that use the memory
+    of their frame, and arrays in the old encoding are still decoded.
+    """
+    data = dict(simt=1.5, id=['KL1', 'KL2'], lat=np.array([52.0, 53.0]),
+                inconf=np.array([True, False]), n=np.arange(6).reshape(2, 3),
+                empty=np.array([], dtype=np.float32), nested=[np.float32(2.0)])
+    frames = packframes(data)
+    assert len(frames) == 5
+    frames = [bytearray(frame) for frame in frames]
+    result = unpackframes(frames)
+    assert result['simt'] == 1.5 and result['id'] == ['KL1', 'KL2']
+    for name in ('lat', 'inconf', 'n', 'empty'):
+        assert result[name].dtype == data[name].dtype
+        assert np.array_equal(result[name], data[name])
+    frames[1][:8] = np.float64(1.0).tobytes()
+    assert result['lat'][0] == 1.0
+
+    old = msgpack.packb(dict(lat=data['lat']), default=encode_ndarray, use_bin_type=True)
+    assert np.array_equal(unpackframes([old])['lat'], data['lat'])
+
+
+def test_delta():
+    """
+    Test delta encoding of aircraft data frames with moving, created,
+    and deleted aircraft, and a missed frame.
+
+    Expects the full data of each frame after decoding, with only the
+    changed values in delta frames.
+    """
+    encoder = DeltaEncoder(interval=10)
+    decoder = DeltaDecoder()
+    ids = [f'AC{i}' for i in range(100)]
+    lat = np.linspace(50.0, 54.0, 100, dtype=np.float32)
+    alt = np.full(100, 3000.0, dtype=np.float32)
+    frames = []
+    for i in range(25):
+        if i == 5:
+            # Create two aircraft and delete one
+            ids = ids[1:] + ['NEW1', 'NEW2']
+            lat = np.append(lat[1:], [51.0, 52.0]).astype(np.float32)
+            alt = np.append(alt[1:], [0.0, 100.0]).astype(np.float32)
+        lat = lat.copy()
+        lat[i::10] += 0.01
+        data = dict(simt=float(i), id=list(ids), lat=lat, alt=alt.copy(),
+                    inconf=np.arange(len(ids)) == i)
+        frame = unpackframes(packframes(encoder.encode(data)))
+        frames.append(frame)
+        if i == 15:
+            # This frame is missed
+            continue
+        result = decoder.decode(frame)
+        if 15 < i < 20:
+            assert result is None
+            continue
+        assert result['simt'] == i and result['id'] == ids
+        for name in ('lat', 'alt', 'inconf'):
+            assert np.array_equal(result[name], data[name])
+
+    assert [frame['key'] for frame in frames].count(True) == 3
+    assert 'id' in frames[5]['data'] and 'id' not in frames[6]['data']
+    assert 'alt' not in frames[6]['data'] and 'alt' not in frames[6]['rows']
+    assert len(frames[6]['rows']['lat'][0]) == 10
+
+
+def test_acdata_streams(traffic_, monkeypatch):
+    """
+    Test sending the aircraft data to subscribers of the full data and of
+    the delta-encoded data.
+
+    Expects only the streams with subscribers, with display fields in
+    single precision.
+    """
+    net = node.Node(0, 0)
+    monkeypatch.setattr(bluesky, 'net', net)
+    traffic_.reset()
+    traffic_.cre(['KL1', 'KL2'], aclat=np.array([52.0, 53.0]), aclon=np.array([4.0, 5.0]))
+
+    sub = zmq.Context.instance().socket(zmq.SUB)
+    net.stream_out.bind('inproc://test_acdata_streams')
+    sub.connect('inproc://test_acdata_streams')
+    sub.subscribe(b'ACDELTA')
+
+    def receive():
+        msgs = []
+        while sub.poll(200):
+            topic, *frames = sub.recv_multipart(copy=False)
+            msgs.append((topic.bytes[:-5], unpackframes(frames)))
+        return msgs
+
+    bluesky.scr.send_aircraft_data()
+    assert receive() == []
+    for _ in range(20):
+        net.update()
+        if net.subscribed(b'ACDELTA'):
+            break
+        time.sleep(0.05)
+    assert net.subscribed(b'ACDELTA') and not net.subscribed(b'ACDATA')
+    # Skip data sent by the timers of the node
+    receive()
+
+    decoder = DeltaDecoder()
+    bluesky.scr.event(b'ACKEYFRAME', None, [b'client'])
+    for _ in range(2):
+        bluesky.scr.send_aircraft_data()
+        (name, frame), = receive()
+        data = decoder.decode(frame)
+        assert name == b'ACDELTA' and data['id'] == ['KL1', 'KL2']
+        assert data['lat'].dtype == np.float32 and np.allclose(data['lat'], [52.0, 53.0])
+    assert not frame['key']
+
+    # Created aircraft are added to the id list of the next delta frame
+    traffic_.cre('KL3', aclat=51.0, aclon=3.0)
+    bluesky.scr.send_aircraft_data()
+    (name, frame), = receive()
+    data = decoder.decode(frame)
+    assert not frame['key'] and data['id'] == ['KL1', 'KL2', 'KL3']
+    assert np.allclose(data['lon'], [4.0, 5.0, 3.0])
+
+    sub.unsubscribe(b'ACDELTA')
+    sub.subscribe(b'ACDATA')
+    for _ in range(20):
+        net.update()
+        if net.subscribed(b'ACDATA'):
+            break
+        time.sleep(0.05)
+    receive()
+    bluesky.scr.send_aircraft_data()
+    (name, data), = receive()
+    assert name == b'ACDATA' and np.allclose(data['lon'], [4.0, 5.0, 3.0])
+
+    sub.close(linger=0)
+    net.stream_out.close(linger=0)
+    net.event_io.close(linger=0)
+    traffic_.reset()
+
+
+def test_acview_streams(traffic_, monkeypatch):
+    """
+    Test sending the aircraft data in the view of a client to a subscriber
+    of the client's own stream, with and without a limit on the number of
+    aircraft in view.
+
+    Expects only the aircraft within the view plus its margin, and when
+    limited, a selection of these aircraft that includes all aircraft in
+    conflict.
+    """
+    net = node.Node(0, 0)
+    monkeypatch.setattr(bluesky, 'net', net)
+    monkeypatch.setattr(bluesky.settings, 'stream_viewmargin', 0.25)
+    monkeypatch.setattr(bluesky.scr, 'client_pan', {b'CLNT1': (52.0, 4.0)})
+    monkeypatch.setattr(bluesky.scr, 'client_zoom', {b'CLNT1': 1.0})
+    monkeypatch.setattr(bluesky.scr, 'client_ar', {b'CLNT1': 1.0})
+    traffic_.reset()
+    lat = np.linspace(50.0, 54.0, 81)
+    traffic_.cre([f'AC{i}' for i in range(81)], aclat=lat, aclon=np.full(81, 4.0))
+
+    sub = zmq.Context.instance().socket(zmq.SUB)
+    net.stream_out.bind('inproc://test_acview_streams')
+    sub.connect('inproc://test_acview_streams')
+    sub.subscribe(b'ACDATACLNT1')
+    for _ in range(20):
+        net.update()
+        if net.subscribed(b'ACDATACLNT1'):
+            break
+        time.sleep(0.05)
+    assert not net.subscribed(b'ACDATA') and not net.subscribed(b'ACDATACLNT2')
+    while sub.poll(200):
+        sub.recv_multipart()
+
+    def receive():
+        topic, *frames = sub.recv_multipart(copy=False)
+        assert not sub.poll(200)
+        return topic.bytes[:-5], unpackframes(frames)
+
+    # The view is 52 +/- 1 degrees latitude, plus a margin of 25 percent
+    bluesky.scr.send_aircraft_data()
+    name, data = receive()
+    inview = np.abs(lat - 52.0) <= 1.25
+    assert name == b'ACDATACLNT1' and len(data['id']) == np.count_nonzero(inview)
+    assert data['id'] == [acid for acid, i in zip(traffic_.id, inview) if i]
+    assert np.allclose(data['lat'], lat[inview]) and len(data['alt']) == len(data['id'])
+
+    monkeypatch.setattr(bluesky.settings, 'stream_lodmax', 10)
+    traffic_.cd.inconf[40] = True
+    bluesky.scr.send_aircraft_data()
+    name, data = receive()
+    assert 0 < len(data['id']) < np.count_nonzero(inview) and 'AC40' in data['id']
+    assert set(data['id']) <= {acid for acid, i in zip(traffic_.id, inview) if i}
+    # The same aircraft are selected in each frame
+    bluesky.scr.send_aircraft_data()
+    assert receive()[1]['id'] == data['id']
+
+    sub.close(linger=0)
+    net.stream_out.close(linger=0)
+    net.event_io.close(linger=0)
+    traffic_.reset()
@@ -146,4 +146,83 @@ def test_traffic_reset(traffic_):
     validate_lengths(traffic_, 0)
 
 
+def test_traffic_id2idx(traffic_):
+    """
+    Test the aircraft id to index lookup after creating and deleting
+    (bulk) aircraft.
+
+    Expects indices that match the position of each id in the id list.
+    """
+    traffic_.reset()
+    traffic_.cre([f'AC{i}' for i in range(10)])
+    traffic_.cre('KL204')
+    assert traffic_.id2idx('kl204') == 10
+    assert traffic_.id2idx('*') == 10
+
+    traffic_.delete([7, 2, 3])
+    assert traffic_.id2idx(['AC0', 'AC2', 'AC4', 'KL204']) == [0, -1, 2, 7]
+    assert all(traffic_.id2idx(acid) == i for i, acid in enumerate(traffic_.id))
+
+    # Duplicate ids refer to the first aircraft with that id
+    traffic_.cre(['DUP', 'AC10', 'DUP'])
+    assert traffic_.id2idx('DUP') == 8
+    traffic_.delete(8)
+    assert traffic_.id2idx(['DUP', 'AC10']) == [9, 8]
+    traffic_.cre(['DUP'])
+    traffic_.delete(10)
+    assert traffic_.id2idx('DUP') == 9
+
+    traffic_.reset()
+    assert traffic_.id2idx('AC0') == -1
+
+
+def test_traffic_cre_batch(traffic_, monkeypatch):
+    """
+    Test batch creation of aircraft, and merging of consecutive CRE
+    commands on the stack into one batch.
+
+    Expects the same aircraft states as when they are created one by one,
+    and duplicate ids to be skipped.
+    """
+    import numpy as np
+    import bluesky
+    from bluesky import stack
+    from bluesky.stack import simstack
+
+    args = [('AC0', 'B744', 52.0, 4.0, 90.0, 3000.0, 150.0),
+            ('AC1', 'A320', 52.1, 4.1, 180.0, 6000.0, 180.0),
+            ('AC0', 'A320', 52.2, 4.2, 270.0, 9000.0, 200.0),
+            ('AC2', 'B738', 52.3, 4.3, 0.0, 0.0, 0.0)]
+    traffic_.reset()
+    for acargs in args:
+        traffic_.cre(*acargs)
+    single = [np.copy(getattr(traffic_, v)) for v in ('lat', 'lon', 'hdg', 'alt', 'tas', 'gsnorth')]
+
+    traffic_.reset()
+    created = traffic_.cre_batch(*zip(*args))
+    assert list(created) == [True, True, False, True]
+    assert traffic_.id == ['AC0', 'AC1', 'AC2']
+    assert traffic_.type == ['B744', 'A320', 'B738']
+    batch = [getattr(traffic_, v) for v in ('lat', 'lon', 'hdg', 'alt', 'tas', 'gsnorth')]
+    for v1, v2 in zip(single, batch):
+        assert np.array_equal(v1, v2)
+
+    # The session is not detached: drop the pending startup commands, and
+    # don't send echo messages over the network
+    echoes = []
+    monkeypatch.setattr(bluesky.scr, 'echo', lambda text='', flags=0: echoes.append(text))
+    simstack.reset()
+    traffic_.reset()
+    for i in range(3):
+        stack.stack(f'CRE KL{i} B744 52 4 {90 * i} FL100 250')
+    stack.stack('KL1 ALT FL200')
+    stack.stack('CRE KL3 B744 52 4 0 FL100 250')
+    stack.stack('CRE KL0 B744 52 4 0 FL100 250')
+    simstack.process()
+    assert traffic_.id == ['KL0', 'KL1', 'KL2', 'KL3']
+    assert np.allclose(traffic_.hdg, [0.0, 90.0, 180.0, 0.0])
+    assert traffic_.selalt[1] > traffic_.selalt[0]
+    assert any('KL0 already exists' in text for text in echoes)
+
+
 # test remaining traffic functions
@@ -142,3 +142,196 @@ def test_trafficarrays_reset(t_a):
 
     assert not root.fl_list
     assert not root.children[0].np_array_bool
+
+
+def test_trafficarrays_storage():
+    """
+    Tests the growable storage of traffic arrays with creates, replaced
+    arrays, single and batched deletes.
+    Expects the same contents as with plain array appends and deletes.
+    """
+    class Storage(TrafficArrays):
+        def __init__(self):
+            super().__init__()
+            TrafficArrays.setroot(self)
+            with self.settrafarrays():
+                self.ids = []
+                self.val = np.array([])
+                self.flag = np.array([], dtype=bool)
+
+    oldroot = TrafficArrays.root
+    TrafficArrays.setroot(None)
+    ref = np.array([])
+    try:
+        store = Storage()
+        for i in range(100):
+            store.create(1)
+            store.ids[-1] = f'AC{i}'
+            store.val[-1] = i
+            ref = np.append(ref, i)
+            if i % 10 == 0:
+                # Replace the array, like the simulation update does
+                store.val = store.val + 1.0
+                ref = ref + 1.0
+
+        store.delete(5)
+        ref = np.delete(ref, 5)
+        store.delete(np.array([0, 17, 63]))
+        ref = np.delete(ref, [0, 17, 63])
+        store.create(3)
+        ref = np.append(ref, [0.0, 0.0, 0.0])
+
+        assert np.array_equal(store.val, ref)
+        assert store.flag.dtype == bool and len(store.flag) == len(ref)
+        assert len(store.ids) == len(ref) and store.ids[:2] == ['AC1', 'AC2']
+    finally:
+        TrafficArrays.setroot(oldroot)
+
+
+def test_trafficarrays_delete_aliased():
+    """
+    Tests deletes when a traffic array was replaced by another traffic
+    array, of the same object (gs = tas) or of a child (trk = hdg).
+    Expects the aliased arrays to keep the values of the other array.
+    """
+    class Child(TrafficArrays):
+        def __init__(self):
+            super().__init__()
+            with self.settrafarrays():
+                self.hdg = np.array([])
+
+    class Root(TrafficArrays):
+        def __init__(self):
+            super().__init__()
+            TrafficArrays.setroot(self)
+            with self.settrafarrays():
+                self.tas = np.array([])
+                self.gs = np.array([])
+                self.trk = np.array([])
+                self.child = Child()
+
+        def create(self, n=1):
+            super().create(n)
+            self.ntraf += n
+            self.create_children(n)
+
+        def delete(self, idx):
+            super().delete(idx)
+            self.ntraf = len(self.tas)
+
+    oldroot = TrafficArrays.root
+    TrafficArrays.setroot(None)
+    try:
+        root = Root()
+        root.create(6)
+        root.tas[:] = np.arange(6.0)
+        root.child.hdg[:] = 10.0 * np.arange(6.0)
+        root.gs = root.tas
+        root.trk = root.child.hdg
+
+        root.delete(1)
+        assert np.array_equal(root.gs, [0.0, 2.0, 3.0, 4.0, 5.0])
+        assert np.array_equal(root.trk, [0.0, 20.0, 30.0, 40.0, 50.0])
+        root.delete(np.array([0, 3]))
+        assert np.array_equal(root.gs, root.tas)
+        assert np.array_equal(root.trk, root.child.hdg)
+    finally:
+        TrafficArrays.setroot(oldroot)
+
+
+def test_trafficarrays_stateblock():
+    """
+    Tests storage of float traffic arrays in a contiguous state block.
+    Expects all float arrays of root and child to share the block, and
+    a snapshot to capture arrays that were replaced by new arrays.
+    """
+    class Child(TrafficArrays):
+        def __init__(self):
+            super().__init__()
+            with self.settrafarrays():
+                self.spd = np.array([])
+                self.flag = np.array([], dtype=bool)
+
+    class Root(TrafficArrays):
+        def __init__(self):
+            super().__init__()
+            TrafficArrays.setroot(self)
+            with self.settrafarrays():
+                self.lat = np.array([])
+                self.child = Child()
+
+        def create(self, n=1):
+            super().create(n)
+            self.ntraf += n
+            self.create_children(n)
+
+        def delete(self, idx):
+            super().delete(idx)
+            self.ntraf = len(self.lat)
+
+    oldroot = TrafficArrays.root
+    TrafficArrays.setroot(None)
+    block = TrafficArrays.enablestateblock()
+    try:
+        root = Root()
+        for _ in range(40):
+            root.create(1)
+        root.lat[:] = np.arange(40)
+        root.child.spd = np.arange(40) * 2.0
+        root.delete([0, 1])
+
+        state = block.snapshot()
+        assert block.names() == ['lat', 'child.spd']
+        assert np.shares_memory(root.lat, block.data)
+        assert np.shares_memory(root.child.spd, block.data)
+        assert not np.shares_memory(root.child.flag, block.data)
+        assert list(state) == ['lat', 'child.spd']
+        assert np.array_equal(state['lat'], np.arange(2, 40))
+        assert np.array_equal(state['child.spd'], np.arange(2, 40) * 2.0)
+
+        root.lat[:] = 0.0
+        block.restore(state)
+        assert np.array_equal(root.lat, np.arange(2, 40))
+    finally:
+        TrafficArrays.stateblock = None
+        TrafficArrays.setroot(oldroot)
+
+
+def test_trafficarrays_stateblock_traffic(traffic_):
+    """
+    Tests the state block with the BlueSky traffic object, and switching
+    the conflict detection implementation.
+    Expects rows named after the attribute paths of the traffic tree, and
+    the rows of the replaced implementation to be released.
+    """
+    from bluesky.core import replaceable
+    from bluesky.core.entity import getproxied
+    oldroot = TrafficArrays.root
+    TrafficArrays.setroot(traffic_)
+    block = TrafficArrays.enablestateblock()
+    try:
+        traffic_.reset()
+        traffic_.cre([f'AC{i}' for i in range(20)])
+        names = block.names()
+        assert {'lat', 'cd.rpz', 'ap.trk', 'actwp.lat', 'adsb.lat'} <= set(names)
+        state = block.snapshot()
+
+        oldcd = getproxied(traffic_.cd)
+        newcd = 'SPATIALSTATEBASED' if type(oldcd).__name__ == 'StateBased' else 'STATEBASED'
+        replaceable.select_implementation('CONFLICTDETECTION', newcd)
+        assert all(obj is not oldcd for obj, _ in block.fields)
+        assert [n for n in block.names() if not n.startswith('cd.')] == \
+            [n for n in names if not n.startswith('cd.')]
+        assert np.shares_memory(traffic_.cd.rpz, block.data)
+
+        traffic_.lat[:] = 0.0
+        block.restore(state)
+        assert np.array_equal(traffic_.lat, state['lat'])
+
+        traffic_.delete([1, 2])
+        assert len(traffic_.cd.rpz) == traffic_.ntraf == 18
+    finally:
+        replaceable.reset()
+        TrafficArrays.stateblock = None
+        traffic_.reset()
+        TrafficArrays.setroot(oldroot)
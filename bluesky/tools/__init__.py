@@ -1,6 +1,6 @@
 from bluesky import settings
 # Register settings defaults
-settings.set_variable_defaults(prefer_compiled=False)
+settings.set_variable_defaults(prefer_compiled=False, lazy_startup=False)
 if settings.prefer_compiled:
     try:
         from . import cgeo as geo
@@ -16,5 +16,7 @@ from . import cachefile
 
 
 def init():
-    print("Reading magnetic variation data")
-    geo.initdecl_data()
+    # With lazy startup, the data is read when geo.magdec is first called
+    if not settings.lazy_startup:
+        print("Reading magnetic variation data")
+        geo.initdecl_data()
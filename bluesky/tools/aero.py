@@ -6,7 +6,7 @@ import numpy as np
 from bluesky import settings
 
 
-settings.set_variable_defaults(casmach_threshold=2.0)
+settings.set_variable_defaults(casmach_threshold=2.0, atmos_table=False)
 # International standard atmpshere only up to 72000 ft / 22 km
 
 #
@@ -79,6 +79,93 @@ def casmachthr(threshold:float=None):
 # Atmosphere up to 22 km (72178 ft)
 
 
+class LookupTable:
+    """ Lookup table of a function of one variable, with linear interpolation
+        between the values on a uniform grid. The table is created when it is
+        first used. Values outside the range of the table, and scalars, are
+        calculated with the function itself.
+
+        Arguments:
+        - fun: Vectorised function of one variable
+        - x0, x1: Range of the table
+        - dx: Grid spacing of the table
+    """
+    def __init__(self, fun, x0, x1, dx):
+        self.fun = fun
+        self.x0 = x0
+        self.x1 = x1
+        self.dx = dx
+        self.y = self.dy = None
+
+    def __call__(self, x):
+        if np.ndim(x) == 0 or np.size(x) == 0:
+            return self.fun(x)
+        if self.y is None:
+            grid = np.linspace(self.x0, self.x1, round((self.x1 - self.x0) / self.dx) + 1)
+            self.y = self.fun(grid)
+            self.dy = np.append(np.diff(self.y), 0.0)
+
+        # Index and fraction of each value in the grid
+        t = np.subtract(x, self.x0, dtype=float)
+        t *= 1.0 / self.dx
+        i = t.astype(np.intp)
+        t -= i
+        y = self.y.take(i, mode='clip')
+        t *= self.dy.take(i, mode='clip')
+        y += t
+
+        # Values outside the table (or NaN)
+        outside = ~((x >= self.x0) & (x < self.x1))
+        if outside.any():
+            y[outside] = self.fun(np.asarray(x)[outside])
+        return y
+
+
+def _isadensity(h):
+    """ ISA density [kg / m3] at altitude h [m]. """
+    T = vtemp(h)
+    rhotrop = 1.225 * (T / 288.15)**4.256848030018761
+    dhstrat = np.maximum(0., h - 11000.)
+    return rhotrop * np.exp(-dhstrat / 6341.552161)  # = *g0/(287.05*216.65))
+
+
+def _pow27ratio(x):
+    """ (x ** (2 / 7) - 1) / (x - 1), which is smooth around x = 1. """
+    x1 = np.where(x == 1.0, 2.0, x)
+    return np.where(x == 1.0, 2.0 / 7.0, (np.power(x1, 2.0 / 7.0) - 1.0) / (x1 - 1.0))
+
+
+# Tables of the tabulated atmosphere (setting atmos_table = True): ISA density
+# as function of altitude, and the power 2/7 of the speed conversions. The
+# relative interpolation error is below 1e-6 for densities, and 1e-8 for speeds.
+atmostable = LookupTable(_isadensity, -2000.0, 30000.0, 10.0)
+pow27table = LookupTable(_pow27ratio, 1.0, 5.0, 2.5e-4)
+
+
+def _pow27m1(x):
+    """ x ** (2 / 7) - 1, tabulated when atmos_table is set. The result can
+        be stored in x. """
+    if settings.atmos_table:
+        y = pow27table(x)
+        x -= 1.0
+        x *= y
+        return x
+    x = np.power(x, 2.0 / 7.0, out=_inplace(x))
+    x -= 1.0
+    return x
+
+
+def _pow35(x):
+    """ x ** 3.5, which is much faster as x * x * x * sqrt(x). """
+    return x * x * x * np.sqrt(x)
+
+
+def _inplace(x):
+    """ Return x when it is an array that can store the result of an
+        operation on itself, or None for scalars. """
+    return x if isinstance(x, np.ndarray) else None
+
+
 # ------------------------------------------------------------------------------
 # Vectorized aero functions
 # ------------------------------------------------------------------------------
@@ -97,9 +184,7 @@ def vatmos(h):
     T = vtemp(h)
 
     # Density
-    rhotrop = 1.225 * (T / 288.15)**4.256848030018761
-    dhstrat = np.maximum(0., h - 11000.)
-    rho     = rhotrop * np.exp(-dhstrat / 6341.552161)  # = *g0/(287.05*216.65))
+    rho = atmostable(h) if settings.atmos_table else _isadensity(h)
 
     # Pressure
     p = rho * R * T
@@ -107,6 +192,23 @@ def vatmos(h):
     return p, rho, T
 
 
+def vatmosa(h):
+    """ Calculate atmospheric pressure, density, temperature, and speed of
+        sound for a given altitude in one call.
+
+        Arguments:
+        - h: Altitude [m]
+
+        Returns:
+        - p: Pressure [Pa]
+        - rho: Density [kg / m3]
+        - T: Temperature [K]
+        - a: Speed of sound [m/s]
+    """
+    p, rho, T = vatmos(h)
+    return p, rho, T, np.sqrt(gamma * R * T)
+
+
 def vtemp(h):
     """ Calculate atmospheric temperature for a given altitude.
 
@@ -147,181 +249,221 @@ def vdensity(h):
     return r
 
 
-def vvsound(h):
+def vvsound(h, atmos=None):
     """ Calculate the speed of sound for a given altitude.
 
         Arguments:
         - h: Altitude [m]
+        - atmos: Optional (p, rho, T) at altitude h, as returned by vatmos
 
         Returns:
         - a: Speed of sound [m/s]
     """
-    T = vtemp(h)
+    T = vtemp(h) if atmos is None else atmos[2]
     a = np.sqrt(gamma * R * T)
     return a
 
 
 # ---------Speed conversions---h in [m]------------------
-def vtas2mach(tas, h):
+#
+# The speed conversions accept the atmosphere at altitude h as returned by
+# vatmos (e.g., bs.traf.atmos in the traffic update), to avoid recalculating it.
+# They also accept an out array to store the result in.
+def vtas2mach(tas, h, atmos=None, out=None):
     """ True airspeed (tas) to mach number conversion for numpy arrays.
 
         Arguments:
         - tas: True airspeed [m/s]
         - h: Altitude [m]
+        - atmos: Optional (p, rho, T) at altitude h
+        - out: Optional array to store the result in
 
         Returns:
         - M: Mach number [-]
     """
-    a = vvsound(h)
-    mach = tas / a
-    return mach
+    a = vvsound(h, atmos)
+    return np.divide(tas, a, out=out)
 
 
-def vmach2tas(mach, h):
+def vmach2tas(mach, h, atmos=None, out=None):
     """ Mach number to True airspeed (tas) conversion for numpy arrays.
 
         Arguments:
         - mach: Mach number [-]
         - h: Altitude [m]
+        - atmos: Optional (p, rho, T) at altitude h
+        - out: Optional array to store the result in
 
         Returns:
         - tas: True airspeed [m/s]
     """
-    a = vvsound(h)
-    tas = mach * a
-    return tas
+    a = vvsound(h, atmos)
+    return np.multiply(mach, a, out=out)
 
 
-def veas2tas(eas, h):
+def veas2tas(eas, h, atmos=None, out=None):
     """ Equivalent airspeed to true airspeed conversion for numpy arrays.
 
         Arguments:
         - eas: Equivalent airspeed [m/s]
         - h: Altitude [m]
+        - atmos: Optional (p, rho, T) at altitude h
+        - out: Optional array to store the result in
 
         Returns:
         - tas: True airspeed [m/s]
     """
-    rho = vdensity(h)
-    tas = eas * np.sqrt(rho0 / rho)
-    return tas
+    rho = vdensity(h) if atmos is None else atmos[1]
+    return np.multiply(eas, np.sqrt(rho0 / rho), out=out)
 
 
-def vtas2eas(tas, h):
+def vtas2eas(tas, h, atmos=None, out=None):
     """ True airspeed to equivalent airspeed conversion for numpy arrays.
 
         Arguments:
         - tas: True airspeed [m/s]
         - h: Altitude [m]
+        - atmos: Optional (p, rho, T) at altitude h
+        - out: Optional array to store the result in
 
         Returns:
         - eas: Equivalent airspeed [m/s]
     """
-    rho = vdensity(h)
-    eas = tas * np.sqrt(rho / rho0)
-    return eas
+    rho = vdensity(h) if atmos is None else atmos[1]
+    return np.multiply(tas, np.sqrt(rho / rho0), out=out)
 
 
-def vcas2tas(cas, h):
+def vcas2tas(cas, h, atmos=None, out=None):
     """ Calibrated to true airspeed conversion for numpy arrays.
 
         Arguments:
         - cas: Calibrated airspeed [m/s]
         - h: Altitude [m]
+        - atmos: Optional (p, rho, T) at altitude h
+        - out: Optional array to store the result in
 
         Returns:
         - tas: True airspeed [m/s]
     """
-    p, rho, _ = vatmos(h)
-    qdyn = p0 * ((1.0 + rho0 * cas * cas / (7.0 * p0)) ** 3.5 - 1.0)
-    tas = np.sqrt(7.0 * p / rho * ((1.0 + qdyn / p) ** (2.0 / 7.0) - 1.0))
+    p, rho, _ = vatmos(h) if atmos is None else atmos
+    qdyn = p0 * (_pow35(1.0 + rho0 * cas * cas / (7.0 * p0)) - 1.0)
+    # Temporary arrays of the full size are reused in place
+    x = qdyn / p
+    x += 1.0
+    x = _pow27m1(x)
+    x *= p
+    x /= rho
+    x *= 7.0
+    tas = np.sqrt(x, out=_inplace(x))
 
     # cope with negative speed
-    tas = np.where(cas < 0, -1 * tas, tas)
-    return tas
+    return np.copysign(tas, cas, out=out)
 
 
-def vtas2cas(tas, h):
+def vtas2cas(tas, h, atmos=None, out=None):
     """ True to calibrated airspeed conversion for numpy arrays.
 
         Arguments:
         - tas: True airspeed [m/s]
         - h: Altitude [m]
+        - atmos: Optional (p, rho, T) at altitude h
+        - out: Optional array to store the result in
 
         Returns:
         cas: Calibrated airspeed [m/s]
     """
-    p, rho, _ = vatmos(h)
-    qdyn = p*((1.+rho*tas*tas/(7.*p))**3.5-1.)
-    cas = np.sqrt(7.*p0/rho0*((qdyn/p0+1.)**(2./7.)-1.))
+    p, rho, _ = vatmos(h) if atmos is None else atmos
+    # Temporary arrays of the full size are reused in place
+    x = rho * tas
+    x *= tas
+    x /= p
+    x *= 1. / 7.
+    x += 1.
+    x = _pow35(x)
+    x -= 1.
+    x *= p
+    x *= 1. / p0
+    x += 1.
+    x = _pow27m1(x)
+    x *= 7. * p0 / rho0
+    cas = np.sqrt(x, out=_inplace(x))
 
     # cope with negative speed
-    cas = np.where(tas<0, -1*cas, cas)
-    return cas
+    return np.copysign(cas, tas, out=out)
 
 
-def vmach2cas(mach, h):
+def vmach2cas(mach, h, atmos=None, out=None):
     """ Mach to calibrated airspeed conversion for numpy arrays.
 
         Arguments:
         - mach: Mach number [-]
         - h: Altitude [m]
+        - atmos: Optional (p, rho, T) at altitude h
+        - out: Optional array to store the result in
 
         Returns:
         - cas: Calibrated airspeed [m/s]
     """
-    tas = vmach2tas(mach, h)
-    cas = vtas2cas(tas, h)
+    atmos = vatmos(h) if atmos is None else atmos
+    tas = vmach2tas(mach, h, atmos)
+    cas = vtas2cas(tas, h, atmos, out)
     return cas
 
 
-def vcas2mach(cas, h):
+def vcas2mach(cas, h, atmos=None, out=None):
     """ Calibrated airspeed to Mach conversion for numpy arrays.
 
         Arguments:
         - cas: Calibrated airspeed [m/s]
         - h: Altitude [m]
+        - atmos: Optional (p, rho, T) at altitude h
+        - out: Optional array to store the result in
 
         Returns:
         - mach: Mach number [-]
     """
-    tas = vcas2tas(cas, h)
-    M   = vtas2mach(tas, h)
+    atmos = vatmos(h) if atmos is None else atmos
+    tas = vcas2tas(cas, h, atmos)
+    M   = vtas2mach(tas, h, atmos, out)
     return M
 
-def vcasormach(spd, h):
+def vcasormach(spd, h, atmos=None):
     """ Interpret input speed as either CAS or a Mach number, and return TAS, CAS, and Mach.
 
         Arguments:
         - spd: Airspeed. Interpreted as Mach number [-] when its value is below the
                CAS/Mach threshold. Otherwise interpreted as CAS [m/s].
         - h: Altitude [m]
+        - atmos: Optional (p, rho, T) at altitude h
 
         Returns:
         - tas: True airspeed [m/s]
         - cas: Calibrated airspeed [m/s]
         - mach: Mach number [-]
     """
+    atmos = vatmos(h) if atmos is None else atmos
     ismach = np.logical_and(spd > 0.1, spd < casmach_thr)
-    tas = np.where(ismach, vmach2tas(spd, h), vcas2tas(spd, h))
-    cas = np.where(ismach, vtas2cas(tas, h), spd)
-    mach   = np.where(ismach, spd, vtas2mach(tas, h))
+    tas = np.where(ismach, vmach2tas(spd, h, atmos), vcas2tas(spd, h, atmos))
+    cas = np.where(ismach, vtas2cas(tas, h, atmos), spd)
+    mach   = np.where(ismach, spd, vtas2mach(tas, h, atmos))
     return tas, cas, mach
 
 
-def vcasormach2tas(spd, h):
+def vcasormach2tas(spd, h, atmos=None):
     """ Interpret input speed as either CAS or a Mach number, and return TAS.
 
         Arguments:
         - spd: Airspeed. Interpreted as Mach number [-] when its value is below the
                CAS/Mach threshold. Otherwise interpreted as CAS [m/s].
         - h: Altitude [m]
+        - atmos: Optional (p, rho, T) at altitude h
 
         Returns:
         - tas: True airspeed [m/s]
     """
+    atmos = vatmos(h) if atmos is None else atmos
     ismach = np.logical_and(spd > 0.1, spd < casmach_thr)
-    return np.where(ismach, vmach2tas(spd, h), vcas2tas(spd, h))
+    return np.where(ismach, vmach2tas(spd, h, atmos), vcas2tas(spd, h, atmos))
 
 
 def crossoveralt(cas, mach):
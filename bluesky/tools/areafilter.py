@@ -1,7 +1,6 @@
 """Area filter module"""
 from weakref import WeakValueDictionary
 import numpy as np
-from matplotlib.path import Path
 try:
     from rtree.index import Index
 except (ImportError, OSError):
@@ -232,6 +231,8 @@ class Poly(Shape):
     ''' A polygon shape '''
     def __init__(self, name, coordinates, top=1e9, bottom=-1e9):
         super().__init__(name, coordinates, top, bottom)
+        # Imported here instead of at startup, as matplotlib is slow to import
+        from matplotlib.path import Path
         self.border = Path(np.reshape(coordinates, (len(coordinates) // 2, 2)))
 
     def checkInside(self, lat, lon, alt):
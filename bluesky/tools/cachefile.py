@@ -1,4 +1,7 @@
+import os
 import pickle
+import shutil
+import numpy as np
 import bluesky as bs
 
 ## Default settings
@@ -9,6 +12,10 @@ def openfile(*args):
     return CacheFile(*args)
 
 
+def openarrays(*args):
+    return ArrayCache(*args)
+
+
 class CacheError(Exception):
     ''' Exception class for CacheFile errors. '''
     pass
@@ -57,3 +64,107 @@ class CacheFile():
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.file:
             self.file.close()
+
+
+def packstrings(strings):
+    ''' Pack a list of strings in an offset table: an array with the utf-8
+        characters of all strings, each followed by a null character, and
+        an array with the offset of each string in the characters, plus the
+        end of the last string. '''
+    encoded = [txt.encode('utf-8') + b'\0' for txt in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(txt) for txt in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def unpackstrings(chars, offsets):
+    ''' Unpack a list of strings from an offset table. '''
+    chars = chars.tobytes()
+    strings = chars.decode('utf-8').split('\0')[:-1]
+    if len(strings) == len(offsets) - 1:
+        return strings
+    # Some strings contain null characters: use the offsets
+    offsets = offsets.tolist()
+    return [chars[i0:i1 - 1].decode('utf-8') for i0, i1 in zip(offsets[:-1], offsets[1:])]
+
+
+class ArrayCache():
+    ''' Cache of dicts of data columns in a directory.
+
+        Numpy arrays are stored as .npy files, which are memory-mapped
+        (copy-on-write) when they are loaded, so that processes that load
+        the same cache share its pages. Lists of strings are stored as
+        offset tables (see packstrings), and all other values are pickled.
+
+        The cache is written to a temporary directory, which replaces the
+        cache directory when the with block is left without errors. '''
+    def __init__(self, dirname, version_ref='1'):
+        self.path = bs.resource(bs.settings.cache_path).joinpath(dirname)
+        self.version_ref = version_ref
+        self.checked = False
+        self.tmppath = None
+
+    def check_cache(self):
+        ''' Check whether the cache exists, and is of the correct version. '''
+        versionfile = self.path.joinpath('version')
+        if not versionfile.is_file():
+            raise CacheError('Cache not found: ' + str(self.path))
+        if versionfile.read_text() != self.version_ref:
+            raise CacheError('Cache out of date: ' + str(self.path))
+        print('Reading cache:', self.path)
+        self.checked = True
+
+    def load(self, name):
+        ''' Load a dict of data columns from the cache. '''
+        if not self.checked:
+            self.check_cache()
+        with open(self.path.joinpath(name + '.p'), 'rb') as f:
+            data, kinds = pickle.load(f)
+        for key, kind in kinds.items():
+            fname = str(self.path.joinpath(f'{name}.{key}'))
+            if kind == 'array':
+                data[key] = np.load(fname + '.npy', mmap_mode='c')
+            elif kind == 'strings':
+                data[key] = unpackstrings(np.load(fname + '.chars.npy', mmap_mode='r'),
+                                          np.load(fname + '.offsets.npy'))
+        return {key: data[key] for key in kinds}
+
+    def dump(self, name, data):
+        ''' Dump a dict of data columns to the cache. '''
+        if self.tmppath is None:
+            self.tmppath = self.path.with_name(f'{self.path.name}.tmp{os.getpid()}')
+            shutil.rmtree(self.tmppath, ignore_errors=True)
+            self.tmppath.mkdir(parents=True)
+            print("Writing cache:", self.path)
+        pickled, kinds = dict(), dict()
+        for key, value in data.items():
+            fname = str(self.tmppath.joinpath(f'{name}.{key}'))
+            if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+                np.save(fname + '.npy', value)
+                kinds[key] = 'array'
+            elif isinstance(value, list) and value and all(isinstance(v, str) for v in value):
+                chars, offsets = packstrings(value)
+                np.save(fname + '.chars.npy', chars)
+                np.save(fname + '.offsets.npy', offsets)
+                kinds[key] = 'strings'
+            else:
+                pickled[key] = value
+                kinds[key] = 'pickle'
+        with open(self.tmppath.joinpath(name + '.p'), 'wb') as f:
+            pickle.dump((pickled, kinds), f, pickle.HIGHEST_PROTOCOL)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.tmppath is None:
+            return
+        if exc_type is None:
+            self.tmppath.joinpath('version').write_text(self.version_ref)
+            # Replace the old cache. Another process may have done so already
+            shutil.rmtree(self.path, ignore_errors=True)
+            try:
+                os.replace(self.tmppath, self.path)
+            except OSError:
+                pass
+        shutil.rmtree(self.tmppath, ignore_errors=True)
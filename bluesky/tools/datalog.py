@@ -2,8 +2,10 @@
 
 # ToDo: Add description in comments
 
+import os
 import numbers
 import itertools
+import zipfile
 from datetime import datetime
 import numpy as np
 from bluesky import settings, stack
@@ -12,7 +14,8 @@ import bluesky as bs
 from bluesky.stack import command
 
 # Register settings defaults
-settings.set_variable_defaults(log_path='output')
+settings.set_variable_defaults(log_path='output', log_format='CSV',
+                                log_rowgroup=100000)
 
 logprecision = '%.8f'
 
@@ -22,6 +25,9 @@ periodicloggers = dict()
 # Dict to contain all loggers (also the periodic loggers)
 allloggers = dict()
 
+# Available log file formats, and their file extensions
+logformats = {'CSV': 'log', 'BIN': 'npz'}
+
 
 @command(name='CRELOG')
 def crelogstack(name: 'txt', dt: float = None, header: 'string' = ''):
@@ -40,9 +46,9 @@ def crelogstack(name: 'txt', dt: float = None, header: 'string' = ''):
     return True, f'Created {"periodic" if dt else ""} logger {name}'
 
 
-def crelog(name, dt=None, header=''):
+def crelog(name, dt=None, header='', fmt=None):
     """ Create a new logger. """
-    allloggers[name] = allloggers.get(name, CSVLogger(name, dt or 0.0, header))
+    allloggers[name] = allloggers.get(name, CSVLogger(name, dt or 0.0, header, fmt))
     if dt:
         periodicloggers[name] = allloggers[name]
 
@@ -67,12 +73,31 @@ def reset():
         log.reset()
 
 
-def makeLogfileName(logname, prefix: str = ''):
+def fork():
+    """ Continue all open logs in new files in a forked simulation process.
+    The log files that are inherited from the parent process are left to
+    the parent. """
+    for log in allloggers.values():
+        if log.file:
+            log.detach()
+            log.start()
+
+
+def detachfile(fileobj):
+    """ Redirect a file that is inherited from a parent process to /dev/null,
+    so that data that is still buffered, or that is written when the file is
+    closed, doesn't end up in the file of the parent. """
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, fileobj.fileno())
+    os.close(devnull)
+
+
+def makeLogfileName(logname, prefix: str = '', ext: str = 'log'):
     timestamp = datetime.now().strftime('%Y%m%d_%H-%M-%S')
     if prefix == '' or prefix.lower() == stack.get_scenname().lower():
-        fname = "%s_%s_%s.log" % (logname, stack.get_scenname(), timestamp)
+        fname = "%s_%s_%s.%s" % (logname, stack.get_scenname(), timestamp, ext)
     else:
-        fname = "%s_%s_%s_%s.log" % (logname, stack.get_scenname(), prefix, timestamp)
+        fname = "%s_%s_%s_%s.%s" % (logname, stack.get_scenname(), prefix, timestamp, ext)
     return bs.resource(settings.log_path) / fname
 
 
@@ -98,23 +123,59 @@ def col2txt(col, nrows):
         yield nrows * [col]
 
 
+def col2bin(col, nrows):
+    if isinstance(col, (list, np.ndarray)):
+        ret = np.asarray(col)
+        if len(ret.shape) > 1:
+            for el in ret.T:
+                yield el
+        else:
+            yield ret
+    # Scalars are repeated for each row
+    else:
+        yield np.full(nrows, col)
+
+
+def readlog(fname):
+    """ Read a binary (BIN format) log file.
+
+        Returns the header lines, and a dict with the full column of
+        each logged variable, concatenated over all row groups.
+    """
+    with np.load(fname) as data:
+        header = list(data['header'])
+        columns = list(data['columns'])
+        ngroups = sum(1 for key in data.files if key.endswith('/c0'))
+        table = {col: np.concatenate(
+            [data[f'rg{group:05d}/c{i}'] for group in range(ngroups)])
+            if ngroups else np.array([]) for i, col in enumerate(columns)}
+    return header, table
+
+
 class CSVLogger:
-    def __init__(self, name, dt, header):
+    def __init__(self, name, dt, header, fmt=None):
         self.name = name
         self.file = None
         self.fname = None
+        self.fmt = fmt or settings.log_format.upper()
         self.dataparents = []
         self.header = header.split('\n')
         self.tlog = 0.0
         self.selvars = []
 
+        # Buffered row group and column names of binary logs
+        self.rowgroup = []
+        self.nbuffered = 0
+        self.ngroups = 0
+        self.columns = None
+
         # In case this is a periodic logger: log timestep
         self.dt = dt
         self.default_dt = dt
 
         # Register a command for this logger in the stack
         stackcmd = {name: [
-            name + ' ON/OFF,[dt] or ADD [FROM parent] var1,...,varn',
+            name + ' ON/OFF,[dt] or ADD [FROM parent] var1,...,varn or FORMAT CSV/BIN',
             '[txt,float/word,...]', self.stackio, name + " data logging on"]
         }
         stack.append_commands(stackcmd)
@@ -129,6 +190,16 @@ class CSVLogger:
         self.dt = dt
         self.default_dt = dt
 
+    def setformat(self, fmt):
+        fmt = fmt.upper()
+        if fmt not in logformats:
+            return False, f'Unknown log format {fmt}, use one of ' + \
+                str.join(', ', logformats)
+        if self.isopen():
+            return False, f'Switch {self.name} OFF before changing its format'
+        self.fmt = fmt
+        return True
+
     def addvars(self, selection):
         selvars = []
         while selection:
@@ -151,7 +222,12 @@ class CSVLogger:
 
     def open(self, fname):
         if self.file:
-            self.file.close()
+            self.close()
+        if self.fmt == 'BIN':
+            # Binary logs are a zip of npy columns, one folder per row group
+            self.file = zipfile.ZipFile(fname, 'w')
+            self.writearray('header', np.array(self.header))
+            return
         self.file = open(fname, 'wb')
         # Write the header
         for line in self.header:
@@ -166,6 +242,73 @@ class CSVLogger:
     def isopen(self):
         return self.file is not None
 
+    def writearray(self, name, arr):
+        with self.file.open(name + '.npy', 'w', force_zip64=True) as f:
+            np.lib.format.write_array(f, arr, allow_pickle=False)
+
+    def flush(self):
+        """ Write the buffered rows of a binary log as a new row group. """
+        if not self.rowgroup:
+            return
+        group = f'rg{self.ngroups:05d}'
+        for i, col in enumerate(zip(*self.rowgroup)):
+            self.writearray(f'{group}/c{i}', np.concatenate(col))
+        self.ngroups += 1
+        self.rowgroup = []
+        self.nbuffered = 0
+
+    def close(self):
+        if self.fmt == 'BIN':
+            self.flush()
+            if self.columns is None:
+                self.columns = ['simt'] + [v.varname for v in self.selvars]
+            self.writearray('columns', np.array(self.columns))
+            self.ngroups = 0
+            self.columns = None
+        self.file.close()
+        self.file = None
+
+    def detach(self):
+        """ Close the file of this logger in a forked simulation process,
+            without writing to the file of the parent process. """
+        if self.fmt == 'BIN':
+            # Leave the zip archive of the parent unfinished
+            fileobj, self.file.fp = self.file.fp, None
+        else:
+            fileobj = self.file
+        detachfile(fileobj)
+        fileobj.close()
+        self.file = None
+        self.rowgroup = []
+        self.nbuffered = 0
+        self.ngroups = 0
+        self.columns = None
+
+    def buffer(self, varlist, nrows):
+        """ Add the rows of one log call to the row group of a binary log. """
+        cols = []
+        names = []
+        for i, col in enumerate(varlist):
+            if i == 0:
+                name = 'simt'
+            elif i <= len(self.selvars):
+                name = self.selvars[i - 1].varname
+            else:
+                name = f'var{i - len(self.selvars)}'
+            bincols = list(col2bin(col, nrows))
+            cols.extend(bincols)
+            names.extend([name] if len(bincols) == 1 else
+                         [f'{name}[{j}]' for j in range(len(bincols))])
+        if self.columns is None:
+            self.columns = names
+        elif len(names) != len(self.columns):
+            bs.scr.echo(f'{self.name}: number of columns changed, skipping log')
+            return
+        self.rowgroup.append(cols)
+        self.nbuffered += nrows
+        if self.nbuffered >= settings.log_rowgroup:
+            self.flush()
+
     def log(self, *additional_vars):
         if self.file and bs.sim.simt >= self.tlog:
             # Set the next log timestep
@@ -184,6 +327,9 @@ class CSVLogger:
                     break
             if nrows == 0:
                 return
+            if self.fmt == 'BIN':
+                self.buffer(varlist, nrows)
+                return
             # Convert (numeric) arrays to text, leave text arrays untouched
             txtdata = [
                 txtcol for col in varlist for txtcol in col2txt(col, nrows)]
@@ -195,7 +341,7 @@ class CSVLogger:
     def start(self, prefix: str = ''):
         """ Start this logger. """
         self.tlog = bs.sim.simt
-        self.fname = makeLogfileName(self.name, prefix)
+        self.fname = makeLogfileName(self.name, prefix, logformats[self.fmt])
         self.open(self.fname)
 
     def reset(self):
@@ -203,8 +349,7 @@ class CSVLogger:
         self.tlog = 0.0
         self.fname = None
         if self.file:
-            self.file.close()
-            self.file = None
+            self.close()
 
     def listallvarnames(self):
         return str.join(', ', (v.varname for v in self.selvars))
@@ -218,9 +363,10 @@ class CSVLogger:
                 text += 'a non-periodic logger.\n'
 
             text += 'with variables: ' + self.listallvarnames() + '\n'
+            text += 'in ' + self.fmt + ' format.\n'
             text += self.name + ' is ' + ('ON' if self.isopen() else 'OFF') + \
                 '\nUsage: ' + self.name + \
-                ' ON/OFF,[dt] or ADD [FROM parent] var1,...,varn'
+                ' ON/OFF,[dt] or ADD [FROM parent] var1,...,varn or FORMAT CSV/BIN'
             return True, text
             # TODO: add list of logging vars
         elif args[0] == 'ON':
@@ -237,4 +383,9 @@ class CSVLogger:
         elif args[0] == 'ADD':
             return self.addvars(list(args[1:]))
 
+        elif args[0] == 'FORMAT':
+            if len(args) < 2 or not isinstance(args[1], str):
+                return True, f'{self.name} logs in {self.fmt} format'
+            return self.setformat(args[1])
+
         return True
@@ -492,10 +492,8 @@ def initdecl_data():
     # lat : 89 ... -90
     # Lon: -180 ... 179
     global decl_read, decl_lat_lon
-    dec_table = np.genfromtxt(bs.resource(bs.settings.navdata_path) / 'geo_declination_data.csv',
-                              comments='#',delimiter=",")
-
-    decl = dec_table[:,4]
+    decl = np.loadtxt(bs.resource(bs.settings.navdata_path) / 'geo_declination_data.csv',
+                      comments='#', delimiter=",", usecols=4)
 
     #          <----lon ---->
     #   lat1    ..  ..   ..  ..
@@ -1,4 +1,7 @@
 from .detection import ConflictDetection
 from .resolution import ConflictResolution
 from .statebased import StateBased
-from .mvp import MVP
\ No newline at end of file
+from .spatialstatebased import SpatialStateBased
+from .parallelstatebased import ParallelStateBased
+from .mvp import MVP
+from .batchmvp import BatchMVP
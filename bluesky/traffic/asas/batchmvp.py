@@ -0,0 +1,156 @@
+''' Conflict resolution based on the Modified Voltage Potential algorithm,
+    evaluated for all conflict pairs at once. '''
+import numpy as np
+from bluesky.traffic.asas import MVP
+
+
+class BatchMVP(MVP):
+    ''' Conflict resolution using the Modified Voltage Potential Method.
+
+        Gives the same resolutions as MVP, but computes the resolution
+        vectors of all conflict pairs as arrays, and accumulates them
+        per aircraft with np.add.at, instead of looping over the pairs.
+    '''
+    def resolve(self, conf, ownship, intruder):
+        ''' Resolve all current conflicts '''
+        idx1, idx2 = conf.confpairs.i, conf.confpairs.j
+
+        # Resolution velocity vector and time to solve vertically per pair
+        dv_mvp, tsolV = self.MVP(ownship, intruder, conf, conf.qdr, conf.dist,
+                                 conf.tcpa, conf.tLOS, idx1, idx2)
+
+        # Time needed to resolve vertically per aircraft
+        timesolveV = np.ones(ownship.ntraf) * 1e9
+        np.minimum.at(timesolveV, idx1, tsolV)
+
+        # Fraction of the vertical resolution to use, and whether the ownship
+        # takes part in the resolution, according to the priority rules
+        vfac, solve = self.pairprio(ownship.vs[idx1], intruder.vs[idx2])
+        # Like MVP, switch the vertical component off instead of scaling it,
+        # as it can be infinite
+        dv_mvp[vfac == 0.0, 2] = 0.0
+        dv_mvp[:, 2] *= vfac
+
+        # Nobody avoids noreso aircraft, but noreso aircraft will avoid
+        # other aircraft
+        fac = self.noresoac[idx2].astype(float) - solve
+
+        # Pairs in which the ownship doesn't resolve add nothing
+        act = fac != 0.0
+        dv = np.zeros((ownship.ntraf, 3))
+        np.add.at(dv, idx1[act], fac[act, np.newaxis] * dv_mvp[act])
+
+        # The resooff aircraft will not do resolutions
+        dv[self.resooffac] = 0.0
+
+        return self.newvelocity(conf, ownship, dv, timesolveV)
+
+    def pairprio(self, vs1, vs2):
+        ''' Return the factor on the vertical resolution component, and
+            whether the ownship should resolve, for each conflict pair
+            according to the priority setting (see MVP.applyprio). '''
+        npairs = len(vs1)
+        if not self.swprio:
+            # since cooperative, the vertical resolution component can be halved
+            return np.full(npairs, 0.5), np.ones(npairs, dtype=bool)
+
+        # Ownship cruising and intruder climbing/descending, and vice versa
+        owncruise = (np.abs(vs1) < 0.1) & (np.abs(vs2) > 0.1)
+        intcruise = (np.abs(vs2) < 0.1) & (np.abs(vs1) > 0.1)
+
+        if self.priocode == 'FF1':
+            return np.full(npairs, 0.5), np.ones(npairs, dtype=bool)
+        if self.priocode == 'FF2':
+            return np.full(npairs, 0.5), ~owncruise
+        if self.priocode == 'FF3':
+            return np.where(owncruise | intcruise, 0.0, 0.5), ~intcruise
+        if self.priocode == 'LAY1':
+            return np.zeros(npairs), ~owncruise
+        if self.priocode == 'LAY2':
+            return np.zeros(npairs), ~intcruise
+        return np.ones(npairs), np.zeros(npairs, dtype=bool)
+
+    def MVP(self, ownship, intruder, conf, qdr, dist, tcpa, tLOS, idx1, idx2):
+        """Modified Voltage Potential (MVP) resolution method, for arrays
+           of conflict pairs idx1-idx2"""
+        # Preliminary calculations-------------------------------------------------
+        # Determine largest RPZ and HPZ of the conflict pair, use lookahead of ownship
+        rpz_m = np.maximum(conf.rpz[idx1] * self.resofach, conf.rpz[idx2] * self.resofach)
+        hpz_m = np.maximum(conf.hpz[idx1] * self.resofacv, conf.hpz[idx2] * self.resofacv)
+        dtlook = conf.dtlookahead[idx1]
+        # Convert qdr from degrees to radians
+        qdr = np.radians(qdr)
+
+        # Relative position vector between id1 and id2
+        drel = np.array([np.sin(qdr) * dist,
+                         np.cos(qdr) * dist,
+                         intruder.alt[idx2] - ownship.alt[idx1]])
+
+        # Write velocities as vectors and find relative velocity vector
+        v1 = np.array([ownship.gseast[idx1], ownship.gsnorth[idx1], ownship.vs[idx1]])
+        v2 = np.array([intruder.gseast[idx2], intruder.gsnorth[idx2], intruder.vs[idx2]])
+        vrel = v2 - v1
+
+        # Horizontal resolution----------------------------------------------------
+
+        # Find horizontal distance at the tcpa (min horizontal distance)
+        dcpa  = drel + vrel * tcpa
+        dabsH = np.sqrt(dcpa[0] * dcpa[0] + dcpa[1] * dcpa[1])
+
+        # Compute horizontal intrusion
+        iH = rpz_m - dabsH
+
+        # Exception handlers for head-on conflicts
+        # This is done to prevent division by zero in the next step
+        threshold = 0.001
+        headon = dabsH <= threshold
+        dabsH[headon] = threshold
+        dcpa[0, headon] = drel[1, headon] / dist[headon] * threshold
+        dcpa[1, headon] = -drel[0, headon] / dist[headon] * threshold
+
+        # If intruder is outside the ownship PZ, then apply extra factor
+        # to make sure that resolution does not graze IPZ
+        outside = (rpz_m < dist) & (dabsH < dist)
+        erratum = np.cos(np.arcsin(rpz_m[outside] / dist[outside]) -
+                         np.arcsin(dabsH[outside] / dist[outside]))
+        iH[outside] = rpz_m[outside] / erratum - dabsH[outside]
+
+        # Compute the resolution velocity vector in horizontal direction.
+        # abs(tcpa) because it bcomes negative during intrusion.
+        dv1 = (iH * dcpa[0]) / (np.abs(tcpa) * dabsH)
+        dv2 = (iH * dcpa[1]) / (np.abs(tcpa) * dabsH)
+
+        # Vertical resolution------------------------------------------------------
+
+        # Compute the  vertical intrusion
+        # Amount of vertical intrusion dependent on vertical relative velocity
+        vertmove = np.abs(vrel[2]) > 0.0
+        iV = np.where(vertmove, hpz_m, hpz_m - np.abs(drel[2]))
+
+        # Get the time to solve the conflict vertically - tsolveV
+        tsolV = tLOS.copy()
+        tsolV[vertmove] = np.abs(drel[2, vertmove] / vrel[2, vertmove])
+
+        # If the time to solve the conflict vertically is longer than the look-ahead time,
+        # because the the relative vertical speed is very small, then solve the intrusion
+        # within tinconf
+        slow = tsolV > dtlook
+        tsolV[slow] = tLOS[slow]
+        iV[slow] = hpz_m[slow]
+
+        # Compute the resolution velocity vector in the vertical direction
+        # The direction of the vertical resolution is such that the aircraft with
+        # higher climb/decent rate reduces their climb/decent rate
+        # MVP gives an infinite vertical speed when the time to solve is zero
+        # (e.g., at the same altitude), and NaN when opposite resolutions are
+        # added. Use a very large, finite speed instead, which is capped by
+        # the performance limits in the same way.
+        dv3 = iV / np.where(tsolV == 0.0, 1e-9, tsolV)
+        dv3[vertmove] *= -np.sign(vrel[2, vertmove])
+
+        # Combine resolutions------------------------------------------------------
+
+        # combine the dv components
+        dv = np.column_stack((dv1, dv2, dv3))
+
+        return dv, tsolV
@@ -0,0 +1,224 @@
+''' Index-based bookkeeping of conflict and loss-of-separation pairs. '''
+from collections.abc import Sequence, Set
+import numpy as np
+
+
+class PairList(Sequence):
+    ''' Read-only list of (id_i, id_j) aircraft pairs, stored as two arrays
+        of aircraft indices. The id tuples are only created when the list
+        is accessed.
+
+        The indices refer to the order of the aircraft at the moment of
+        detection (just like the qdr/dist/tcpa arrays of the CD), so the
+        aircraft ids are captured when the list is created. This keeps the
+        pairs valid when aircraft are deleted before the next detection. '''
+    def __init__(self, ids=(), i=(), j=()):
+        self.ids = tuple(ids)
+        self.i = np.asarray(i, dtype=int)
+        self.j = np.asarray(j, dtype=int)
+
+    def __len__(self):
+        return len(self.i)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [(self.ids[i], self.ids[j]) for i, j in
+                    zip(self.i[item].tolist(), self.j[item].tolist())]
+        return self.ids[self.i[item]], self.ids[self.j[item]]
+
+    def __iter__(self):
+        ids = self.ids
+        return ((ids[i], ids[j]) for i, j in zip(self.i.tolist(), self.j.tolist()))
+
+    def __eq__(self, other):
+        if isinstance(other, Sequence):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f'PairList({list(self)})'
+
+    def clear(self):
+        ''' Remove all pairs from this list. '''
+        self.i = self.j = np.array([], dtype=int)
+
+    @classmethod
+    def frompairs(cls, pairs, ids):
+        ''' Convert a list of (id_i, id_j) tuples, as returned by CD
+            implementations that don't use PairList, to a PairList. '''
+        if isinstance(pairs, PairList):
+            return pairs
+        if not pairs:
+            return cls(ids)
+        idx = {acid: i for i, acid in enumerate(ids)}
+        i, j = zip(*((idx[a], idx[b]) for a, b in pairs))
+        return cls(ids, i, j)
+
+
+class PairKeys:
+    ''' Base class for read-only views of unique aircraft pairs, stored as
+        an array of pair keys. The frozenset({id_a, id_b}) items are only
+        created when the view is accessed. '''
+    def __init__(self, names, key, uids=None):
+        self.names = names
+        self.key = key
+        self.uids = uids
+
+    def __len__(self):
+        return len(self.key)
+
+    def __iter__(self):
+        names = self.names
+        return (frozenset((names[a], names[b])) for a, b in
+                zip(*(uid.tolist() for uid in pairuids(self.key))))
+
+    def __repr__(self):
+        return f'{type(self).__name__}({list(self)})'
+
+
+class PairSet(PairKeys, Set):
+    ''' Set-like view of unique aircraft pairs (a, b) = (b, a).
+
+        Membership is tested on the sorted pair keys, using the map uids
+        of aircraft id to the uid of the current aircraft with that id. '''
+    def __contains__(self, pair):
+        if self.uids is None:
+            return pair in set(self)
+        try:
+            a, b = pair
+        except (TypeError, ValueError):
+            return False
+        uid_a, uid_b = self.uids.get(a), self.uids.get(b)
+        if uid_a is None or uid_b is None:
+            return False
+        key = pairkeys(uid_a, uid_b)
+        i = np.searchsorted(self.key, key)
+        return bool(i < len(self.key) and self.key[i] == key)
+
+    @classmethod
+    def _from_iterable(cls, it):
+        return set(it)
+
+
+class PairHistory(PairKeys, Sequence):
+    ''' List-like view of unique aircraft pairs, in order of occurrence. '''
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return list(PairKeys(self.names, self.key[item]))
+        a, b = pairuids(self.key[item])
+        return frozenset((self.names[a], self.names[b]))
+
+
+class ConflictTable:
+    ''' Incremental table of unique aircraft pairs (a, b) = (b, a), such as
+        conflicts or losses of separation.
+
+        Aircraft are identified by a unique number (uid) that is never reused
+        within a simulation, and names[uid] gives the corresponding aircraft
+        id. Each update, the current pairs are split in new, continuing, and
+        ended pairs using sorted-array operations, so no Python objects are
+        created per pair. Id-based views are only built when requested.
+        The optional uids map gives the uid of the current aircraft with an
+        id, and is used for membership tests of the active pairs. '''
+    def __init__(self, names, uids=None):
+        self.names = names
+        self.uids = uids
+        # Sorted keys and start times of the currently active pairs
+        self.key = np.array([], dtype=np.int64)
+        self.tstart = np.array([])
+        # Keys of the pairs that started and ended in the last update
+        self.newkey = np.array([], dtype=np.int64)
+        self.endkey = np.array([], dtype=np.int64)
+        # Keys of all pairs since reset in order of occurrence, and keys,
+        # start times, and end times of all pairs that have ended
+        self._allkey = [np.array([], dtype=np.int64)]
+        self._ended = [(np.array([], dtype=np.int64), np.array([]), np.array([]))]
+
+    def reset(self):
+        ''' Clear the table, including its history. '''
+        self.clear()
+        self._allkey = [np.array([], dtype=np.int64)]
+        self._ended = [(np.array([], dtype=np.int64), np.array([]), np.array([]))]
+
+    def clear(self):
+        ''' Clear the currently active pairs, without recording their end. '''
+        self.key = np.array([], dtype=np.int64)
+        self.tstart = np.array([])
+        self.newkey = np.array([], dtype=np.int64)
+        self.endkey = np.array([], dtype=np.int64)
+
+    def update(self, uid_i, uid_j, simt):
+        ''' Update the table with the (one- or two-sided) pairs uid_i-uid_j
+            that are active at time simt. '''
+        key = np.unique(pairkeys(uid_i, uid_j))
+        iscont = np.isin(key, self.key, assume_unique=True)
+        isended = np.isin(self.key, key, assume_unique=True, invert=True)
+
+        # Continuing pairs keep their start time
+        tstart = np.full(len(key), simt, dtype=float)
+        tstart[iscont] = self.tstart[np.searchsorted(self.key, key[iscont])]
+
+        self.newkey = key[~iscont]
+        self.endkey = self.key[isended]
+        if len(self.newkey):
+            self._allkey.append(self.newkey)
+        if len(self.endkey):
+            self._ended.append((self.endkey, self.tstart[isended],
+                                np.full(len(self.endkey), simt, dtype=float)))
+        self.key, self.tstart = key, tstart
+
+    def __len__(self):
+        return len(self.key)
+
+    @property
+    def allkey(self):
+        ''' Keys of all pairs since reset, in order of occurrence. '''
+        if len(self._allkey) > 1:
+            self._allkey = [np.concatenate(self._allkey)]
+        return self._allkey[0]
+
+    @property
+    def ended(self):
+        ''' Keys, start times and end times of all pairs that have ended. '''
+        if len(self._ended) > 1:
+            self._ended = [tuple(np.concatenate(v) for v in zip(*self._ended))]
+        return self._ended[0]
+
+    @property
+    def unique(self):
+        ''' Set of currently active pairs, as frozenset({id_a, id_b}). '''
+        return PairSet(self.names, self.key, self.uids)
+
+    @property
+    def all(self):
+        ''' All pairs since reset, as frozenset({id_a, id_b}). '''
+        return PairHistory(self.names, self.allkey)
+
+    @property
+    def allunique(self):
+        ''' All pairs since reset, without repetitions of pairs that
+            occurred more than once, in order of first occurrence. '''
+        _, first = np.unique(self.allkey, return_index=True)
+        return PairHistory(self.names, self.allkey[np.sort(first)])
+
+    @property
+    def new(self):
+        ''' Pairs that started in the last update. '''
+        return PairHistory(self.names, self.newkey)
+
+    @property
+    def gone(self):
+        ''' Pairs that ended in the last update. '''
+        return PairHistory(self.names, self.endkey)
+
+
+def pairkeys(uid_i, uid_j):
+    ''' Combine two arrays of aircraft uids into order-independent pair keys. '''
+    uid_i = np.asarray(uid_i, dtype=np.int64)
+    uid_j = np.asarray(uid_j, dtype=np.int64)
+    return (np.minimum(uid_i, uid_j) << 32) | np.maximum(uid_i, uid_j)
+
+
+def pairuids(key):
+    ''' Split pair keys into the two aircraft uids (a, b), with a < b. '''
+    return key >> 32, key & 0xffffffff
@@ -5,6 +5,7 @@ import bluesky as bs
 from bluesky.tools.aero import ft, nm
 from bluesky.core import Entity
 from bluesky.stack import command
+from bluesky.traffic.asas.conflicttable import ConflictTable, PairList
 
 
 bs.settings.set_variable_defaults(asas_pzr=5.0, asas_pzh=1000.0,
@@ -13,6 +14,10 @@ bs.settings.set_variable_defaults(asas_pzr=5.0, asas_pzh=1000.0,
 
 class ConflictDetection(Entity, replaceable=True):
     ''' Base class for Conflict Detection implementations. '''
+    # True for implementations of which detect() can evaluate only the
+    # aircraft pairs with at least one active aircraft (see detect)
+    partialdetect = False
+
     def __init__(self):
         super().__init__()
         ## Default values
@@ -29,23 +34,25 @@ class ConflictDetection(Entity, replaceable=True):
         self.global_dtnolook = True
 
         # Conflicts and LoS detected in the current timestep (used for resolving)
-        self.confpairs = list()
-        self.lospairs = list()
+        self.confpairs = PairList()
+        self.lospairs = PairList()
         self.qdr = np.array([])
         self.dist = np.array([])
         self.dcpa = np.array([])
         self.tcpa = np.array([])
         self.tLOS = np.array([])
-        # Unique conflicts and LoS in the current timestep (a, b) = (b, a)
-        self.confpairs_unique = set()
-        self.lospairs_unique = set()
-
-        # All conflicts and LoS since simt=0
-        self.confpairs_all = list()
-        self.lospairs_all = list()
+        # Unique conflicts and LoS (a, b) = (b, a), with their start and end
+        # times. Aircraft are identified in these tables by a unique number
+        # (acuid), and acnames[acuid] gives the corresponding aircraft id.
+        # acuids gives the uid of the current aircraft with an id.
+        self.acnames = list()
+        self.acuids = dict()
+        self.conftable = ConflictTable(self.acnames, self.acuids)
+        self.lostable = ConflictTable(self.acnames, self.acuids)
 
         # Per-aircraft conflict data
         with self.settrafarrays():
+            self.acuid = np.array([], dtype=int)  # Unique aircraft number
             self.inconf = np.array([], dtype=bool)  # In-conflict flag
             self.tcpamax = np.array([]) # Maximum time to CPA for aircraft in conflict
             # [m] Horizontal separation minimum for detection
@@ -56,10 +63,30 @@ class ConflictDetection(Entity, replaceable=True):
             self.dtlookahead = np.array([])
             self.dtnolook = np.array([])
 
+    @property
+    def confpairs_unique(self):
+        ''' Unique conflicts in the current timestep (a, b) = (b, a). '''
+        return self.conftable.unique
+
+    @property
+    def lospairs_unique(self):
+        ''' Unique losses of separation in the current timestep. '''
+        return self.lostable.unique
+
+    @property
+    def confpairs_all(self):
+        ''' All unique conflicts since simt=0. '''
+        return self.conftable.all
+
+    @property
+    def lospairs_all(self):
+        ''' All unique losses of separation since simt=0. '''
+        return self.lostable.all
+
     def clearconfdb(self):
         ''' Clear conflict database. '''
-        self.confpairs_unique.clear()
-        self.lospairs_unique.clear()
+        self.conftable.clear()
+        self.lostable.clear()
         self.confpairs.clear()
         self.lospairs.clear()
         self.qdr = np.array([])
@@ -72,17 +99,36 @@ class ConflictDetection(Entity, replaceable=True):
 
     def create(self, n):
         super().create(n)
+        # Give the new aircraft a unique number
+        self.acuid[-n:] = np.arange(len(self.acnames), len(self.acnames) + n)
+        self.acnames.extend(bs.traf.id[-n:])
+        self.acuids.update(zip(bs.traf.id[-n:], self.acuid[-n:].tolist()))
         # Initialise values of own states
         self.rpz[-n:] = self.rpz_def
         self.hpz[-n:] = self.hpz_def
         self.dtlookahead[-n:] = self.dtlookahead_def
         self.dtnolook[-n:] = self.dtnolook_def
 
+    @classmethod
+    def select(cls):
+        ''' Select this CD method, and let the previously selected method
+            release its resources. '''
+        previous = cls.selected()
+        super().select()
+        if previous is not cls and previous.implinstance() is not None:
+            previous.implinstance().deselect()
+
+    def deselect(self):
+        ''' Called when another CD method is selected. '''
+        pass
+
     def reset(self):
         super().reset()
         self.clearconfdb()
-        self.confpairs_all.clear()
-        self.lospairs_all.clear()
+        self.conftable.reset()
+        self.lostable.reset()
+        self.acnames.clear()
+        self.acuids.clear()
         self.rpz_def = bs.settings.asas_pzr * nm
         self.hpz_def = bs.settings.asas_pzh * ft
         self.dtlookahead_def = bs.settings.asas_dtlookahead
@@ -206,32 +252,44 @@ class ConflictDetection(Entity, replaceable=True):
             self.dtnolook[:] = time
         return True, f'Setting default CD no-look to {time} sec'
 
-    def update(self, ownship, intruder):
-        ''' Perform an update step of the Conflict Detection implementation. '''
+    def update(self, ownship, intruder, active=None):
+        ''' Perform an update step of the Conflict Detection implementation.
+            active is an optional boolean mask of the aircraft of which the
+            conflicts are detected in this update, for implementations that
+            support partial detection. '''
+        kwargs = dict() if active is None else dict(active=active)
         self.confpairs, self.lospairs, self.inconf, self.tcpamax, self.qdr, \
             self.dist, self.dcpa, self.tcpa, self.tLOS = \
-                self.detect(ownship, intruder, self.rpz, self.hpz, self.dtlookahead)
+                self.detect(ownship, intruder, self.rpz, self.hpz, self.dtlookahead, **kwargs)
 
-        # confpairs has conflicts observed from both sides (a, b) and (b, a)
-        # confpairs_unique keeps only one of these
-        confpairs_unique = {frozenset(pair) for pair in self.confpairs}
-        lospairs_unique = {frozenset(pair) for pair in self.lospairs}
+        self.updatetables(ownship)
 
-        self.confpairs_all.extend(confpairs_unique - self.confpairs_unique)
-        self.lospairs_all.extend(lospairs_unique - self.lospairs_unique)
+    def updatetables(self, ownship):
+        ''' Update the unique conflict and LoS tables with the pairs
+            detected in the current timestep. '''
+        # CD implementations can also return lists of (id_i, id_j) tuples
+        self.confpairs = PairList.frompairs(self.confpairs, ownship.id)
+        self.lospairs = PairList.frompairs(self.lospairs, ownship.id)
 
-        # Update confpairs_unique and lospairs_unique
-        self.confpairs_unique = confpairs_unique
-        self.lospairs_unique = lospairs_unique
+        # confpairs has conflicts observed from both sides (a, b) and (b, a)
+        # the conflict tables keep only one of these
+        self.conftable.update(self.acuid[self.confpairs.i],
+                              self.acuid[self.confpairs.j], bs.sim.simt)
+        self.lostable.update(self.acuid[self.lospairs.i],
+                             self.acuid[self.lospairs.j], bs.sim.simt)
 
-    def detect(self, ownship, intruder, rpz, hpz, dtlookahead):
+    def detect(self, ownship, intruder, rpz, hpz, dtlookahead, active=None):
         ''' Detect any conflicts between ownship and intruder.
             This function should be reimplemented in a subclass for actual
             detection of conflicts. See for instance
             bluesky.traffic.asas.statebased.
+
+            Implementations with partialdetect = True also accept a boolean
+            mask of active aircraft, and then only evaluate the pairs in which
+            the ownship or the intruder is active.
         '''
-        confpairs = []
-        lospairs = []
+        confpairs = PairList(ownship.id)
+        lospairs = PairList(ownship.id)
         inconf = np.zeros(ownship.ntraf)
         tcpamax = np.zeros(ownship.ntraf)
         qdr = np.array([])
@@ -169,8 +169,8 @@ class MVP(ConflictResolution):
 
         # Call MVP function to resolve conflicts-----------------------------------
         for ((ac1, ac2), qdr, dist, tcpa, tLOS) in zip(conf.confpairs, conf.qdr, conf.dist, conf.tcpa, conf.tLOS):
-            idx1 = ownship.id.index(ac1)
-            idx2 = intruder.id.index(ac2)
+            idx1 = ownship.id2idx(ac1)
+            idx2 = intruder.id2idx(ac2)
 
             # If A/C indexes are found, then apply MVP on this conflict pair
             # Because ADSB is ON, this is done for each aircraft separately
@@ -196,7 +196,12 @@ class MVP(ConflictResolution):
                 if self.resooffac[idx1]:
                     dv[idx1] = 0.0
 
+        return self.newvelocity(conf, ownship, dv, timesolveV)
 
+    def newvelocity(self, conf, ownship, dv, timesolveV):
+        ''' Determine the ASAS commands for all aircraft from the resolution
+            velocity vectors dv [ntraf x 3] and the times needed to resolve
+            vertically. '''
         # Determine new speed and limit resolution direction for all aicraft-------
 
         # Resolution vector for all aircraft, cartesian coordinates
@@ -0,0 +1,84 @@
+''' State-based conflict detection, distributed over multiple cores. '''
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+import bluesky as bs
+from bluesky.traffic.asas import StateBased
+from bluesky.traffic.asas.statebased import detect_pairs, tilepairs, conflictlists
+
+
+# Register settings defaults
+bs.settings.set_variable_defaults(asas_nworkers=0)
+
+
+class ParallelStateBased(StateBased):
+    ''' State-based conflict detection where the ownship rows are split in
+        blocks that are evaluated by a pool of worker threads.
+
+        The numpy kernels of the pairwise detection release the GIL, so the
+        workers run concurrently while sharing the traffic arrays in memory
+        without copying or pickling them. The partial conflict records are
+        merged in the order of the ownship blocks, which makes the result
+        identical to that of StateBased.
+
+        The number of workers is set with the asas_nworkers setting, where
+        zero means one worker per available cpu core.
+    '''
+    pool = None
+    nworkers = 0
+
+    def detect(self, ownship, intruder, rpz, hpz, dtlookahead, active=None):
+        ''' Conflict detection between ownship (traf) and intruder (traf/adsb).'''
+        nworkers = bs.settings.asas_nworkers or os.cpu_count() or 1
+        ntraf = ownship.ntraf
+        if nworkers < 2 or ntraf < 2:
+            return super().detect(ownship, intruder, rpz, hpz, dtlookahead, active)
+
+        tilesize = bs.settings.asas_tilesize or ntraf * ntraf
+        dtype = np.float32 if bs.settings.asas_float32 else np.float64
+
+        # Each worker processes its ownship rows in tiles of at most tilesize
+        # pairs. Use at least one block per worker, so that all cores are used.
+        nrows = max(1, min(tilesize // ntraf, -(-ntraf // nworkers)))
+        blocks = [(i0, min(i0 + nrows, ntraf)) for i0 in range(0, ntraf, nrows)]
+
+        def detect_block(block):
+            return detect_pairs(ownship, intruder, rpz, hpz, dtlookahead,
+                                *tilepairs(*block, ntraf, active), dtype=dtype)
+
+        # Results of map() are returned in the order of the blocks
+        records = list(self.getpool(nworkers).map(detect_block, blocks))
+        return conflictlists(ownship, *(np.concatenate(rec) for rec in zip(*records)))
+
+    def reset(self):
+        super().reset()
+        self.shutdown()
+
+    def deselect(self):
+        ''' Stop the worker threads when another CD method is selected. '''
+        self.shutdown()
+
+    @classmethod
+    def getpool(cls, nworkers):
+        ''' Return the worker pool, (re)creating it when the number of
+            workers has changed. '''
+        if cls.pool is None or cls.nworkers != nworkers:
+            cls.shutdown()
+            cls.pool = ThreadPoolExecutor(max_workers=nworkers,
+                                          thread_name_prefix='asas')
+            cls.nworkers = nworkers
+        return cls.pool
+
+    @classmethod
+    def shutdown(cls):
+        ''' Stop the worker threads. The pool is recreated when needed. '''
+        if cls.pool is not None:
+            cls.pool.shutdown(wait=False)
+        cls.pool = None
+        cls.nworkers = 0
+
+
+# The worker threads don't exist in a forked simulation process (see FORK):
+# the pool is recreated there when it is needed
+os.register_at_fork(after_in_child=lambda: setattr(ParallelStateBased, 'pool', None))
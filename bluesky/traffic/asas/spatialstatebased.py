@@ -0,0 +1,83 @@
+''' State-based conflict detection with spatial pruning of candidate pairs. '''
+import numpy as np
+
+import bluesky as bs
+from bluesky.tools.aero import Rearth
+from bluesky.traffic.asas import StateBased
+from bluesky.traffic.asas.statebased import detect_pairs, conflictlists
+
+
+# Relative and absolute safety margins on the pruning distances, to make sure
+# that the approximations in the flat-earth (kwik) distance never cause
+# pairs to be pruned that StateBased would consider.
+PRUNE_MARGIN_REL = 1.05
+PRUNE_MARGIN_ABS = 10.0  # [m]
+
+
+class SpatialStateBased(StateBased):
+    ''' State-based conflict detection that only evaluates aircraft pairs that
+        can possibly come in conflict within the lookahead time.
+
+        Candidate pairs are found with a KD-tree over the aircraft positions,
+        using a search radius of rpz + 2 * gs * dtlookahead horizontally, and
+        hpz + 2 * vs * dtlookahead vertically. The exact CPA calculations of
+        StateBased are then only performed on the surviving pairs, which makes
+        memory use and computation time scale with the number of nearby pairs
+        instead of with ntraf^2.
+    '''
+    def detect(self, ownship, intruder, rpz, hpz, dtlookahead, active=None):
+        ''' Conflict detection between ownship (traf) and intruder (traf/adsb).'''
+        i, j = self.candidates(ownship, intruder, rpz, hpz, dtlookahead)
+        if active is not None:
+            keep = active[i] | active[j]
+            i, j = i[keep], j[keep]
+        dtype = np.float32 if bs.settings.asas_float32 else np.float64
+        return conflictlists(ownship, *detect_pairs(ownship, intruder, rpz, hpz,
+                                                    dtlookahead, i, j, dtype))
+
+    @staticmethod
+    def candidates(ownship, intruder, rpz, hpz, dtlookahead):
+        ''' Return the index arrays (i, j) of all ownship-intruder pairs
+            that are close enough to be in conflict within the lookahead
+            time, sorted on i first and j second. '''
+        if ownship.ntraf < 2:
+            return np.array([], dtype=int), np.array([], dtype=int)
+        # Deferred import: scipy.spatial takes ~0.1 s to import
+        from scipy.spatial import cKDTree
+
+        # Maximum distances that can be closed within the lookahead time
+        dtmax = np.max(dtlookahead)
+        gsmax = max(np.max(np.abs(ownship.gs)), np.max(np.abs(intruder.gs)))
+        vsmax = max(np.max(np.abs(ownship.vs)), np.max(np.abs(intruder.vs)))
+        hrange = PRUNE_MARGIN_REL * (np.max(rpz) + 2.0 * gsmax * dtmax) + PRUNE_MARGIN_ABS
+        vrange = PRUNE_MARGIN_REL * (np.max(hpz) + 2.0 * vsmax * dtmax) + PRUNE_MARGIN_ABS
+
+        # Build search trees on earth-centered coordinates (the chord distance is
+        # always smaller than the distance over the earth surface), with altitude
+        # as a fourth coordinate scaled such that a sphere with radius
+        # sqrt(2) * hrange contains the full hrange x vrange search box.
+        vscale = hrange / vrange
+        owntree = cKDTree(_searchcoords(ownship.lat, ownship.lon, ownship.alt, vscale))
+        inttree = owntree if intruder is ownship else \
+            cKDTree(_searchcoords(intruder.lat, intruder.lon, intruder.alt, vscale))
+        pairs = owntree.sparse_distance_matrix(inttree, np.sqrt(2.0) * hrange,
+                                               output_type='ndarray')
+
+        # Skip ownship-ownship pairs, and sort in the same order as np.where
+        # on the full conflict matrix would give
+        pairs = pairs[pairs['i'] != pairs['j']]
+        order = np.lexsort((pairs['j'], pairs['i']))
+        return pairs['i'][order].astype(int), pairs['j'][order].astype(int)
+
+
+def _searchcoords(lat, lon, alt, vscale):
+    ''' Earth-centered cartesian coordinates [m] plus scaled altitude,
+        used to build the candidate search tree. '''
+    latrad = np.radians(lat)
+    lonrad = np.radians(lon)
+    coslat = np.cos(latrad)
+    return np.column_stack((Rearth * coslat * np.cos(lonrad),
+                            Rearth * coslat * np.sin(lonrad),
+                            Rearth * np.sin(latrad),
+                            vscale * alt))
+
@@ -1,14 +1,49 @@
 ''' State-based conflict detection. '''
 import numpy as np
+import bluesky as bs
 from bluesky import stack
 from bluesky.tools import geo
 from bluesky.tools.aero import nm
 from bluesky.traffic.asas import ConflictDetection
+from bluesky.traffic.asas.conflicttable import PairList
+
+
+# Register settings defaults
+bs.settings.set_variable_defaults(asas_tilesize=65536, asas_float32=False)
 
 
 class StateBased(ConflictDetection):
-    def detect(self, ownship, intruder, rpz, hpz, dtlookahead):
+    partialdetect = True
+
+    def detect(self, ownship, intruder, rpz, hpz, dtlookahead, active=None):
         ''' Conflict detection between ownship (traf) and intruder (traf/adsb).'''
+        # For larger numbers of aircraft, or when only the pairs of active
+        # aircraft are evaluated, evaluate the aircraft pairs in blocks of
+        # ownship rows, instead of in full ntraf x ntraf matrices
+        tilesize = bs.settings.asas_tilesize
+        if active is not None or tilesize > 0 and ownship.ntraf * ownship.ntraf > tilesize:
+            return self.detect_tiled(ownship, intruder, rpz, hpz, dtlookahead,
+                tilesize or ownship.ntraf * ownship.ntraf,
+                np.float32 if bs.settings.asas_float32 else np.float64, active)
+        return self.detect_matrix(ownship, intruder, rpz, hpz, dtlookahead)
+
+    @staticmethod
+    def detect_tiled(ownship, intruder, rpz, hpz, dtlookahead, tilesize,
+                     dtype=np.float64, active=None):
+        ''' Conflict detection where ownship rows are processed in tiles of
+            at most tilesize aircraft pairs. Only the conflict and LoS records
+            of each tile are kept, so memory use is O(ntraf * tile). '''
+        nrows = max(1, tilesize // ownship.ntraf)
+        records = [detect_pairs(ownship, intruder, rpz, hpz, dtlookahead,
+                                *tilepairs(i0, min(i0 + nrows, ownship.ntraf),
+                                           ownship.ntraf, active),
+                                dtype=dtype)
+                   for i0 in range(0, ownship.ntraf, nrows)]
+        return conflictlists(ownship, *(np.concatenate(rec) for rec in zip(*records)))
+
+    @staticmethod
+    def detect_matrix(ownship, intruder, rpz, hpz, dtlookahead):
+        ''' Conflict detection using full ntraf x ntraf matrices. '''
         # Identity matrix of order ntraf: avoid ownship-ownship detected conflicts
         I = np.eye(ownship.ntraf)
 
@@ -96,20 +131,148 @@ class StateBased(ConflictDetection):
         tcpamax = np.max(tcpa * swconfl, 1)
 
         # Select conflicting pairs: each a/c gets their own record
-        confpairs = [(ownship.id[i], ownship.id[j]) for i, j in zip(*np.where(swconfl))]
+        confpairs = PairList(ownship.id, *np.where(swconfl))
         swlos = (dist < rpz) * (np.abs(dalt) < hpz)
-        lospairs = [(ownship.id[i], ownship.id[j]) for i, j in zip(*np.where(swlos))]
+        lospairs = PairList(ownship.id, *np.where(swlos))
 
         return confpairs, lospairs, inconf, tcpamax, \
             qdr[swconfl], dist[swconfl], np.sqrt(dcpa2[swconfl]), \
                 tcpa[swconfl], tinconf[swconfl]
 
 
+def tilepairs(i0, i1, ntraf, active=None):
+    ''' Return the index arrays (i, j) of all pairs of ownship rows i0 to i1
+        with all intruders, excluding ownship-ownship pairs. When a boolean
+        mask of active aircraft is given, only the pairs in which the ownship
+        or the intruder is active are returned. '''
+    i = np.repeat(np.arange(i0, i1), ntraf)
+    j = np.tile(np.arange(ntraf), i1 - i0)
+    notself = i != j
+    if active is not None:
+        notself &= active[i] | active[j]
+    return i[notself], j[notself]
+
+
+def detect_pairs(ownship, intruder, rpz, hpz, dtlookahead, i, j, dtype=np.float64):
+    ''' State-based conflict detection for the ownship-intruder pairs (i, j).
+
+        The calculations are the same as those on the elements of the
+        ntraf x ntraf matrices in StateBased.detect_matrix. Pairs that can't
+        get within the protected zone within the lookahead time are
+        discarded after the distance calculation.
+
+        Returns sparse conflict and LoS records:
+        - ci, cj, qdr, dist, dcpa, tcpa, tLOS: pair indices and geometry
+          of all pairs in conflict
+        - li, lj: pair indices of all pairs in loss of separation
+    '''
+    # Horizontal conflict ------------------------------------------------------
+    # Positions are subtracted in double precision, the rest of the calculation
+    # is performed with the requested dtype
+    dlat    = np.radians(intruder.lat[j] - ownship.lat[i]).astype(dtype, copy=False)
+    dlon    = np.radians(((intruder.lon[j] - ownship.lon[i]) + 180) % 360 - 180).astype(dtype, copy=False)
+    cavelat = np.cos(np.radians(intruder.lat[j] + ownship.lat[i]) * 0.5).astype(dtype, copy=False)
+
+    dangle  = np.sqrt(dlat * dlat + (dlon * dlon) * (cavelat * cavelat))
+    dist    = 6371000. * dangle  # [m]
+
+    # Relative velocity
+    owntrkrad = np.radians(ownship.trk[j].astype(dtype, copy=False))
+    inttrkrad = np.radians(intruder.trk[i].astype(dtype, copy=False))
+    owngs = ownship.gs[j].astype(dtype, copy=False)
+    intgs = intruder.gs[i].astype(dtype, copy=False)
+    du = owngs * np.sin(owntrkrad) - intgs * np.sin(inttrkrad)  # Speed du[i,j] is perceived eastern speed of i to j
+    dv = owngs * np.cos(owntrkrad) - intgs * np.cos(inttrkrad)  # Speed dv[i,j] is perceived northern speed of i to j
+
+    dv2 = du * du + dv * dv
+    dv2 = np.where(np.abs(dv2) < 1e-6, 1e-6, dv2)  # limit lower absolute value
+    vrel = np.sqrt(dv2)
+
+    # RPZ can differ per aircraft, get the largest value per aircraft pair
+    rpzpair = np.maximum(rpz[j], rpz[i]).astype(dtype, copy=False)
+
+    # Only keep pairs that can reach each other's protected zone
+    # within the lookahead time (with a small safety margin)
+    near = dist < 1.01 * (rpzpair + vrel * dtlookahead[i]) + 1.0
+    i, j = i[near], j[near]
+    dlat, dlon, cavelat, dist = dlat[near], dlon[near], cavelat[near], dist[near]
+    du, dv, dv2, vrel, rpzpair = du[near], dv[near], dv2[near], vrel[near], rpzpair[near]
+
+    qdr = np.degrees(np.arctan2(dlon * cavelat, dlat)) % 360.
+
+    # Calculate horizontal closest point of approach (CPA)
+    qdrrad = np.radians(qdr)
+    dx = dist * np.sin(qdrrad)  # is pos j rel to i
+    dy = dist * np.cos(qdrrad)  # is pos j rel to i
+
+    tcpa = -(du * dx + dv * dy) / dv2
+
+    # Calculate distance^2 at CPA (minimum distance^2)
+    dcpa2 = np.abs(dist * dist - tcpa * tcpa * dv2)
+
+    # Check for horizontal conflict
+    R2 = rpzpair * rpzpair
+    swhorconf = dcpa2 < R2  # conflict or not
+
+    # Calculate times of entering and leaving horizontal conflict
+    dxinhor = np.sqrt(np.maximum(0., R2 - dcpa2))  # half the distance travelled inzide zone
+    dtinhor = dxinhor / vrel
+
+    tinhor = np.where(swhorconf, tcpa - dtinhor, 1e8)  # Set very large if no conf
+    touthor = np.where(swhorconf, tcpa + dtinhor, -1e8)  # set very large if no conf
+
+    # Vertical conflict --------------------------------------------------------
+
+    # Vertical crossing of disk (-dh,+dh)
+    dalt = (ownship.alt[j] - intruder.alt[i]).astype(dtype, copy=False)
+
+    dvs = (ownship.vs[j] - intruder.vs[i]).astype(dtype, copy=False)
+    dvs = np.where(np.abs(dvs) < 1e-6, 1e-6, dvs)  # prevent division by zero
+
+    # Check for passing through each others zone
+    # hPZ can differ per aircraft, get the largest value per aircraft pair
+    hpzpair = np.maximum(hpz[j], hpz[i]).astype(dtype, copy=False)
+    tcrosshi = (dalt + hpzpair) / -dvs
+    tcrosslo = (dalt - hpzpair) / -dvs
+    tinver = np.minimum(tcrosshi, tcrosslo)
+    toutver = np.maximum(tcrosshi, tcrosslo)
+
+    # Combine vertical and horizontal conflict----------------------------------
+    tinconf = np.maximum(tinver, tinhor)
+    toutconf = np.minimum(toutver, touthor)
+
+    swconfl = swhorconf * (tinconf <= toutconf) * (toutconf > 0.0) * \
+        (tinconf < dtlookahead[i])
+    swlos = (dist < rpzpair) * (np.abs(dalt) < hpzpair)
+
+    return i[swconfl], j[swconfl], qdr[swconfl], dist[swconfl], \
+        np.sqrt(dcpa2[swconfl]), tcpa[swconfl], tinconf[swconfl], \
+        i[swlos], j[swlos]
+
+
+def conflictlists(ownship, ci, cj, qdr, dist, dcpa, tcpa, tLOS, li, lj):
+    ''' Convert sparse conflict and LoS records (see detect_pairs) into the
+        output format of ConflictDetection.detect. '''
+    # Ownship conflict flag and max tCPA
+    inconf = np.zeros(ownship.ntraf, dtype=bool)
+    inconf[ci] = True
+    tcpamax = np.zeros(ownship.ntraf)
+    np.maximum.at(tcpamax, ci, tcpa)
+
+    # Conflicting pairs: each a/c gets their own record
+    confpairs = PairList(ownship.id, ci, cj)
+    lospairs = PairList(ownship.id, li, lj)
+
+    return confpairs, lospairs, inconf, tcpamax, qdr, dist, dcpa, tcpa, tLOS
+
+
 try:
     from bluesky.traffic.asas import cstatebased
 
 
     class CStateBased(StateBased):
+        partialdetect = False
+
         def __init__(self):
             super().__init__()
             self.detect = cstatebased.detect
@@ -117,8 +117,9 @@ class Autopilot(Entity, replaceable=True):
 
         actwp data contains traffic arrays, to allow vectorizing the guidance logic.
 
-        Waypoint switching (just like the adding, deletion in route) are event driven commands and
-        therefore not vectorized as they occur rarely compared to the guidance.
+        Waypoint switching is vectorized over all aircraft that pass a waypoint in the same
+        time step, using the flat route table. Only the stack commands of the passed waypoints
+        and the VNAV/RTA profile of legs with a constraint ahead are handled per aircraft.
 
         wppassingcheck contains the waypoint switching function:
         - Check which aircraft i have reached their active waypoint
@@ -135,152 +136,136 @@ class Autopilot(Entity, replaceable=True):
                                        bs.traf.actwp.flyturn,bs.traf.actwp.turnrad,
                                        bs.traf.actwp.turnhdgr,bs.traf.actwp.swlastwp)
 
-        # For the one who have reached their active waypoint, update vectorized leg data for guidance
-        for i in self.idxreached:
+        # For the ones who have reached their active waypoint, update vectorized leg data for guidance
+        # All aircraft that pass a waypoint in this step are switched at once: the data of
+        # their next waypoints is gathered from the flat route table (see Route.getnextwps)
+        actwp = bs.traf.actwp
+        iall = self.idxreached
 
-            #debug commands to check VNAV state while passing waypoint
-            #print("Passing waypoint",bs.traf.ap.route[i].wpname[bs.traf.ap.route[i].iactwp])
-            #print("dist2wp,dist2vs",self.dist2wp[i]/nm,self.dist2vs[i]/nm) # distance to wp & distance to ToD/ToC
+        # Save current wp speed for use on next leg when we pass this waypoint
+        # VNAV speeds are always FROM-speeds, so we accelerate/decellerate at the waypoint
+        # where this speed is specified, so we need to save it for use now
+        # before getting the new data for the next waypoint
 
-            # Save current wp speed for use on next leg when we pass this waypoint
-            # VNAV speeds are always FROM-speeds, so we accelerate/decellerate at the waypoint
-            # where this speed is specified, so we need to save it for use now
-            # before getting the new data for the next waypoint
+        # Get speed for next leg from the waypoint we pass now and set as active spd
+        actwp.spd[iall]    = actwp.nextspd[iall]
+        actwp.spdcon[iall] = actwp.nextspd[iall]
 
-            # Get speed for next leg from the waypoint we pass now and set as active spd
-            bs.traf.actwp.spd[i]    = bs.traf.actwp.nextspd[i]
-            bs.traf.actwp.spdcon[i] = bs.traf.actwp.nextspd[i]
-
-            # Execute stack commands for the still active waypoint, which we pass now
+        # Execute stack commands for the still active waypoint, which we pass now
+        for i in iall:
             self.route[i].runactwpstack()
 
-            # Get next wp, if there still is one
-            if not bs.traf.actwp.swlastwp[i]:
-                lat, lon, alt, bs.traf.actwp.nextspd[i], \
-                bs.traf.actwp.xtoalt[i], toalt, \
-                    bs.traf.actwp.xtorta[i], bs.traf.actwp.torta[i], \
-                    lnavon, flyby, flyturn, turnrad, turnspd, turnhdgr,\
-                    bs.traf.actwp.next_qdr[i], bs.traf.actwp.swlastwp[i] =      \
-                    self.route[i].getnextwp()  # [m] note: xtoalt,nextaltco are in meters
-
-
-                bs.traf.actwp.nextturnlat[i], bs.traf.actwp.nextturnlon[i], \
-                bs.traf.actwp.nextturnspd[i], bs.traf.actwp.nextturnrad[i], \
-                bs.traf.actwp.nextturnhdgr[i],bs.traf.actwp.nextturnidx[i] = \
-                    self.route[i].getnextturnwp()
-
-            else:
-                # Prevent trying to activate the next waypoint when it was already the last waypoint
-                # In case of end of route/no more waypoints: switch off LNAV using the lnavon
-                bs.traf.swlnav[i] = False
-                bs.traf.swvnav[i] = False
-                bs.traf.swvnavspd[i] = False
-                continue # Go to next a/c which reached its active waypoint
+        # Prevent trying to activate the next waypoint when it was already the last waypoint
+        # In case of end of route/no more waypoints: switch off LNAV using the lnavon
+        islast = actwp.swlastwp[iall]
+        ilast = iall[islast]
+        bs.traf.swlnav[ilast] = False
+        bs.traf.swvnav[ilast] = False
+        bs.traf.swvnavspd[ilast] = False
+
+        # Get next wp for the others
+        i = iall[~islast]
+        if len(i) > 0:
+            wp = Route.getnextwps([self.route[j] for j in i])  # [m] note: xtoalt,nextaltco are in meters
+            lat, lon, alt = wp['lat'], wp['lon'], wp['alt']
+            toalt, lnavon = wp['toalt'], wp['lnavon']
+            flyturn, turnrad, turnspd, turnhdgr = wp['flyturn'] > 0.0, wp['turnrad'], \
+                wp['turnspd'], wp['turnhdgr']
+            actwp.nextspd[i]  = wp['spd']
+            actwp.xtoalt[i]   = wp['xtoalt']
+            actwp.xtorta[i]   = wp['xtorta']
+            actwp.torta[i]    = wp['torta']
+            actwp.next_qdr[i] = wp['nextqdr']
+            actwp.swlastwp[i] = wp['swlastwp']
+            for name in ('nextturnlat', 'nextturnlon', 'nextturnspd',
+                         'nextturnrad', 'nextturnhdgr', 'nextturnidx'):
+                getattr(actwp, name)[i] = wp[name]
 
             # Special turns: specified by turn radius or bank angle
             # If specified, use the given turn radius of passing wp for bank angle
-            if flyturn:
-                if turnspd<=0.:
-                    turnspd = bs.traf.tas[i]
-
-                # Heading rate overrides turnrad
-                if turnhdgr>0:
-                    turnrad = bs.traf.tas[i]*360./(2*np.pi*turnhdgr)
-
-                # Use last turn radius for bank angle in current turn
-                if bs.traf.actwp.turnrad[i] > 0.:
-                    self.turnphi[i] = atan(bs.traf.actwp.turnspd[i]*bs.traf.actwp.turnspd[i]/ \
-                                           (bs.traf.actwp.turnrad[i]*g0)) # [rad]
-                else:
-                    self.turnphi[i] = 0.0  # [rad] or leave untouched???
-
-            else:
-                self.turnphi[i] = 0.0  #[rad] or leave untouched???
+            tas = bs.traf.tas[i]
+            turnspd = np.where(flyturn * (turnspd <= 0.), tas, turnspd)
 
+            # Heading rate overrides turnrad
+            hdgr = flyturn * (turnhdgr > 0)
+            turnrad = np.where(hdgr, tas * 360. / (2 * np.pi * np.where(hdgr, turnhdgr, 1.)), turnrad)
 
+            # Use last turn radius for bank angle in current turn
+            lastturn = flyturn * (actwp.turnrad[i] > 0.)
+            self.turnphi[i] = np.where(lastturn, np.arctan(actwp.turnspd[i] * actwp.turnspd[i] /
+                                       (np.where(lastturn, actwp.turnrad[i], 1.) * g0)), 0.0)  # [rad]
 
             # Check LNAV switch returned by getnextwp
             # Switch off LNAV if it failed to get next wpdata
-            if not lnavon and bs.traf.swlnav[i]:
-                bs.traf.swlnav[i] = False
-                # Last wp: copy last wp values for alt and speed in autopilot
-                if bs.traf.swvnavspd[i] and bs.traf.actwp.nextspd[i]>= 0.0:
-                    bs.traf.selspd[i] = bs.traf.actwp.nextspd[i]
+            lnavoff = ~lnavon * bs.traf.swlnav[i]
+            bs.traf.swlnav[i[lnavoff]] = False
+            # Last wp: copy last wp values for alt and speed in autopilot
+            ispd = i[lnavoff * bs.traf.swvnavspd[i] * (actwp.nextspd[i] >= 0.0)]
+            bs.traf.selspd[ispd] = actwp.nextspd[ispd]
 
             # In case of no LNAV, do not allow VNAV mode to be active
-            bs.traf.swvnav[i] = bs.traf.swvnav[i] and bs.traf.swlnav[i]
+            bs.traf.swvnav[i] = bs.traf.swvnav[i] * bs.traf.swlnav[i]
 
-            bs.traf.actwp.lat[i] = lat  # [deg]
-            bs.traf.actwp.lon[i] = lon  # [deg]
+            actwp.lat[i] = lat  # [deg]
+            actwp.lon[i] = lon  # [deg]
             # 1.0 in case of fly by, else fly over
-            bs.traf.actwp.flyby[i] = int(flyby)
+            actwp.flyby[i] = wp['flyby']
 
             # Update qdr and turndist for this new waypoint for ComputeVNAV
-            qdr[i], distnmi = geo.qdrdist(bs.traf.lat[i], bs.traf.lon[i],
-                                          bs.traf.actwp.lat[i], bs.traf.actwp.lon[i])
+            qdr[i], distnmi = geo.qdrdist(bs.traf.lat[i], bs.traf.lon[i], lat, lon)
 
-            #dist[i] = distnmi * nm
-            self.dist2wp[i] = distnmi*nm
+            self.dist2wp[i] = distnmi * nm
 
-            bs.traf.actwp.curlegdir[i] = qdr[i]
-            bs.traf.actwp.curleglen[i] = self.dist2wp[i]
+            actwp.curlegdir[i] = qdr[i]
+            actwp.curleglen[i] = self.dist2wp[i]
 
             # User has entered an altitude for the new waypoint
-            if alt >= -0.01: # positive alt on this waypoint means altitude constraint
-                bs.traf.actwp.nextaltco[i] = alt  # [m]
-                bs.traf.actwp.xtoalt[i] = 0.0
-            else:
-                bs.traf.actwp.nextaltco[i] = toalt  # [m]
-
-            #if not bs.traf.swlnav[i]:
-            #    bs.traf.actwp.spd[i] = -997.
+            # positive alt on this waypoint means altitude constraint
+            altco = alt >= -0.01
+            actwp.nextaltco[i] = np.where(altco, alt, toalt)  # [m]
+            actwp.xtoalt[i[altco]] = 0.0
 
             # VNAV spd mode: use speed of this waypoint as commanded speed
             # while passing waypoint and save next speed for passing next wp
             # Speed is now from speed! Next speed is ready in wpdata
-            if bs.traf.swvnavspd[i] and bs.traf.actwp.spd[i]>= 0.0:
-                    bs.traf.selspd[i] = bs.traf.actwp.spd[i]
+            ispd = i[bs.traf.swvnavspd[i] * (actwp.spd[i] >= 0.0)]
+            bs.traf.selspd[ispd] = actwp.spd[ispd]
 
             # Update turndist so ComputeVNAV works, is there a next leg direction or not?
-            if bs.traf.actwp.next_qdr[i] < -900.:
-                local_next_qdr = qdr[i]
-            else:
-                local_next_qdr = bs.traf.actwp.next_qdr[i]
+            local_next_qdr = np.where(actwp.next_qdr[i] < -900., qdr[i], actwp.next_qdr[i])
 
-            # Calculate turn dist (and radius which we do not use now, but later) now for scalar variable [i]
-            bs.traf.actwp.turndist[i], dummy = \
-                bs.traf.actwp.calcturn(bs.traf.tas[i], self.bankdef[i],
-                                        qdr[i], local_next_qdr,turnrad,turnhdgr,flyturn)  # update turn distance for VNAV
+            # Calculate turn dist (and radius which we do not use now, but later) now for the new legs
+            actwp.turndist[i], dummy = \
+                actwp.calcturn(tas, self.bankdef[i], qdr[i], local_next_qdr,
+                               turnrad, turnhdgr, flyturn)  # update turn distance for VNAV
 
             # Get flyturn switches and data
-            bs.traf.actwp.flyturn[i]      = flyturn
-            bs.traf.actwp.turnrad[i]      = turnrad
-            bs.traf.actwp.turnspd[i]      = turnspd
-            bs.traf.actwp.turnhdgr[i]     = turnhdgr
+            actwp.flyturn[i]  = flyturn
+            actwp.turnrad[i]  = turnrad
+            actwp.turnhdgr[i] = turnhdgr
 
             # Pass on whether currently flyturn mode:
             # at beginning of leg,c copy tonextwp to lastwp
             # set next turn False
-            bs.traf.actwp.turnfromlastwp[i] = bs.traf.actwp.turntonextwp[i]
-            bs.traf.actwp.turntonextwp[i]   = False
+            actwp.turnfromlastwp[i] = actwp.turntonextwp[i]
+            actwp.turntonextwp[i]   = False
 
             # Keep both turning speeds: turn to leg and turn from leg
-            bs.traf.actwp.oldturnspd[i]  = bs.traf.actwp.turnspd[i] # old turnspd, turning by this waypoint
-            if bs.traf.actwp.flyturn[i]:
-                bs.traf.actwp.turnspd[i] = turnspd                  # new turnspd, turning by next waypoint
-            else:
-                bs.traf.actwp.turnspd[i] = -990.
+            actwp.oldturnspd[i] = turnspd                          # old turnspd, turning by this waypoint
+            actwp.turnspd[i] = np.where(flyturn, turnspd, -990.)   # new turnspd, turning by next waypoint
 
             # Reduce turn dist for reduced turnspd
-            if bs.traf.actwp.flyturn[i] and bs.traf.actwp.turnrad[i]<0.0 and bs.traf.actwp.turnspd[i]>=0.:
-                turntas = cas2tas(bs.traf.actwp.turnspd[i], bs.traf.alt[i])
-                bs.traf.actwp.turndist[i] = bs.traf.actwp.turndist[i]*turntas*turntas/(bs.traf.tas[i]*bs.traf.tas[i])
-
-            # VNAV = FMS ALT/SPD mode incl. RTA
-            self.ComputeVNAV(i, toalt, bs.traf.actwp.xtoalt[i], bs.traf.actwp.torta[i],
-                             bs.traf.actwp.xtorta[i])
-
-        
+            ired = i[flyturn * (turnrad < 0.0) * (actwp.turnspd[i] >= 0.)]
+            turntas = vcas2tas(actwp.turnspd[ired], bs.traf.alt[ired])
+            actwp.turndist[ired] = actwp.turndist[ired] * turntas * turntas / \
+                (bs.traf.tas[ired] * bs.traf.tas[ired])
+
+            # VNAV = FMS ALT/SPD mode incl. RTA, only when there is an RTA or
+            # an altitude constraint ahead in VNAV mode
+            vnav = (toalt >= 0.) * bs.traf.swvnav[i] + (actwp.torta[i] >= -90.)
+            self.dist2vs[i[~vnav]] = -999999.
+            for j, jtoalt in zip(i[vnav], toalt[vnav]):
+                self.ComputeVNAV(j, jtoalt, actwp.xtoalt[j], actwp.torta[j], actwp.xtorta[j])
 
         # End of reached-loop: the per waypoint i switching loop
 
@@ -379,7 +364,7 @@ class Autopilot(Entity, replaceable=True):
         # use the turn speed
 
         # Is turn speed specified and are we not already slow enough? We only decelerate for turns, not accel.
-        turntas       = np.where(bs.traf.actwp.nextturnspd>0.0, vcas2tas(bs.traf.actwp.nextturnspd, bs.traf.alt),
+        turntas       = np.where(bs.traf.actwp.nextturnspd>0.0, vcas2tas(bs.traf.actwp.nextturnspd, bs.traf.alt, bs.traf.atmos),
                                  -1.0+0.*bs.traf.tas)
         # Switch is now whether the aircraft has any turn waypoints
         swturnspd     = bs.traf.actwp.nextturnidx > 0
@@ -392,7 +377,7 @@ class Autopilot(Entity, replaceable=True):
         # Note that because nextspd comes from the stack, and can be either a mach number or
         # a calibrated airspeed, it can only be converted from Mach / CAS [kts] to TAS [m/s]
         # once the altitude is known.
-        nexttas = vcasormach2tas(bs.traf.actwp.nextspd, bs.traf.alt)
+        nexttas = vcasormach2tas(bs.traf.actwp.nextspd, bs.traf.alt, bs.traf.atmos)
 #
         dxspdconchg = distaccel(bs.traf.tas, nexttas, bs.traf.perf.axmax)
 
@@ -443,7 +428,7 @@ class Autopilot(Entity, replaceable=True):
         self.inturn = np.logical_or(useturnspd,inoldturn)
 
         # Below crossover altitude: CAS=const, above crossover altitude: Mach = const
-        self.tas = vcasormach2tas(bs.traf.selspd, bs.traf.alt)
+        self.tas = vcasormach2tas(bs.traf.selspd, bs.traf.alt, bs.traf.atmos)
 
     def ComputeVNAV(self, idx, toalt, xtoalt, torta, xtorta):
         """
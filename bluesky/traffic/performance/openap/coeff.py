@@ -1,11 +1,16 @@
 """ OpenAP performance library. """
 import json
-import pandas as pd
+import pickle
+import numpy as np
 import bluesky as bs
+from bluesky.tools import cachefile
 
 
 bs.settings.set_variable_defaults(perf_path_openap="performance/OpenAP")
 
+# Version of the cached coefficient table
+table_version = 'v20261018'
+
 LIFT_FIXWING = 1  # fixwing aircraft
 LIFT_ROTOR = 2  # rotor aircraft
 
@@ -13,9 +18,21 @@ ENG_TYPE_TF = 1  # turbofan, fixwing
 ENG_TYPE_TP = 2  # turboprop, fixwing
 ENG_TYPE_TS = 3  # turboshlft, rotor
 
+# Parameters in the coefficient table that are set for all aircraft, only
+# for fixwing aircraft, and only for rotorcraft
+PARAMS = ["lifttype", "mass", "engnum", "vsmin", "vsmax", "hmax", "cd0_clean", "k_clean",
+          "cd0_to", "k_to", "cd0_ld", "k_ld", "delta_cd_gear"]
+PARAMS_FIXWING = ["Sref", "ff_coeff_a", "ff_coeff_b", "ff_coeff_c", "engthrmax", "engbpr",
+                  "vminic", "vminer", "vminap", "vmaxic", "vmaxer", "vmaxap", "axmax",
+                  "vminto", "hcross", "mmo"]
+PARAMS_ROTOR = ["engpower", "vmin", "vmax"]
+
 
 class Coefficient:
     def __init__(self):
+        # pandas is imported when the coefficients are loaded, not at startup
+        import pandas as pd
+
         # Load synonyms.dat text file into dictionary
         self.synodict = {}
         with open(bs.resource(bs.settings.perf_path_openap) / 'synonym.dat', "r") as f_syno:
@@ -48,6 +65,7 @@ class Coefficient:
 
     def _load_all_fixwing_flavor(self):
         import warnings
+        import pandas as pd
 
         warnings.simplefilter("ignore")
 
@@ -86,6 +104,8 @@ class Coefficient:
     def _load_all_fixwing_envelop(self):
         """load aircraft envelop from the model database,
         All unit in SI"""
+        import pandas as pd
+
         limits_fixwing = {}
         for mdl, ac in self.acs_fixwing.items():
             fenv = bs.resource(bs.settings.perf_path_openap) / "fixwing/wrap" / (mdl.lower() + ".txt")
@@ -167,3 +187,131 @@ class Coefficient:
                 bs.scr.echo(warn)
 
         return limits_rotor
+
+
+class CoeffTable:
+    """ Compiled OpenAP coefficient table, with one row of performance
+        parameters per aircraft type.
+
+        The rows are sorted by type name, and the row number is the integer
+        code of the type. The last row has the parameters of unknown types.
+        Synonyms have their own row, with the parameters of the type they
+        refer to.
+
+        Arguments:
+        - names: sorted array of the known type names
+        - actype: type of which the parameters are used, per row
+        - params: dict with an array of each parameter, one value per row
+    """
+    def __init__(self, names, actype, params):
+        self.names = names
+        self.actype = actype
+        self.params = params
+        self.default = len(names)
+
+    def typecodes(self, actypes):
+        """ Integer codes of the given aircraft types. """
+        actypes = np.char.upper(np.asarray(actypes, dtype=str))
+        codes = np.searchsorted(self.names, actypes)
+        codes[codes == len(self.names)] = 0
+        known = self.names[codes] == actypes
+        return np.where(known, codes, self.default)
+
+    @classmethod
+    def compile(cls, coeff):
+        """ Compile the table from the nested dicts of a Coefficient object,
+            with the same selection of parameters per type as looking them
+            up one aircraft at a time. """
+        names = set(coeff.actypes_fixwing) | set(coeff.actypes_rotor) | \
+            set(coeff.synodict) | set(coeff.dragpolar_fixwing)
+        names = np.array(sorted(names), dtype=str)
+        actype = []
+        params = {name: np.full(len(names) + 1, np.nan) for name in PARAMS + PARAMS_FIXWING + PARAMS_ROTOR}
+        # The last row is for unknown types, which get the parameters of the B744
+        for row, name in enumerate(names.tolist() + [""]):
+            mdl, values = cls._lookup(coeff, name)
+            actype.append(mdl)
+            for param, value in values.items():
+                params[param][row] = value
+        return cls(names, actype, params)
+
+    @staticmethod
+    def _lookup(coeff, actype):
+        """ Look up the performance parameters of one aircraft type. Returns
+            the type of which the parameters are used, and a dict with the
+            parameters. """
+        from bluesky.traffic.performance.openap import thrust
+        values = {}
+
+        # Check synonym file if not in open ap actypes
+        if actype not in coeff.actypes_rotor and actype not in coeff.dragpolar_fixwing:
+            actype = coeff.synodict.get(actype, actype)
+
+        # initialize aircraft / engine performance parameters
+        # check fixwing or rotor, default to fixwing
+        if actype in coeff.actypes_rotor:
+            ac = coeff.acs_rotor[actype]
+            values["lifttype"] = LIFT_ROTOR
+            values["mass"] = 0.5 * (ac["oew"] + ac["mtow"])
+            values["engnum"] = int(ac["n_engines"])
+            values["engpower"] = ac["engines"][0][1]
+        else:
+            # convert to known aircraft type
+            if actype not in coeff.actypes_fixwing:
+                actype = "B744"
+            ac = coeff.acs_fixwing[actype]
+
+            # populate fuel flow model, with the first engine of the aircraft
+            e = next(iter(ac["engines"].values()))
+            values["ff_coeff_a"], values["ff_coeff_b"], values["ff_coeff_c"] = \
+                thrust.compute_eng_ff_coeff(e["ff_idl"], e["ff_app"], e["ff_co"], e["ff_to"])
+            values["lifttype"] = LIFT_FIXWING
+            values["Sref"] = ac["wa"]
+            values["mass"] = 0.5 * (ac["oew"] + ac["mtow"])
+            values["engnum"] = int(ac["n_engines"])
+            values["engthrmax"] = e["thr"]
+            values["engbpr"] = e["bpr"]
+
+        # init type specific coefficients for flight envelops
+        if actype in coeff.limits_rotor:  # rotorcraft
+            limits = coeff.limits_rotor[actype]
+            for param in ("vmin", "vmax", "vsmin", "vsmax", "hmax"):
+                values[param] = limits[param]
+        else:
+            if actype not in coeff.limits_fixwing:
+                actype = "B744"
+            limits = coeff.limits_fixwing[actype]
+            for param in ("vminic", "vminer", "vminap", "vmaxic", "vmaxer", "vmaxap",
+                          "vsmin", "vsmax", "hmax", "axmax", "vminto", "mmo"):
+                values[param] = limits[param]
+            values["hcross"] = limits["crosscl"]
+            # Types without a drag polar get the mean drag polar of all types
+            dragpolar = coeff.dragpolar_fixwing.get(actype, coeff.dragpolar_fixwing["NA"])
+            for param in ("cd0_clean", "k_clean", "cd0_to", "k_to", "cd0_ld", "k_ld",
+                          "delta_cd_gear"):
+                values[param] = dragpolar[param]
+
+        return actype, values
+
+
+def load_table():
+    """ Load the compiled coefficient table from the cache, or compile it
+        from the OpenAP data files and cache it when they have changed. """
+    path = bs.resource(bs.settings.perf_path_openap)
+    # The cache is out of date when any of the data files has changed
+    files = sorted(f for f in path.glob("**/*") if f.is_file())
+    version = (table_version, [(f.relative_to(path).as_posix(), f.stat().st_mtime_ns,
+                                f.stat().st_size) for f in files])
+    try:
+        with cachefile.openfile("openap.p", version) as cache:
+            return CoeffTable(*cache.load())
+    except (pickle.PickleError, cachefile.CacheError, OSError, EOFError):
+        pass
+
+    table = CoeffTable.compile(Coefficient())
+    try:
+        with cachefile.openfile("openap.p", version) as cache:
+            cache.dump((table.names, table.actype, table.params))
+    except OSError:
+        pass
+    return table
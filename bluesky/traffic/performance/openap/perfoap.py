@@ -22,7 +22,9 @@ class OpenAP(PerfBase):
         self.ac_warning = False  # aircraft mdl to default warning
         self.eng_warning = False  # aircraft engine to default warning
 
-        self.coeff = coeff.Coefficient()
+        # With lazy startup, the coefficient table is loaded when it is first used
+        self._table = None if bs.settings.lazy_startup else coeff.load_table()
+        self._coeff = None
 
         with self.settrafarrays():
             self.lifttype = np.array([])  # lift type, fixwing [1] or rotor [2]
@@ -53,124 +55,39 @@ class OpenAP(PerfBase):
             self.hcross = np.array([])
             self.mmo = np.array([])
 
+    @property
+    def table(self):
+        ''' The compiled OpenAP coefficient table. '''
+        if self._table is None:
+            self._table = coeff.load_table()
+        return self._table
+
+    @property
+    def coeff(self):
+        ''' The OpenAP aircraft and engine coefficients, parsed from the data
+            files when they are first used. '''
+        if self._coeff is None:
+            self._coeff = coeff.Coefficient()
+        return self._coeff
+
     def create(self, n=1):
-        # cautious! considering multiple created aircraft with same type
         super().create(n)
 
-        actype = bs.traf.type[-1].upper()
-
-        # Check synonym file if not in open ap actypes
-        if (actype not in self.coeff.actypes_rotor) and (
-            actype not in self.coeff.dragpolar_fixwing
-        ):
-            if actype in self.coeff.synodict.keys():
-                # warn = f"Warning: {actype} replaced by {self.coeff.synodict[actype]}"
-                # print(warn)
-                # bs.scr.echo(warn)
-                actype = self.coeff.synodict[actype]
-
-        # initialize aircraft / engine performance parameters
-        # check fixwing or rotor, default to fixwing
-        if actype in self.coeff.actypes_rotor:
-            self.lifttype[-n:] = coeff.LIFT_ROTOR
-            self.mass[-n:] = 0.5 * (
-                self.coeff.acs_rotor[actype]["oew"]
-                + self.coeff.acs_rotor[actype]["mtow"]
-            )
-            self.engnum[-n:] = int(self.coeff.acs_rotor[actype]["n_engines"])
-            self.engpower[-n:] = self.coeff.acs_rotor[actype]["engines"][0][1]
-
-        else:
-            # convert to known aircraft type
-            if actype not in self.coeff.actypes_fixwing:
-                # warn = f"Warning: {actype} replaced by B744"
-                # print(warn)
-                # bs.scr.echo(warn)
-                actype = "B744"
-
-            # populate fuel flow model
-            es = self.coeff.acs_fixwing[actype]["engines"]
-            e = es[list(es.keys())[0]]
-            coeff_a, coeff_b, coeff_c = thrust.compute_eng_ff_coeff(
-                e["ff_idl"], e["ff_app"], e["ff_co"], e["ff_to"]
-            )
-
-            self.lifttype[-n:] = coeff.LIFT_FIXWING
-
-            self.Sref[-n:] = self.coeff.acs_fixwing[actype]["wa"]
-            self.mass[-n:] = 0.5 * (
-                self.coeff.acs_fixwing[actype]["oew"]
-                + self.coeff.acs_fixwing[actype]["mtow"]
-            )
-
-            self.engnum[-n:] = int(self.coeff.acs_fixwing[actype]["n_engines"])
-
-            self.ff_coeff_a[-n:] = coeff_a
-            self.ff_coeff_b[-n:] = coeff_b
-            self.ff_coeff_c[-n:] = coeff_c
-
-            all_ac_engs = list(self.coeff.acs_fixwing[actype]["engines"].keys())
-            self.engthrmax[-n:] = self.coeff.acs_fixwing[actype]["engines"][
-                all_ac_engs[0]
-            ]["thr"]
-            self.engbpr[-n:] = self.coeff.acs_fixwing[actype]["engines"][
-                all_ac_engs[0]
-            ]["bpr"]
-
-        # init type specific coefficients for flight envelops
-        if actype in self.coeff.limits_rotor.keys():  # rotorcraft
-            self.vmin[-n:] = self.coeff.limits_rotor[actype]["vmin"]
-            self.vmax[-n:] = self.coeff.limits_rotor[actype]["vmax"]
-            self.vsmin[-n:] = self.coeff.limits_rotor[actype]["vsmin"]
-            self.vsmax[-n:] = self.coeff.limits_rotor[actype]["vsmax"]
-            self.hmax[-n:] = self.coeff.limits_rotor[actype]["hmax"]
-
-            self.vsmin[-n:] = self.coeff.limits_rotor[actype]["vsmin"]
-            self.vsmax[-n:] = self.coeff.limits_rotor[actype]["vsmax"]
-            self.hmax[-n:] = self.coeff.limits_rotor[actype]["hmax"]
-
-            self.cd0_clean[-n:] = np.nan
-            self.k_clean[-n:] = np.nan
-            self.cd0_to[-n:] = np.nan
-            self.k_to[-n:] = np.nan
-            self.cd0_ld[-n:] = np.nan
-            self.k_ld[-n:] = np.nan
-            self.delta_cd_gear[-n:] = np.nan
-
-        else:
-            if actype not in self.coeff.limits_fixwing.keys():
-                actype = "B744"
-
-            self.vminic[-n:] = self.coeff.limits_fixwing[actype]["vminic"]
-            self.vminer[-n:] = self.coeff.limits_fixwing[actype]["vminer"]
-            self.vminap[-n:] = self.coeff.limits_fixwing[actype]["vminap"]
-            self.vmaxic[-n:] = self.coeff.limits_fixwing[actype]["vmaxic"]
-            self.vmaxer[-n:] = self.coeff.limits_fixwing[actype]["vmaxer"]
-            self.vmaxap[-n:] = self.coeff.limits_fixwing[actype]["vmaxap"]
-
-            self.vsmin[-n:] = self.coeff.limits_fixwing[actype]["vsmin"]
-            self.vsmax[-n:] = self.coeff.limits_fixwing[actype]["vsmax"]
-            self.hmax[-n:] = self.coeff.limits_fixwing[actype]["hmax"]
-            self.axmax[-n:] = self.coeff.limits_fixwing[actype]["axmax"]
-            self.vminto[-n:] = self.coeff.limits_fixwing[actype]["vminto"]
-            self.hcross[-n:] = self.coeff.limits_fixwing[actype]["crosscl"]
-            self.mmo[-n:] = self.coeff.limits_fixwing[actype]["mmo"]
-
-            self.cd0_clean[-n:] = self.coeff.dragpolar_fixwing[actype]["cd0_clean"]
-            self.k_clean[-n:] = self.coeff.dragpolar_fixwing[actype]["k_clean"]
-            self.cd0_to[-n:] = self.coeff.dragpolar_fixwing[actype]["cd0_to"]
-            self.k_to[-n:] = self.coeff.dragpolar_fixwing[actype]["k_to"]
-            self.cd0_ld[-n:] = self.coeff.dragpolar_fixwing[actype]["cd0_ld"]
-            self.k_ld[-n:] = self.coeff.dragpolar_fixwing[actype]["k_ld"]
-            self.delta_cd_gear[-n:] = self.coeff.dragpolar_fixwing[actype][
-                "delta_cd_gear"
-            ]
+        # Gather the performance parameters of each aircraft from the row of
+        # its type in the coefficient table
+        codes = self.table.typecodes(bs.traf.type[-n:])
+        fixwing = self.table.params["lifttype"][codes] == coeff.LIFT_FIXWING
+        for params, sel in ((coeff.PARAMS, slice(None)),
+                            (coeff.PARAMS_FIXWING, fixwing),
+                            (coeff.PARAMS_ROTOR, ~fixwing)):
+            for param in params:
+                getattr(self, param)[-n:][sel] = self.table.params[param][codes[sel]]
 
         # append update actypes, after removing unknown types
-        self.actype[-n:] = [actype] * n
+        self.actype[-n:] = [self.table.actype[code] for code in codes]
 
         # Update envelope speed limits
-        mask = np.zeros_like(self.actype, dtype=bool)
+        mask = np.zeros(len(self.actype), dtype=bool)
         mask[-n:] = True
         self.vmin[-n:], self.vmax[-n:] = self._construct_v_limits(mask)
 
@@ -207,7 +124,7 @@ class OpenAP(PerfBase):
         self.k[self.phase == ph.DE] = self.k_clean[self.phase == ph.DE]
         self.k[self.phase == ph.NA] = self.k_clean[self.phase == ph.NA]
 
-        rho = aero.vdensity(bs.traf.alt[idx_fixwing])
+        rho = bs.traf.rho[idx_fixwing]
         vtas = bs.traf.tas[idx_fixwing]
         rhovs = 0.5 * rho * vtas ** 2 * self.Sref[idx_fixwing]
         cl = self.mass[idx_fixwing] * aero.g0 / rhovs
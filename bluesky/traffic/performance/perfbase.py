@@ -17,7 +17,7 @@ class PerfBase(Entity, replaceable=True):
         super().__init__()
         with self.settrafarrays():
             # --- fixed parameters ---
-            self.actype = np.array([], dtype=str)  # aircraft type
+            self.actype = []  # aircraft type
             self.Sref = np.array([])  # wing reference surface area [m^2]
             self.engtype = np.array([])  # integer, aircraft.ENG_TF...
 
@@ -10,6 +10,7 @@ from bluesky.tools.misc import degto180, txt2tim, txt2alt, txt2spd
 from bluesky.tools.position import txt2pos
 from bluesky import stack
 from bluesky.stack.cmdparser import Command, command, commandgroup
+from .routetable import RouteTable, TableView
 
 
 
@@ -37,6 +38,20 @@ class Route(Replaceable):
     # Aircraft route objects
     _routes: WeakValueDictionary[str, 'Route'] = WeakValueDictionary()
 
+    # Flat table with the waypoint data of all routes
+    table = RouteTable(dest)
+
+    # Flight plan data, calculated by calcfp: views of the rows of a route in the route table
+    wpdirfrom = TableView()  # [deg] direction leg to wp
+    wpdirto   = TableView()  # [deg] direction leg from wp
+    wpdistto  = TableView()  # [nm] leg length to wp
+    wpialt    = TableView()  # wp index of next altitude constraint
+    wptoalt   = TableView()  # [m] next alt contraint
+    wpxtoalt  = TableView()  # [m] distance ot next alt constraint
+    wpirta    = TableView()  # wp index of next time constraint
+    wptorta   = TableView()  # [s] next time constraint
+    wpxtorta  = TableView()  # [m] distance to next time constaint
+
     def __init__(self, acid):
         # Add self to dictionary of all aircraft routes
         Route._routes[acid] = self
@@ -64,6 +79,9 @@ class Route(Replaceable):
         # Current actual waypoint
         self.iactwp = -1
 
+        # Rows of this route in the route table (None when not in the table)
+        self.wprows = None
+
         # Set to default addwpt wpmode
         # Note that neither flyby nor flyturn means: flyover)
         self.swflyby   = True    # Default waypoints are flyby waypoint
@@ -80,14 +98,12 @@ class Route(Replaceable):
         # default: False
         self.flag_landed_runway = False
 
-        self.wpdirfrom = []  # [deg] direction leg to wp
-        self.wpdirto   = []  # [deg] direction leg from wp
-        self.wpdistto  = []  # [nm] leg length to wp
-        self.wpialt    = []
-        self.wptoalt   = []  # [m] next alt contraint
-        self.wpxtoalt  = []  # [m] distance ot next alt constraint
-        self.wptorta   = []  # [s] next time constraint
-        self.wpxtorta  = []  # [m] distance to next time constaint
+    def __getstate__(self):
+        ''' Return the route data for copying and pickling. A copy gets its
+            own rows in the route table when it is used. '''
+        state = self.__dict__.copy()
+        state['wprows'] = None
+        return state
 
     @staticmethod
     def get_available_name(data, name_, len_=2):
@@ -99,7 +115,7 @@ class Route(Replaceable):
         fmt_ = "{:0" + str(len_) + "d}"
 
         # Avoid using call sign without number
-        if bs.traf.id.count(name_) > 0:
+        if bs.traf.id2idx(name_) >= 0:
             appi = 1
             name_ = name_+fmt_.format(appi)
 
@@ -1086,15 +1102,41 @@ class Route(Replaceable):
 
     def getnextwp(self):
         """Go to next waypoint and return data"""
+        landed = self.flag_landed_runway
+        lnavon = self.nextwp()
+        nextqdr = -999. if landed else self.getnextqdr()
+        swlastwp = (self.iactwp == self.nwp - 1)
+
+        return self.wplat[self.iactwp],self.wplon[self.iactwp],   \
+               self.wpalt[self.iactwp],self.wpspd[self.iactwp],   \
+               self.wpxtoalt[self.iactwp],self.wptoalt[self.iactwp],\
+               self.wpxtorta[self.iactwp],self.wptorta[self.iactwp],\
+               lnavon,self.wpflyby[self.iactwp], \
+               self.wpflyturn[self.iactwp], self.wpturnrad[self.iactwp], \
+               self.wpturnspd[self.iactwp], self.wpturnhdgr[self.iactwp],\
+               nextqdr, swlastwp
+
+    @staticmethod
+    def getnextwps(routes):
+        """Go to next waypoint for a list of routes, and return the data
+           of the new active waypoints and next turn waypoints as arrays"""
+        lnavon = np.array([route.nextwp() for route in routes], dtype=bool)
+        wpdata = Route.table.gather(routes)
+        wpdata['lnavon'] = lnavon
+        # Landed aircraft and aircraft at the last waypoint have no next leg
+        wpdata['nextqdr'] = np.where(lnavon, wpdata['nextqdr'], -999.)
+        wpdata['swlastwp'] = np.array([route.iactwp == route.nwp - 1
+                                       for route in routes], dtype=bool)
+        return wpdata
+
+    def nextwp(self):
+        """Go to next waypoint, returns whether LNAV stays on"""
 
         if self.flag_landed_runway:
 
             # when landing, LNAV is switched off
             lnavon = False
 
-            # no further waypoint
-            nextqdr = -999.
-
             # and the aircraft just needs a fixed heading to
             # remain on the runway
             # syntax: HDG acid,hdg (deg,True)
@@ -1125,16 +1167,7 @@ class Route(Replaceable):
             # delete aircraft
             stack.stack("DELAY " + "42 " + "DEL " + str(self.acid))
 
-            swlastwp = (self.iactwp == self.nwp - 1)
-
-            return self.wplat[self.iactwp],self.wplon[self.iactwp],   \
-                           self.wpalt[self.iactwp],self.wpspd[self.iactwp],   \
-                           self.wpxtoalt[self.iactwp],self.wptoalt[self.iactwp], \
-                           self.wpxtorta[self.iactwp], self.wptorta[self.iactwp], \
-                           lnavon,self.wpflyby[self.iactwp], \
-                           self.wpflyturn[self.iactwp],self.wpturnrad[self.iactwp], \
-                           self.wpturnspd[self.iactwp], self.wpturnhdgr[self.iactwp], \
-                           nextqdr, swlastwp
+            return lnavon
 
         # Switch LNAV off when last waypoint has been passed
         lnavon = self.iactwp < self.nwp -1
@@ -1143,11 +1176,6 @@ class Route(Replaceable):
         if lnavon:
             self.iactwp += 1
 
-        # Activate switch to indicate that this is the last waypoint (for lenient passing logic in actwp.Reached function)
-        swlastwp = (self.iactwp == self.nwp-1)
-
-        nextqdr = self.getnextqdr()
-
         # in case that there is a runway, the aircraft should remain on it
         # instead of deviating to the airport centre
         # When there is a destination: current = runway, next  = Dest
@@ -1161,15 +1189,7 @@ class Route(Replaceable):
 
         #print ("getnextwp:",self.wpname[self.iactwp],"   torta = ",self.wptorta[self.iactwp])
 
-
-        return self.wplat[self.iactwp],self.wplon[self.iactwp],   \
-               self.wpalt[self.iactwp],self.wpspd[self.iactwp],   \
-               self.wpxtoalt[self.iactwp],self.wptoalt[self.iactwp],\
-               self.wpxtorta[self.iactwp],self.wptorta[self.iactwp],\
-               lnavon,self.wpflyby[self.iactwp], \
-               self.wpflyturn[self.iactwp], self.wpturnrad[self.iactwp], \
-               self.wpturnspd[self.iactwp], self.wpturnhdgr[self.iactwp],\
-               nextqdr, swlastwp
+        return lnavon
 
     def runactwpstack(self):
         for cmdline in self.wpstack[self.iactwp]:
@@ -1231,11 +1251,20 @@ class Route(Replaceable):
         del acrte.wpspd[wpidx]
         del acrte.wprta[wpidx]
         del acrte.wptype[wpidx]
+        del acrte.wpflyby[wpidx]
+        del acrte.wpstack[wpidx]
+        del acrte.wpflyturn[wpidx]
+        del acrte.wpturnrad[wpidx]
+        del acrte.wpturnspd[wpidx]
+        del acrte.wpturnhdgr[wpidx]
         if acrte.iactwp > wpidx:
             acrte.iactwp = max(0, acrte.iactwp - 1)
 
         acrte.iactwp = min(acrte.iactwp, acrte.nwp - 1)
 
+        # Update the leg data of the remaining waypoints
+        acrte.calcfp()
+
         # If no waypoints left, make sure to disable LNAV/VNAV
         if acrte.nwp==0 and (acidx or acidx==0):
             bs.traf.swlnav[acidx]    =  False
@@ -1268,118 +1297,9 @@ class Route(Replaceable):
         # Direction to waypoint
         self.nwp = len(self.wpname)
 
-        # Create cleared flight plan calculation table
-        self.wpdirfrom   = self.nwp*[0.]  # [deg] Direction of leg laving this waypoint
-        self.wpdirto     = self.nwp*[0.]  # [deg] Direction of leg ot this waypoint (if it exists)
-        self.wpdistto    = self.nwp*[0.]  # [nm] Distance of leg to this waypoint in nm
-        self.wpialt      = self.nwp*[-1]  # wp index of next alttud constraint
-        self.wptoalt     = self.nwp*[-999.] # [m] next alt contraint
-        self.wpxtoalt    = self.nwp*[1.]  # [m] dist to next alt constraint, default 1.0 to avoid division by zero
-        self.wpirta      = self.nwp*[-1]  # wp index of next time constraint
-        self.wptorta     = self.nwp*[-999.] # [s] next time constraint
-        self.wpxtorta    = self.nwp*[1.]  # [m] dist to next time constraint, default 1.0 to avoid division by zero
-
-        # No waypoints: make empty variables to be safe and return: nothing to do
-        if self.nwp==0:
-            return
-
-        # Calculate lateral leg data
-        # LNAV: Calculate leg distances and directions
-
-        for i in range(0, self.nwp - 1):
-            qdr,dist = geo.qdrdist(self.wplat[i]  ,self.wplon[i],
-                                self.wplat[i+1],self.wplon[i+1])
-            self.wpdirfrom[i] = qdr    # [deg]
-            self.wpdistto[i+1]  = dist #[nm]  distto is in nautical miles
-
-        # Also add "from direction" as to directions so no need to shift for actwpdata
-        # direction to will be overwritten in actwpdata in case of a direct to
-        # Add current pos to first waypoint as default value for direction to 1st waypoint
-        iac = bs.traf.id2idx(self.acid)
-        qdr,dist = geo.qdrdist(bs.traf.lat[iac],bs.traf.lon[iac],
-                               self.wplat[0],self.wplon[0])
-        self.wpdirto = [qdr]+self.wpdirfrom[0:-1] #[deg] Direction to waypoints
-
-        # Continue flying in the saem direction
-        if self.nwp>1:
-            self.wpdirfrom[-1] = self.wpdirfrom[-2]
-
-        # Calculate longitudinal leg data
-        # VNAV: calc next altitude constraint: index, altitude and distance to it
-        ialt = -1     # index to waypoint with next altitude constraint
-        toalt = -999. # value of next altitude constraint
-        xtoalt = 0.   # distance to next altitude constraint from this wp
-        for i in range(self.nwp-1,-1,-1):
-
-            # waypoint with altitude constraint (dest of al specified)
-            if self.wptype[i]==Route.dest:
-                ialt   = i
-                toalt  = 0.
-                xtoalt = 0.                # [m]
-
-            elif self.wpalt[i] >= 0:
-                ialt   = i
-                toalt  = self.wpalt[i]
-                xtoalt = 0.                # [m]
-
-            # waypoint with no altitude constraint:keep counting
-            else:
-                if i!=self.nwp-1:
-                    xtoalt = xtoalt + self.wpdistto[i+1]*nm  # [m] xtoalt is in meters!
-                else:
-                    xtoalt = 0.0
-
-            self.wpialt[i]   = ialt
-            self.wptoalt[i]  = toalt   #[m]
-            self.wpxtoalt[i] = xtoalt  #[m]
-
-        # RTA: calc next rta constraint: index, altitude and distance to it
-        # If any RTA.
-        if any(np.array(self.wprta)>=0.0):
-            #print("Yes, I found RTAs")
-            irta = -1       # index of wp
-            torta = -999.   # next rta value
-            xtorta = 0.     # distance to next rta
-            for i in range(self.nwp - 1, -1, -1):
-
-                # waypoint with rta: reset counter, update rts
-                if self.wprta[i] >= 0:
-                    irta = i
-                    torta = self.wprta[i]
-                    xtorta = 0.  # [m]
-
-                # waypoint with no altitude constraint:keep counting
-                else:
-                    if i != self.nwp - 1:
-                        # No speed or rta constraint: add to xtorta
-                        if self.wpspd[i] <= 0.0:
-                            xtorta = xtorta + self.wpdistto[i + 1] * nm  # [m] xtoalt is in meters!
-                        else:
-                            # speed constraint on this leg: shift torta to account for this
-                            # altitude unknown
-                            if self.wptoalt[i] >0.:
-                                alt = toalt
-                            else:
-                                # TODO: current a/c altitude would be better guess, but not accessible here
-                                # as we do not know aircraft index for this route
-                                alt = 10000.*ft # default to minimize errors, when no alt constraints are present
-                            legtas = casormach2tas(self.wpspd[i],alt)
-                            #TODO: account for wind at this position vy adding wind vectors to waypoints?
-
-                            # xtorta stays the same! This leg will not be available for RTA scheduling, so distance
-                            # is not in xtorta. Therefore we need to subtract legtime to ignore this leg for the RTA
-                            # scheduling
-                            legtime = self.wpdistto[i+1]/legtas
-                            torta = torta - legtime
-                    else:
-                        xtorta = 0.0
-                        torta = -999.0
-
-                self.wpirta[i]   = irta
-                self.wptorta[i]  = torta  # [s]
-                self.wpxtorta[i] = xtorta  # [m]
-            #print("wpxtorta=",self.wpxtorta)
-            #print("wptorta=", self.wptorta)
+        # The calculations are done in the route table, for all edited routes at once,
+        # when the flight plan data (wpdirfrom, wptoalt, ...) of a route is used next
+        Route.table.markdirty(self)
 
     def findact(self,i):
         """ Find best default active waypoint.
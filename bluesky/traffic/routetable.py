@@ -0,0 +1,271 @@
+""" Fleet-wide table of the waypoint and flight plan data of all routes. """
+from itertools import chain
+from weakref import WeakSet
+import numpy as np
+import bluesky as bs
+from bluesky.tools import geo
+from bluesky.tools.aero import ft, nm, casormach2tas
+
+
+class RouteTable:
+    """
+    Flat table with the waypoints of all routes.
+
+    The waypoints of each route are stored back to back in contiguous
+    arrays, and each route has a slice of rows (route.wprows) in these
+    arrays (CSR-style). This allows the guidance to gather the active
+    waypoint data of many aircraft at once with fancy indexing.
+
+    The waypoint lists of a route (wplat, wpalt, ...) are edited by the
+    route commands. Route.calcfp marks the route dirty, and the next time
+    the table is used all dirty routes are packed at the end of the table,
+    and their flight plan (leg directions and distances, and the next
+    altitude and time constraints) is calculated in one vectorised pass.
+    The flight plan data of a route (wptoalt, wpxtoalt, ...) are views of
+    its rows in the table. The rows of replaced and deleted routes are
+    dropped when the table is compacted.
+    """
+
+    # Waypoint data, copied from the wp-prefixed lists of each route
+    wpfields = ('lat', 'lon', 'alt', 'spd', 'rta', 'type', 'flyby',
+                'flyturn', 'turnrad', 'turnspd', 'turnhdgr')
+
+    # Flight plan data calculated by the table
+    fpfields = ('dirfrom', 'dirto', 'distto', 'ialt', 'toalt', 'xtoalt',
+                'irta', 'torta', 'xtorta', 'nextqdr')
+
+    def __init__(self, desttype):
+        self.desttype = desttype  # Waypoint type of destinations
+        self.routes = WeakSet()  # All routes in the table
+        self.dirty = WeakSet()   # Routes that need to be repacked
+        self.size = 0            # Number of used waypoint rows
+        self.packed = 0          # Number of rows after the last compaction
+        self.data = {name: np.zeros(0, dtype=int if name in ('ialt', 'irta') else float)
+                     for name in self.wpfields + self.fpfields}
+        self.nextturn = np.zeros(0, dtype=int)  # Row of next flyturn wp, or -1
+
+    def markdirty(self, route):
+        """ Repack the waypoints of this route before the table is used. """
+        self.dirty.add(route)
+
+    def view(self, route, name):
+        """ Get the rows of one column of the table that belong to a route. """
+        if route.wprows is None or route in self.dirty:
+            self.dirty.add(route)
+            self.update()
+        return self.data[name][route.wprows]
+
+    def update(self):
+        """ Pack the waypoints of all dirty routes at the end of the table,
+            and calculate their flight plans. """
+        if not self.dirty:
+            return
+        if self.size > max(1024, 2 * self.packed):
+            # Most rows belong to old versions of routes: repack everything
+            routes = list(self.routes | self.dirty)
+            self.size = 0
+        else:
+            routes = list(self.dirty)
+        self.dirty.clear()
+        self.routes.update(routes)
+
+        nwp = np.array([len(route.wpname) for route in routes], dtype=int)
+        start, end = self.size, self.size + nwp.sum()
+        self.grow(end)
+        offsets = start + np.cumsum(nwp) - nwp
+        for route, offset, n in zip(routes, offsets, nwp):
+            route.wprows = slice(offset, offset + n)
+
+        for name in self.wpfields:
+            self.data[name][start:end] = np.fromiter(chain.from_iterable(
+                getattr(route, 'wp' + name)[:n] for route, n in zip(routes, nwp)),
+                dtype=float, count=end - start)
+
+        self.size = end
+        if start == 0:
+            self.packed = end
+
+        if end > start:
+            self.calcfp(routes, offsets, nwp)
+
+    def grow(self, size):
+        """ Make sure the table arrays can hold size rows. """
+        capacity = len(self.nextturn)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity)
+        for name, arr in self.data.items():
+            self.data[name] = np.resize(arr, capacity)
+        self.nextturn = np.resize(self.nextturn, capacity)
+
+    def calcfp(self, routes, offsets, nwp):
+        """ Flight plan calculations for the rows of a list of routes.
+
+            This is the vectorised version of the per-route loops: leg
+            directions and distances, and for each waypoint the distance to
+            the next altitude and time constraints along the route.
+        """
+        start, end = offsets[0], offsets[-1] + nwp[-1]
+        rows = np.arange(start, end)
+        first = np.repeat(offsets, nwp)          # First row of the route of each row
+        last = first + np.repeat(nwp, nwp) - 1   # Last row of the route of each row
+        lat, lon = self.data['lat'][start:end], self.data['lon'][start:end]
+
+        # LNAV: Calculate leg distances and directions
+        dirfrom, dirto, distto = np.zeros((3, end - start))
+        leg = rows < last
+        qdr, dist = geo.qdrdist(lat[:-1], lon[:-1], lat[1:], lon[1:])
+        dirfrom[:-1] = np.where(leg[:-1], qdr, 0.)  # [deg]
+        distto[1:] = np.where(leg[:-1], dist, 0.)   # [nm]
+
+        # Direction to first waypoint from current aircraft position,
+        # followed by the "from" directions of the previous waypoints
+        dirto[1:] = dirfrom[:-1]
+        ifirst = offsets[nwp > 0] - start
+        iac = np.array(bs.traf.id2idx([route.acid for route in routes]), dtype=int)[nwp > 0]
+        if bs.traf.ntraf > 0:
+            dirto[ifirst] = geo.qdrdist(bs.traf.lat[iac], bs.traf.lon[iac],
+                                        lat[ifirst], lon[ifirst])[0]
+        else:
+            dirto[ifirst] = 0.
+
+        # Continue flying in the same direction after the last waypoint
+        ilast = offsets[nwp > 1] + nwp[nwp > 1] - 1 - start
+        dirfrom[ilast] = dirfrom[ilast - 1]
+
+        # Direction of the next leg for the guidance, -999 at the last waypoint
+        nextqdr = np.where(leg, dirfrom, -999.)
+
+        # VNAV: next altitude constraint (destination or specified altitude):
+        # index, altitude and distance to it, counted along the route
+        alt = self.data['alt'][start:end]
+        isdest = self.data['type'][start:end] == self.desttype
+        altco = isdest | (alt >= 0.)
+        ialt = nextrow(altco, rows, last)
+        hasalt = ialt >= 0
+        toalt = np.where(hasalt, np.where(isdest, 0., alt)[np.where(hasalt, ialt, rows) - start], -999.)  # [m]
+
+        # Distance (in m) from each waypoint to the next constraint, or to the
+        # last waypoint when there are no more constraints. The distances are
+        # summed per route, so that they don't depend on the other routes that
+        # are packed together with this route
+        xtoalt = np.zeros(end - start)
+        iend = np.where(hasalt, ialt, last) - start
+        for offset, n in zip(offsets[nwp > 0] - start, nwp[nwp > 0]):
+            legdist = np.cumsum(distto[offset:offset + n] * nm)
+            xtoalt[offset:offset + n] = legdist[iend[offset:offset + n] - offset] - legdist
+
+        # RTA: time constraints are rare, calculate those routes one by one
+        irta = np.full(end - start, -1)
+        torta = np.full(end - start, -999.)
+        xtorta = np.ones(end - start)
+        rta = self.data['rta'][start:end]
+        rtaroutes = np.unique(np.searchsorted(offsets, rows[rta >= 0.0], side='right') - 1)
+        for offset, n in zip(offsets[rtaroutes] - start, nwp[rtaroutes]):
+            calcrta(self.data['spd'][start + offset:start + offset + n],
+                    rta[offset:offset + n], distto[offset:offset + n],
+                    toalt[offset:offset + n],
+                    irta[offset:offset + n], torta[offset:offset + n],
+                    xtorta[offset:offset + n])
+
+        # Indices of constraints are relative to the start of each route
+        for name, value in (('dirfrom', dirfrom), ('dirto', dirto), ('distto', distto),
+                            ('ialt', np.where(hasalt, ialt - first, -1)),
+                            ('toalt', toalt), ('xtoalt', xtoalt),
+                            ('irta', irta),
+                            ('torta', torta), ('xtorta', xtorta), ('nextqdr', nextqdr)):
+            self.data[name][start:end] = value
+
+        # Next flyturn waypoint at or after each waypoint, within the same route
+        self.nextturn[start:end] = nextrow(self.data['flyturn'][start:end] > 0., rows, last)
+
+    def gather(self, routes):
+        """ Get the data of the active waypoints of a list of routes.
+
+            Returns a dict with an array per waypoint field, and the data of
+            the next flyturn waypoint of each route (nextturnlat, nextturnlon,
+            nextturnspd, nextturnrad, nextturnhdgr and nextturnidx).
+        """
+        for route in routes:
+            if route.wprows is None:
+                self.dirty.add(route)
+        self.update()
+        offset = np.fromiter((route.wprows.start for route in routes), dtype=int,
+                             count=len(routes))
+        iwp = offset + np.fromiter((route.iactwp for route in routes),
+                                   dtype=int, count=len(routes))
+        wpdata = {name: arr[iwp] for name, arr in self.data.items()}
+
+        # Next turn waypoint, with the defaults of Route.getnextturnwp()
+        itrn = self.nextturn[iwp]
+        hasturn = itrn >= 0
+        itrn = np.where(hasturn, itrn, 0)
+        wpdata['nextturnlat'] = np.where(hasturn, self.data['lat'][itrn], 0.)
+        wpdata['nextturnlon'] = np.where(hasturn, self.data['lon'][itrn], 0.)
+        for name in ('spd', 'rad', 'hdgr'):
+            wpdata['nextturn' + name] = np.where(
+                hasturn, self.data['turn' + name][itrn], -999.)
+        wpdata['nextturnidx'] = np.where(hasturn, itrn - offset, -999)
+        return wpdata
+
+
+class TableView:
+    """ Route attribute that is a view of a column of the route table. """
+    def __set_name__(self, owner, name):
+        self.name = name[2:]  # Strip the wp prefix
+
+    def __get__(self, route, owner=None):
+        if route is None:
+            return self
+        return type(route).table.view(route, self.name)
+
+
+def nextrow(mask, rows, last):
+    """ Row of the first True element of mask at or after each row, within
+        the same route (rows up to last). -1 when there is none. """
+    nxt = np.minimum.accumulate(np.where(mask, rows, rows[-1] + 1)[::-1])[::-1]
+    return np.where(nxt <= last, nxt, -1)
+
+
+def calcrta(spd, rta, distto, toalt, irta, torta, xtorta):
+    """ Calculate the next time constraint of each waypoint of one route. """
+    nwp = len(rta)
+    irta_ = -1      # index of wp
+    torta_ = -999.  # next rta value
+    xtorta_ = 0.    # distance to next rta
+    for i in range(nwp - 1, -1, -1):
+
+        # waypoint with rta: reset counter, update rts
+        if rta[i] >= 0:
+            irta_ = i
+            torta_ = rta[i]
+            xtorta_ = 0.  # [m]
+
+        # waypoint with no altitude constraint:keep counting
+        elif i != nwp - 1:
+            # No speed or rta constraint: add to xtorta
+            if spd[i] <= 0.0:
+                xtorta_ = xtorta_ + distto[i + 1] * nm  # [m] xtoalt is in meters!
+            else:
+                # speed constraint on this leg: shift torta to account for this
+                # altitude unknown
+                if toalt[i] > 0.:
+                    alt = toalt[0]
+                else:
+                    # TODO: current a/c altitude would be better guess, but not accessible here
+                    # as we do not know aircraft index for this route
+                    alt = 10000. * ft  # default to minimize errors, when no alt constraints are present
+                legtas = casormach2tas(spd[i], alt)
+
+                # xtorta stays the same! This leg will not be available for RTA scheduling, so distance
+                # is not in xtorta. Therefore we need to subtract legtime to ignore this leg for the RTA
+                # scheduling
+                legtime = distto[i + 1] / legtas
+                torta_ = torta_ - legtime
+        else:
+            xtorta_ = 0.0
+            torta_ = -999.0
+
+        irta[i] = irta_
+        torta[i] = torta_  # [s]
+        xtorta[i] = xtorta_  # [m]
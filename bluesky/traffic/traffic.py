@@ -10,7 +10,7 @@ from random import randint
 import numpy as np
 
 import bluesky as bs
-from bluesky.core import Entity, timed_function
+from bluesky.core import Entity, timed_function, simprof, simtime
 from bluesky.stack import refdata
 from bluesky.stack.recorder import savecmd
 from bluesky.tools import geo
@@ -32,7 +32,8 @@ from .trafficgroups import TrafficGroups
 from .performance.perfbase import PerfBase
 
 # Register settings defaults
-bs.settings.set_variable_defaults(performance_model='openap', asas_dt=1.0)
+bs.settings.set_variable_defaults(performance_model='openap', asas_dt=1.0,
+                                  traf_stateblock=False)
 
 # if bs.settings.performance_model == 'bada':
 #     try:
@@ -74,6 +75,10 @@ class Traffic(Entity):
         # Traffic is the toplevel trafficarrays object
         self.setroot(self)
 
+        # Optionally store all float traffic arrays in one contiguous block
+        if bs.settings.traf_stateblock:
+            self.enablestateblock()
+
         self.ntraf = 0
 
         self.cond = Condition()  # Conditional commands list
@@ -158,9 +163,15 @@ class Traffic(Entity):
             self.eps    = np.array([])  # Small nonzero numbers
             self.work   = np.array([])  # Work done throughout the flight
 
+        # Adaptive schedule of conflict detection (see ADAPTDT)
+        self.asasschedule = simtime.Schedule.makeschedule('asas', pairwise=True)
+
         # Default bank angles per flight phase
         self.bphase = np.deg2rad(np.array([15, 35, 35, 35, 15, 45]))
 
+        # Lookup table of aircraft id -> index, kept current by cre and delete
+        self.idmap = dict()
+
     def reset(self):
         ''' Clear all traffic data upon simulation reset. '''
         # Some child reset functions depend on a correct value of self.ntraf
@@ -168,6 +179,7 @@ class Traffic(Entity):
         # This ensures that the traffic arrays (which size is dynamic)
         # are all reset as well, so all lat,lon,sdp etc but also objects adsb
         super().reset()
+        self.idmap.clear()
 
         # reset performance model
         self.perf.reset()
@@ -209,7 +221,7 @@ class Traffic(Entity):
 
         if isinstance(acid, str):
             # Check if not already exist
-            if self.id.count(acid.upper()) > 0:
+            if acid.upper() in self.idmap:
                 return False, acid + " already exists."  # already exists do nothing
             acid = n * [acid]
 
@@ -235,6 +247,9 @@ class Traffic(Entity):
         # Aircraft Info
         self.id[-n:]   = acid
         self.type[-n:] = actype
+        # Like list.index, the map refers to the first aircraft with an id
+        for i, acidi in enumerate(self.id[-n:], self.ntraf - n):
+            self.idmap.setdefault(acidi, i)
 
         # Positions
         self.lat[-n:]  = aclat
@@ -303,6 +318,31 @@ class Traffic(Entity):
 
         return True
 
+    def cre_batch(self, acid, actype, aclat, aclon, achdg, acalt, acspd):
+        """ Create a batch of aircraft in one pass, with one value per aircraft
+            in each of the argument sequences. Aircraft whose id already
+            exists, or occurs earlier in the batch, are skipped.
+
+            Returns a boolean array indicating which aircraft were created. """
+        acid = [a.upper() for a in acid]
+        created = np.zeros(len(acid), dtype=bool)
+        seen = set()
+        for i, a in enumerate(acid):
+            if a not in self.idmap and a not in seen:
+                seen.add(a)
+                created[i] = True
+        if not seen:
+            return created
+
+        idx = np.flatnonzero(created)
+        self.cre([acid[i] for i in idx], [actype[i] for i in idx],
+                 np.asarray(aclat, dtype=float)[idx],
+                 np.asarray(aclon, dtype=float)[idx],
+                 np.asarray(achdg, dtype=float)[idx],
+                 np.asarray(acalt, dtype=float)[idx],
+                 np.asarray(acspd, dtype=float)[idx])
+        return created
+
     def creconfs(self, acid, actype, targetidx, dpsi, dcpa, tlosh, dH=None, tlosv=None, spd=None):
         ''' Create an aircraft in conflict with target aircraft.
 
@@ -383,12 +423,30 @@ class Traffic(Entity):
         # (which will use list in reverse order to avoid index confusion)
         if isinstance(idx, Collection):
             idx = np.sort(idx)
+        delidx = np.atleast_1d(idx)
+        if len(delidx) == 0:
+            return True
+        # When ids are unique, only the map entries of the deleted aircraft
+        # and those after them need to be updated
+        unique = len(self.idmap) == self.ntraf
+        if unique:
+            for i in delidx:
+                self.idmap.pop(self.id[i], None)
 
         # Call the actual delete function
         super().delete(idx)
 
         # Update number of aircraft
         self.ntraf = len(self.lat)
+
+        if unique:
+            # Aircraft after the first deleted one have shifted in index
+            i0 = int(delidx[0])
+            self.idmap.update(zip(self.id[i0:], range(i0, self.ntraf)))
+        else:
+            self.idmap.clear()
+            for i, acidi in enumerate(self.id):
+                self.idmap.setdefault(acidi, i)
         return True
 
     def update(self):
@@ -397,15 +455,20 @@ class Traffic(Entity):
             return
 
         #---------- Atmosphere --------------------------------
+        t0 = simprof.tic()
         self.p, self.rho, self.Temp = vatmos(self.alt)
+        t0 = simprof.toc('traffic.atmosphere', t0)
 
         #---------- ADSB Update -------------------------------
         self.adsb.update()
+        t0 = simprof.toc('traffic.adsb', t0)
 
         #---------- Fly the Aircraft --------------------------
         self.ap.update()  # Autopilot logic
+        t0 = simprof.toc('traffic.autopilot', t0)
         self.update_asas()  # Airborne Separation Assurance
         self.aporasas.update()   # Decide to use autopilot or ASAS for commands
+        t0 = simprof.toc('traffic.asas', t0)
 
         #---------- Performance Update ------------------------
         self.perf.update()
@@ -414,27 +477,50 @@ class Traffic(Entity):
         self.aporasas.tas, self.aporasas.vs, self.aporasas.alt = \
             self.perf.limits(self.aporasas.tas, self.aporasas.vs,
                              self.aporasas.alt, self.ax)
+        t0 = simprof.toc('traffic.performance', t0)
 
         #---------- Kinematics --------------------------------
         self.update_airspeed()
         self.update_groundspeed()
         self.update_pos()
+        t0 = simprof.toc('traffic.kinematics', t0)
 
         #---------- Simulate Turbulence -----------------------
         self.turbulence.update()
+        t0 = simprof.toc('traffic.turbulence', t0)
 
         # Check whether new traffic state triggers conditional commands
         self.cond.update()
+        t0 = simprof.toc('traffic.conditions', t0)
 
         #---------- Aftermath ---------------------------------
         self.trails.update()
+        simprof.toc('traffic.trails', t0)
+
+    @property
+    def atmos(self):
+        ''' Atmosphere (p, rho, T) at the altitudes of the aircraft, as
+            calculated at the start of the traffic update. '''
+        return self.p, self.rho, self.Temp
 
     @timed_function(name='asas', dt=bs.settings.asas_dt, manual=True)
     def update_asas(self):
-        # Conflict detection and resolution
-        self.cd.update(self, self)
+        # Conflict detection and resolution. With an adaptive schedule only
+        # the pairs with an aircraft that has priority or whose turn it is
+        # are evaluated
+        active = self.asasschedule.select(self.asaspriority) \
+            if self.cd.partialdetect else None
+        self.cd.update(self, self, active)
         self.cr.update(self.cd, self, self)
 
+    def asaspriority(self):
+        ''' Aircraft of which the conflicts are detected in every ASAS
+            update with an adaptive schedule: aircraft in conflict or
+            resolving one, climbing or descending, and aircraft that will
+            reach their active waypoint within two minutes. '''
+        return (self.cd.inconf != 0) | self.cr.active | (np.abs(self.vs) > 0.5) | \
+            (self.swlnav & (self.ap.dist2wp < 120.0 * self.gs))
+
     def update_airspeed(self):
         # Compute horizontal acceleration
         delta_spd = self.aporasas.tas - self.tas
@@ -442,8 +528,8 @@ class Traffic(Entity):
         self.ax = need_ax * np.sign(delta_spd) * self.perf.axmax
         # Update velocities
         self.tas = np.where(need_ax, self.tas + self.ax * bs.sim.simdt, self.aporasas.tas)
-        self.cas = vtas2cas(self.tas, self.alt)
-        self.M = vtas2mach(self.tas, self.alt)
+        self.cas = vtas2cas(self.tas, self.alt, self.atmos)
+        self.M = vtas2mach(self.tas, self.alt, self.atmos)
 
         # Turning bank triangle
         # tan phi = a centrigugal/a grav = omega^2 * R / g = omega * V /g
@@ -514,18 +600,13 @@ class Traffic(Entity):
         """Find index of aircraft id"""
         if not isinstance(acid, str):
             # id2idx is called for multiple id's
-            # Fast way of finding indices of all ACID's in a given list
-            tmp = dict((v, i) for i, v in enumerate(self.id))
-            return [tmp.get(acidi, -1) for acidi in acid]
+            return [self.idmap.get(acidi, -1) for acidi in acid]
         else:
              # Catch last created id (* or # symbol)
             if acid in ('#', '*'):
                 return self.ntraf - 1
 
-            try:
-                return self.id.index(acid.upper())
-            except:
-                return -1
+            return self.idmap.get(acid.upper(), -1)
 
     def setnoise(self, noise=None):
         """Noise (turbulence, ADBS-transmission noise, ADSB-truncated effect)"""
@@ -698,7 +779,7 @@ class Traffic(Entity):
 
 
                     # How many others?
-                    nother = bs.navdb.wpid.count(wp)-len(iwps)
+                    nother = len(bs.navdb.wpindex.get(wp, []))-len(iwps)
                     if nother>0:
                         verb = ["is ","are "][min(1,max(0,nother-1))]
                         lines = lines +"\nThere "+verb + str(nother) +\
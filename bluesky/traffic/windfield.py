@@ -2,7 +2,6 @@
 from numpy import array, sin, cos, arange, radians, ones, append, ndarray, \
                   minimum, repeat, delete, zeros, maximum, floor, interp, \
                   pi, concatenate, unique
-from scipy.interpolate import interp1d, RegularGridInterpolator
 from bluesky.tools.aero import ft
 
 class Windfield():
@@ -75,6 +74,9 @@ class Windfield():
             Optionally an array with altitudes can be used
         """              
         if windalt is not None and len(windalt) > 1:           
+            # Only needed for wind profiles, so not imported at startup
+            from scipy.interpolate import interp1d, RegularGridInterpolator
+
             # Set altitude interpolation functions
             fnorth = interp1d(windalt, vnorth.T, bounds_error=False, 
                               fill_value=(vnorth[0], vnorth[-1]), assume_sorted=True)
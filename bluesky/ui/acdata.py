@@ -0,0 +1,110 @@
+''' Vectorised preparation of aircraft data for display: labels, colours,
+    SSD selection and CPA lines of all aircraft in one set of numpy
+    operations. '''
+import numpy as np
+
+from bluesky.tools import geo
+from bluesky.tools.aero import ft, nm, kts
+
+# Number of characters of an aircraft label (3 lines of 8 characters)
+LABEL_SIZE = 24
+
+# Characters of the vertical speed arrows in the font
+VS_UP, VS_DOWN, VS_LEVEL = 30, 31, 32
+
+POW10 = 10**np.arange(10, dtype=np.int64)
+
+
+def itoa(values, width, zeropad=False):
+    ''' Format integers of at most 10 digits as left-aligned text, like
+        '%-<width>d', or as '%0<width>d' when zeropad is True. Returns an
+        array of shape (n, width) with the character codes. Values that
+        don't fit in the field are cut off at its width. '''
+    values = np.asarray(values).astype(np.int64)
+    neg = values < 0
+    absval = np.abs(values)
+    ndigits = 1 + np.searchsorted(POW10[1:], absval, side='right')
+    if zeropad:
+        ndigits = np.maximum(ndigits, width - neg)
+
+    text = np.full((len(values), width), ord(' '), dtype=np.uint8)
+    text[neg, 0] = ord('-')
+    for col in range(width):
+        # Power of ten of the digit in this column
+        power = ndigits - 1 - col + neg
+        valid = (power >= 0) & (power < ndigits)
+        text[valid, col] = ord('0') + absval[valid] // POW10[power[valid]] % 10
+    return text
+
+
+def make_labels(acid, alt, vs, cas, translvl, show_lbl=2):
+    ''' Make the labels of all aircraft: the callsign, and with show_lbl == 2
+        also the altitude or flight level, a vertical speed arrow and the
+        calibrated airspeed. Returns an array of shape (n, LABEL_SIZE) with
+        the character codes, or an empty array when labels are off. '''
+    if not show_lbl:
+        return np.zeros((0, LABEL_SIZE), dtype=np.uint8)
+    labels = np.full((len(acid), LABEL_SIZE), ord(' '), dtype=np.uint8)
+    if len(acid) == 0:
+        return labels
+
+    # Callsigns of at most 8 characters, padded with spaces
+    ids = np.asarray(acid, dtype='U8').view(np.uint32).reshape(-1, 8)
+    labels[:, :8] = np.where(ids == 0, ord(' '), np.where(ids > 127, ord('?'), ids))
+
+    if show_lbl == 2:
+        alt = np.asarray(alt)
+        abovetl = alt > translvl
+        labels[:, 8:13] = itoa(alt / ft + 0.5, 5)
+        labels[abovetl, 8:10] = (ord('F'), ord('L'))
+        labels[abovetl, 10:13] = itoa(alt[abovetl] / ft / 100.0 + 0.5, 3, zeropad=True)
+        labels[:, 13] = np.where(np.asarray(vs) > 0.25, VS_UP,
+                                 np.where(np.asarray(vs) < -0.25, VS_DOWN, VS_LEVEL))
+        labels[:, 16:] = itoa(np.asarray(cas) / kts + 0.5, 8)
+    return labels
+
+
+def make_colors(acid, ingroup, inconf, default, conflict, groupcolors=None,
+                accolors=None):
+    ''' Make the RGBA colours of all aircraft: the conflict colour for aircraft
+        in conflict, and otherwise the colour of the aircraft in accolors,
+        the colour of its first group in groupcolors, or the default colour.
+        Returns an array of shape (n, 4). '''
+    color = np.empty((len(inconf), 4), dtype=np.uint8)
+    color[:, :3] = default[:3]
+    color[:, 3] = 255
+    if groupcolors:
+        ingroup = np.asarray(ingroup)
+        # The first group in the dict that matches takes precedence
+        for groupmask, groupcolor in reversed(list(groupcolors.items())):
+            color[(ingroup & groupmask) != 0, :3] = groupcolor[:3]
+    if accolors:
+        idx = np.flatnonzero(np.isin(np.asarray(acid), list(accolors)))
+        for i in idx:
+            color[i, :3] = accolors[acid[i]][:3]
+    color[np.asarray(inconf, dtype=bool), :3] = conflict[:3]
+    return color
+
+
+def make_selssd(acid, inconf, ssd_all=False, ssd_conflicts=False, ssd_ownship=()):
+    ''' Make the selection of aircraft for which the SSD is drawn (255) or
+        not (0). '''
+    if ssd_all:
+        return np.full(len(inconf), 255, dtype=np.uint8)
+    sel = np.zeros(len(inconf), dtype=bool)
+    if ssd_conflicts:
+        sel |= np.asarray(inconf, dtype=bool)
+    if len(ssd_ownship):
+        sel |= np.isin(np.asarray(acid), list(ssd_ownship))
+    return np.where(sel, 255, 0).astype(np.uint8)
+
+
+def make_cpalines(lat, lon, trk, tcpa, gs, inconf):
+    ''' Make the vertices of the lines from each aircraft in conflict to its
+        position at the closest point of approach. Returns a float32 array
+        with lat0, lon0, lat1, lon1 of each line. '''
+    idx = np.flatnonzero(inconf)
+    lat0, lon0 = np.asarray(lat)[idx], np.asarray(lon)[idx]
+    lat1, lon1 = geo.qdrpos(lat0, lon0, np.asarray(trk)[idx],
+                            np.asarray(tcpa)[idx] * np.asarray(gs)[idx] / nm)
+    return np.column_stack((lat0, lon0, lat1, lon1)).astype(np.float32).ravel()
@@ -924,6 +924,12 @@ class GLBuffer(QOpenGLBuffer):
         if self.size() != size:
             print(f'GLBuffer: Warning: could not allocate buffer of size {size}. Actual size is {self.size()}')
 
+    def resize(self, size):
+        ''' Reallocate the buffer with a new size. The contents of the buffer
+            are discarded, the attribute bindings of VAOs remain valid. '''
+        self.bind()
+        self.allocate(size)
+
     def update(self, data, offset=0, size=None):
         ''' Send new data to this GL buffer. '''
         dbuf, dsize = content_and_size(data)
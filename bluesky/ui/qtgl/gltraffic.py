@@ -3,10 +3,9 @@ import numpy as np
 from bluesky.ui.qtgl import glhelpers as glh
 
 import bluesky as bs
-from bluesky.tools import geo
 from bluesky import settings
-from bluesky.ui import palette
-from bluesky.tools.aero import ft, nm, kts
+from bluesky.ui import palette, acdata
+from bluesky.tools.aero import ft, kts
 
 # Register settings defaults
 settings.set_variable_defaults(
@@ -33,6 +32,7 @@ class Traffic(glh.RenderObject, layer=100):
         super().__init__(parent)
         self.initialized = False
         self.route_acid = ''
+        self.nacmax = MAX_NAIRCRAFT
         self.asas_vmin = settings.asas_vmin
         self.asas_vmax = settings.asas_vmax
         self.hdg = glh.GLBuffer()
@@ -242,6 +242,15 @@ class Traffic(glh.RenderObject, layer=100):
             self.route.set_vertex_count(0)
             self.routelbl.n_instances = 0
 
+    def resize(self, naircraft):
+        ''' Grow the per-aircraft GPU buffers to fit naircraft aircraft. '''
+        self.nacmax = max(naircraft, 2 * self.nacmax)
+        for buf, itemsize in ((self.hdg, 4), (self.lat, 4), (self.lon, 4),
+                              (self.alt, 4), (self.tas, 4), (self.color, 4),
+                              (self.lbl, acdata.LABEL_SIZE), (self.asasn, 24),
+                              (self.asase, 24), (self.rpz, 4), (self.ssd.selssd, 1)):
+            buf.resize(self.nacmax * itemsize)
+
     def update_aircraft_data(self, data):
         ''' Update GPU buffers with new aircraft simulation data. '''
         if not self.initialized:
@@ -251,14 +260,12 @@ class Traffic(glh.RenderObject, layer=100):
         actdata = bs.net.get_nodedata()
         if actdata.filteralt:
             idx = np.where(
-                (data.alt >= actdata.filteralt[0]) * (data.alt <= actdata.filteralt[1]))
-            data.lat = data.lat[idx]
-            data.lon = data.lon[idx]
-            data.trk = data.trk[idx]
-            data.alt = data.alt[idx]
-            data.tas = data.tas[idx]
-            data.vs = data.vs[idx]
-            data.rpz = data.rpz[idx]
+                (data.alt >= actdata.filteralt[0]) * (data.alt <= actdata.filteralt[1]))[0]
+            for name in ('lat', 'lon', 'trk', 'alt', 'tas', 'gs', 'cas', 'vs', 'rpz',
+                         'inconf', 'tcpamax', 'ingroup', 'asasn', 'asase'):
+                if hasattr(data, name):
+                    setattr(data, name, np.asarray(getattr(data, name))[idx])
+            data.id = [data.id[i] for i in idx]
         naircraft = len(data.lat)
         actdata.translvl = data.translvl
         actdata.casmachthr = data.casmachthr
@@ -268,6 +275,9 @@ class Traffic(glh.RenderObject, layer=100):
         if naircraft == 0:
             self.cpalines.set_vertex_count(0)
         else:
+            if naircraft > self.nacmax:
+                self.resize(naircraft)
+
             # Update data in GPU buffers
             self.lat.update(np.array(data.lat, dtype=np.float32))
             self.lon.update(np.array(data.lon, dtype=np.float32))
@@ -280,69 +290,27 @@ class Traffic(glh.RenderObject, layer=100):
                 self.asase.update(np.array(data.asase, dtype=np.float32))
 
             # CPA lines to indicate conflicts
-            ncpalines = np.count_nonzero(data.inconf)
-
-            cpalines = np.zeros(4 * ncpalines, dtype=np.float32)
-            self.cpalines.set_vertex_count(2 * ncpalines)
+            cpalines = acdata.make_cpalines(data.lat, data.lon, data.trk,
+                                            data.tcpamax, data.gs, data.inconf)
+            if len(cpalines) > 4 * MAX_NCONFLICTS:
+                cpalines = cpalines[:4 * MAX_NCONFLICTS]
+            self.cpalines.set_vertex_count(len(cpalines) // 2)
+            self.cpalines.update(vertex=cpalines)
 
             # Labels and colors
-            rawlabel = ''
-            color = np.empty(
-                (min(naircraft, MAX_NAIRCRAFT), 4), dtype=np.uint8)
-            selssd = np.zeros(naircraft, dtype=np.uint8)
-            confidx = 0
-
-            zdata = zip(data.id, data.ingroup, data.inconf, data.tcpamax, data.trk, data.gs,
-                        data.cas, data.vs, data.alt, data.lat, data.lon)
-            for i, (acid, ingroup, inconf, tcpa,
-                    trk, gs, cas, vs, alt, lat, lon) in enumerate(zdata):
-                if i >= MAX_NAIRCRAFT:
-                    break
-
-                # Make label: 3 lines of 8 characters per aircraft
-                if actdata.show_lbl >= 1:
-                    rawlabel += '%-8s' % acid[:8]
-                    if actdata.show_lbl == 2:
-                        if alt <= data.translvl:
-                            rawlabel += '%-5d' % int(alt / ft + 0.5)
-                        else:
-                            rawlabel += 'FL%03d' % int(alt / ft / 100. + 0.5)
-                        vsarrow = 30 if vs > 0.25 else 31 if vs < -0.25 else 32
-                        rawlabel += '%1s  %-8d' % (chr(vsarrow),
-                                                   int(cas / kts + 0.5))
-                    else:
-                        rawlabel += 16 * ' '
-
-                if inconf:
-                    if actdata.ssd_conflicts:
-                        selssd[i] = 255
-                    color[i, :] = palette.conflict + (255,)
-                    lat1, lon1 = geo.qdrpos(lat, lon, trk, tcpa * gs / nm)
-                    cpalines[4 * confidx: 4 * confidx +
-                             4] = [lat, lon, lat1, lon1]
-                    confidx += 1
-                else:
-                    # Get custom color if available, else default
-                    rgb = palette.aircraft
-                    if ingroup:
-                        for groupmask, groupcolor in actdata.custgrclr.items():
-                            if ingroup & groupmask:
-                                rgb = groupcolor
-                                break
-                    rgb = actdata.custacclr.get(acid, rgb)
-                    color[i, :] = tuple(rgb) + (255,)
-
-                #  Check if aircraft is selected to show SSD
-                if actdata.ssd_all or acid in actdata.ssd_ownship:
-                    selssd[i] = 255
+            if actdata.show_lbl:
+                self.lbl.update(acdata.make_labels(data.id, data.alt, data.vs, data.cas,
+                                                   data.translvl, actdata.show_lbl))
+            self.color.update(acdata.make_colors(data.id, data.ingroup, data.inconf,
+                                                 palette.aircraft, palette.conflict,
+                                                 actdata.custgrclr, actdata.custacclr))
 
             if len(actdata.ssd_ownship) > 0 or actdata.ssd_conflicts or actdata.ssd_all:
-                self.ssd.update(selssd=selssd)
+                self.ssd.update(selssd=acdata.make_selssd(data.id, data.inconf,
+                                                          actdata.ssd_all,
+                                                          actdata.ssd_conflicts,
+                                                          actdata.ssd_ownship))
 
-            self.cpalines.update(vertex=cpalines)
-            self.color.update(color)
-            self.lbl.update(np.array(rawlabel.encode('utf8'), dtype=np.string_))
-            
             # If there is a visible route, update the start position
             if self.route_acid in data.id:
                 idx = data.id.index(self.route_acid)
@@ -5,13 +5,18 @@ except ImportError:
     from PyQt6.QtCore import QTimer
 import numpy as np
 
+import bluesky as bs
 from bluesky.ui import palette
 from bluesky.ui.polytools import PolygonSet
 from bluesky.ui.qtgl.customevents import ACDataEvent, RouteDataEvent
 from bluesky.network.client import Client
+from bluesky.network.deltacodec import DeltaDecoder
 from bluesky.core import Signal
 from bluesky.tools.aero import ft
 
+# Register settings defaults
+bs.settings.set_variable_defaults(gui_acdelta=False, gui_acview=False)
+
 # Globals
 UPDATE_ALL = ['SHAPE', 'TRAILS', 'CUSTWPT', 'PANZOOM', 'ECHOTEXT', 'ROUTEDATA']
 ACTNODE_TOPICS = [b'ACDATA', b'PLOT*', b'ROUTEDATA*']
@@ -19,7 +24,11 @@ ACTNODE_TOPICS = [b'ACDATA', b'PLOT*', b'ROUTEDATA*']
 
 class GuiClient(Client):
     def __init__(self):
-        super().__init__(ACTNODE_TOPICS)
+        # Aircraft data is received either in full, or as keyframes and
+        # changes, of all aircraft, or of the aircraft in view
+        actopic = b'ACDELTA' if bs.settings.gui_acdelta else b'ACDATA'
+        super().__init__([topic for topic in ACTNODE_TOPICS if topic != b'ACDATA'])
+        self.acttopics.append(actopic + self.client_id if bs.settings.gui_acview else actopic)
         self.nodedata = dict()
         self.ref_nodedata = nodeData()
         self.discovery_timer = None
@@ -49,6 +58,15 @@ class GuiClient(Client):
         ''' Guiclient stream handler. '''
         changed = ''
         actdata = self.get_nodedata(sender_id)
+        if name.startswith(b'ACDELTA'):
+            data = actdata.acdecoder.decode(data)
+            if data is None:
+                # A frame was missed: wait for the next keyframe
+                self.send_event(b'ACKEYFRAME', target=sender_id)
+                return
+            name = b'ACDATA'
+        elif name.startswith(b'ACDATA'):
+            name = b'ACDATA'
         if name == b'ACDATA':
             actdata.setacdata(data)
             changed = name.decode('utf8')
@@ -140,6 +158,7 @@ class nodeData:
         self.naircraft = 0
         self.acdata = ACDataEvent()
         self.routedata = RouteDataEvent()
+        self.acdecoder = DeltaDecoder()
 
         # Per-scenario data
         self.clear_scen_data()
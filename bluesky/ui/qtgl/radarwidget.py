@@ -3,9 +3,9 @@ from ctypes import c_float, c_int, Structure
 import numpy as np
 
 try:
-    from PyQt5.QtCore import Qt, QEvent, QT_VERSION
+    from PyQt5.QtCore import Qt, QEvent, QT_VERSION, QTimer
 except ImportError:
-    from PyQt6.QtCore import Qt, QEvent, QT_VERSION
+    from PyQt6.QtCore import Qt, QEvent, QT_VERSION, QTimer
 
 import bluesky as bs
 from bluesky.core import Signal
@@ -105,6 +105,13 @@ class RadarWidget(glh.RenderWidget):
         self.mousepos = (0, 0)
         self.prevmousepos = (0, 0)
 
+        # When only the aircraft in view are received (gui_acview), the view
+        # is also sent to the simulation while panning and zooming
+        self.panzoomtimer = QTimer()
+        self.panzoomtimer.setSingleShot(True)
+        self.panzoomtimer.setInterval(200)
+        self.panzoomtimer.timeout.connect(self.send_panzoom)
+
         self.shaderset = RadarShaders(self)
         self.set_shaderset(self.shaderset)
 
@@ -271,8 +278,15 @@ class RadarWidget(glh.RenderWidget):
         # Update pan and zoom in centralized nodedata
         bs.net.get_nodedata().panzoom((self.panlat, self.panlon), self.zoom)
         self.panzoom_event.emit(False)
+        if bs.settings.gui_acview and not self.panzoomtimer.isActive():
+            self.panzoomtimer.start()
         return True
 
+    def send_panzoom(self):
+        ''' Send the current view to the simulation. '''
+        bs.net.send_event(b'PANZOOM', dict(pan=(self.panlat, self.panlon),
+                                           zoom=self.zoom, ar=self.ar, absolute=True))
+
     def event(self, event):
         ''' Event handling for input events. '''
         if event.type() == QEvent.Type.Wheel:
@@ -358,8 +372,7 @@ class RadarWidget(glh.RenderWidget):
         elif (event.type() == QEvent.Type.MouseButtonRelease or
               event.type() == QEvent.Type.TouchEnd) and self.panzoomchanged:
             self.panzoomchanged = False
-            bs.net.send_event(b'PANZOOM', dict(pan=(self.panlat, self.panlon),
-                                               zoom=self.zoom, ar=self.ar, absolute=True))
+            self.send_panzoom()
             self.panzoom_event.emit(True)
         elif int(event.type()) == 216:
             # 216 is screen change event, but doesn't exist (yet) in pyqt as enum
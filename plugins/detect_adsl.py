@@ -4,6 +4,7 @@ from bluesky import stack, settings, traf
 from bluesky.tools import geo
 from bluesky.tools.aero import nm, ft
 from bluesky.traffic.asas import ConflictDetection
+from bluesky.traffic.asas.conflicttable import ConflictTable, PairList
 import bluesky as bs
 
 from math import radians, degrees, cos, sin, sqrt
@@ -42,10 +43,10 @@ class DetectADSL(ConflictDetection):
 
         #-------Variables without ADSL effect
         # Conflicts and LoS detected in the current timestep (used for resolving)
-        self.confpairs = list()
-        self.confpairs_groundtruth = list()
-        self.lospairs = list()
-        self.lospairs_groundtruth = list()
+        self.confpairs = PairList()
+        self.confpairs_groundtruth = PairList()
+        self.lospairs = PairList()
+        self.lospairs_groundtruth = PairList()
         self.lospairs_real = list()
         self.qdr = np.array([])
         self.dist = np.array([])
@@ -55,18 +56,11 @@ class DetectADSL(ConflictDetection):
         self.cpa_closest = np.array([])
         self.dist_closest = np.array([])
 
-        # Unique conflicts and LoS in the current timestep (a, b) = (b, a)
-        self.confpairs_unique = set()
-        self.confpairs_unique_real = set()
-        self.lospairs_unique = set()
-        self.lospairs_unique_real = set()
-
-        # All conflicts and LoS since simt=0
-        self.confpairs_all = list()
-        self.lospairs_all = list()
-        self.confpairs_all_real = list()
-        self.lospairs_all_real = list()
-        
+        # Unique conflicts and LoS (a, b) = (b, a) without ADSL effect. The
+        # conftable and lostable of ConflictDetection keep the measured ones.
+        self.conftable_real = ConflictTable(self.acnames, self.acuids)
+        self.lostable_real = ConflictTable(self.acnames, self.acuids)
+
         # Per-aircraft conflict data
         with self.settrafarrays():
             self.inconf = np.array([], dtype=bool)  # In-conflict flag
@@ -114,19 +108,13 @@ class DetectADSL(ConflictDetection):
         self.cpa_closest[cpa_update_indices] = cpa_all[cpa_update_indices]
         self.dist_closest[dist_update_indices] = dist_all[dist_update_indices]
         
-        #check false positive
-        for pair_adsl in confpairs_adsl:
-            if(pair_adsl not in confpairs):
-                self.nb_false_positive += 1
-            else:
-                self.nb_true_positive += 1
-
-        #check false negative
-        for pair in confpairs:
-            if(pair not in confpairs_adsl):
-                self.nb_false_negative += 1
-            # else:
-            #     self.nb_true_negative += 1
+        #check false positive and false negative
+        key = confpairs.i * ownship.ntraf + confpairs.j
+        key_adsl = confpairs_adsl.i * ownship.ntraf + confpairs_adsl.j
+        nb_true_positive = np.count_nonzero(np.isin(key_adsl, key))
+        self.nb_true_positive += nb_true_positive
+        self.nb_false_positive += len(key_adsl) - nb_true_positive
+        self.nb_false_negative += np.count_nonzero(np.isin(key, key_adsl, invert=True))
 
         if(self.use_adsl):
             return confpairs_adsl, lospairs_adsl, inconf_adsl, tcpamax_adsl, \
@@ -143,20 +131,7 @@ class DetectADSL(ConflictDetection):
             self.dist, self.dcpa, self.tcpa, self.tLOS = \
                 self.detect(ownship, intruder, self.rpz, self.hpz, self.dtlookahead)
 
-        # confpairs has conflicts observed from both sides (a, b) and (b, a)
-        # confpairs_unique keeps only one of these
-        confpairs_unique = {frozenset(pair) for pair in self.confpairs}
-        lospairs_unique = {frozenset(pair) for pair in self.lospairs}
-
-        self.confpairs_all.extend(confpairs_unique - self.confpairs_unique)
-        self.lospairs_all.extend(lospairs_unique - self.lospairs_unique)
-
-        self.confpairs_all = list(set(self.confpairs_all))
-        self.lospairs_all = list(set(self.lospairs_all))
-
-        # Update confpairs_unique and lospairs_unique
-        self.confpairs_unique = confpairs_unique
-        self.lospairs_unique = lospairs_unique
+        self.updatetables(ownship)
 
         # get the real metrics, instead of the measured one
         self.confpairs_groundtruth, self.lospairs_groundtruth, inconf, tcpamax, qdr, \
@@ -164,27 +139,42 @@ class DetectADSL(ConflictDetection):
                 self.detect_ideal(ownship, intruder, self.rpz, self.hpz, self.dtlookahead)
         
         # confpairs has conflicts observed from both sides (a, b) and (b, a)
-        # confpairs_unique keeps only one of these
-        confpairs_unique_real = {frozenset(pair) for pair in self.confpairs_groundtruth}
-        lospairs_unique_real = {frozenset(pair) for pair in self.lospairs_groundtruth}
+        # the conflict tables keep only one of these
+        self.conftable_real.update(self.acuid[self.confpairs_groundtruth.i],
+                                   self.acuid[self.confpairs_groundtruth.j], bs.sim.simt)
+        self.lostable_real.update(self.acuid[self.lospairs_groundtruth.i],
+                                  self.acuid[self.lospairs_groundtruth.j], bs.sim.simt)
+
+    @property
+    def confpairs_unique_real(self):
+        return self.conftable_real.unique
+
+    @property
+    def lospairs_unique_real(self):
+        return self.lostable_real.unique
+
+    # The totals of this plugin count each pair once, also when it recurs
+    @property
+    def confpairs_all(self):
+        return self.conftable.allunique
 
-        self.confpairs_all_real.extend(confpairs_unique_real - self.confpairs_unique_real)
-        self.lospairs_all_real.extend(lospairs_unique_real - self.lospairs_unique_real)
+    @property
+    def lospairs_all(self):
+        return self.lostable.allunique
 
-        self.confpairs_all_real = list(set(self.confpairs_all_real))
-        self.lospairs_all_real = list(set(self.lospairs_all_real))
+    @property
+    def confpairs_all_real(self):
+        return self.conftable_real.allunique
 
-        # Update confpairs_unique and lospairs_unique
-        self.confpairs_unique_real = confpairs_unique_real
-        self.lospairs_unique_real = lospairs_unique_real
+    @property
+    def lospairs_all_real(self):
+        return self.lostable_real.allunique
 
     def reset(self):
         super().reset()
         self.clearconfdb()
-        self.confpairs_all.clear()
-        self.lospairs_all.clear()
-        self.confpairs_all_real.clear()
-        self.lospairs_all_real.clear()
+        self.conftable_real.reset()
+        self.lostable_real.reset()
         self.rpz_def = bs.settings.asas_pzr * nm
         self.hpz_def = bs.settings.asas_pzh * ft
         self.dtlookahead_def = bs.settings.asas_dtlookahead
@@ -194,10 +184,10 @@ class DetectADSL(ConflictDetection):
 
     def clearconfdb(self):
         ''' Clear conflict database. '''
-        self.confpairs_unique.clear()
-        self.lospairs_unique.clear()
-        self.confpairs_unique_real.clear()
-        self.lospairs_unique_real.clear()
+        self.conftable.clear()
+        self.lostable.clear()
+        self.conftable_real.clear()
+        self.lostable_real.clear()
         self.confpairs.clear()
         self.lospairs.clear()
         self.qdr = np.array([])
@@ -297,9 +287,9 @@ class DetectADSL(ConflictDetection):
         tcpamax = np.max(tcpa * swconfl, 1)
 
         # Select conflicting pairs: each a/c gets their own record
-        confpairs = [(ownship.id[i], ownship.id[j]) for i, j in zip(*np.where(swconfl))]
+        confpairs = PairList(ownship.id, *np.where(swconfl))
         swlos = (dist < rpz) * (np.abs(dalt) < hpz)
-        lospairs = [(ownship.id[i], ownship.id[j]) for i, j in zip(*np.where(swlos))]
+        lospairs = PairList(ownship.id, *np.where(swlos))
 
         #update value if in los
         # update_indices = np.logical_and(swlos, dcpa2 < closest_ever)
@@ -409,9 +399,9 @@ class DetectADSL(ConflictDetection):
         tcpamax = np.max(tcpa * swconfl, 1)
 
         # Select conflicting pairs: each a/c gets their own record
-        confpairs = [(ownship.id[i], ownship.id[j]) for i, j in zip(*np.where(swconfl))]
+        confpairs = PairList(ownship.id, *np.where(swconfl))
         swlos = (dist < rpz) * (np.abs(dalt) < hpz)
-        lospairs = [(ownship.id[i], ownship.id[j]) for i, j in zip(*np.where(swlos))]
+        lospairs = PairList(ownship.id, *np.where(swlos))
 
         return confpairs, lospairs, inconf, tcpamax, \
             qdr[swconfl], dist[swconfl], np.sqrt(dcpa2[swconfl]), \
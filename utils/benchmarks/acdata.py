@@ -0,0 +1,91 @@
+''' Benchmark of the preparation of aircraft labels, colours and CPA lines
+    for the traffic display.
+
+    Times the per-aircraft loop that the QtGL traffic layer used to build
+    its label, colour and CPA line buffers, and the vectorised functions
+    in bluesky.ui.acdata, for increasing numbers of aircraft.
+
+    Usage: python utils/benchmarks/acdata.py [nmax] [nrepeat]
+'''
+import sys
+import time
+import numpy as np
+
+from bluesky.tools import geo
+from bluesky.tools.aero import ft, nm, kts
+from bluesky.ui import acdata
+
+DEFAULT = (0, 255, 0)
+CONFLICT = (255, 160, 0)
+GROUPCOLORS = {1: (255, 0, 0)}
+
+
+def loop(data, translvl):
+    ''' The per-aircraft loop of the traffic layer. '''
+    rawlabel = ''
+    n = len(data['id'])
+    color = np.empty((n, 4), dtype=np.uint8)
+    cpalines = np.zeros(4 * np.count_nonzero(data['inconf']), dtype=np.float32)
+    confidx = 0
+    zdata = zip(*(data[name] for name in ('id', 'ingroup', 'inconf', 'tcpamax', 'trk',
+                                          'gs', 'cas', 'vs', 'alt', 'lat', 'lon')))
+    for i, (acid, ingroup, inconf, tcpa, trk, gs, cas, vs, alt, lat, lon) in enumerate(zdata):
+        rawlabel += '%-8s' % acid[:8]
+        if alt <= translvl:
+            rawlabel += '%-5d' % int(alt / ft + 0.5)
+        else:
+            rawlabel += 'FL%03d' % int(alt / ft / 100. + 0.5)
+        vsarrow = 30 if vs > 0.25 else 31 if vs < -0.25 else 32
+        rawlabel += '%1s  %-8d' % (chr(vsarrow), int(cas / kts + 0.5))
+        if inconf:
+            color[i, :] = CONFLICT + (255,)
+            lat1, lon1 = geo.qdrpos(lat, lon, trk, tcpa * gs / nm)
+            cpalines[4 * confidx: 4 * confidx + 4] = [lat, lon, lat1, lon1]
+            confidx += 1
+        else:
+            rgb = DEFAULT
+            if ingroup:
+                for groupmask, groupcolor in GROUPCOLORS.items():
+                    if ingroup & groupmask:
+                        rgb = groupcolor
+                        break
+            color[i, :] = tuple(rgb) + (255,)
+    return np.array(rawlabel.encode('utf8'), dtype=np.bytes_), color, cpalines
+
+
+def vectorised(data, translvl):
+    ''' The vectorised functions of bluesky.ui.acdata. '''
+    labels = acdata.make_labels(data['id'], data['alt'], data['vs'], data['cas'], translvl)
+    color = acdata.make_colors(data['id'], data['ingroup'], data['inconf'],
+                               DEFAULT, CONFLICT, GROUPCOLORS)
+    cpalines = acdata.make_cpalines(data['lat'], data['lon'], data['trk'],
+                                    data['tcpamax'], data['gs'], data['inconf'])
+    return labels, color, cpalines
+
+
+def timeit(fun, data, nrepeat):
+    t0 = time.perf_counter()
+    for _ in range(nrepeat):
+        fun(data, 5000.0 * ft)
+    return (time.perf_counter() - t0) / nrepeat
+
+
+def main(nmax=40000, nrepeat=5):
+    rng = np.random.default_rng(42)
+    print(f'{"naircraft":>10s} {"loop [ms]":>10s} {"vectorised [ms]":>16s}')
+    n = 1250
+    while n <= nmax:
+        data = dict(id=[f'AC{i}' for i in range(n)],
+                    alt=rng.uniform(0.0, 12000.0, n), vs=rng.uniform(-10.0, 10.0, n),
+                    cas=rng.uniform(60.0, 180.0, n), gs=rng.uniform(60.0, 250.0, n),
+                    lat=rng.uniform(50.0, 54.0, n), lon=rng.uniform(2.0, 7.0, n),
+                    trk=rng.uniform(0.0, 360.0, n), tcpamax=rng.uniform(0.0, 300.0, n),
+                    inconf=rng.uniform(size=n) < 0.05, ingroup=rng.integers(0, 2, n))
+        tloop = timeit(loop, data, nrepeat)
+        tvec = timeit(vectorised, data, nrepeat)
+        print(f'{n:10d} {1e3 * tloop:10.1f} {1e3 * tvec:16.1f}')
+        n *= 2
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,57 @@
+''' Benchmark of the vectorised atmosphere and speed conversion functions.
+
+    Times vatmos and the CAS/TAS/Mach conversions for an array of random
+    altitudes and speeds, with the exact and the tabulated atmosphere
+    (atmos_table), and with the atmosphere passed to the conversions as it
+    is in the traffic update. Also prints the largest relative difference
+    of the tabulated results with the exact results.
+
+    Usage: python utils/benchmarks/aero.py [n] [nrepeat]
+'''
+import sys
+import time
+import numpy as np
+
+from bluesky import settings
+from bluesky.tools import aero
+
+
+def timeit(name, n, nrepeat, fun):
+    fun()  # Warm-up, e.g., to create the lookup tables
+    t0 = time.perf_counter()
+    for _ in range(nrepeat):
+        fun()
+    dt = (time.perf_counter() - t0) / nrepeat
+    print(f'{name:<32s}: {1e6 * dt:8.1f} us, {1e9 * dt / n:6.1f} ns per aircraft')
+
+
+def main(n=10000, nrepeat=200):
+    rng = np.random.default_rng(42)
+    h = rng.uniform(0.0, 13000.0, n)
+    cas = rng.uniform(60.0, 180.0, n)
+    spd = np.where(rng.uniform(size=n) < 0.3, rng.uniform(0.6, 0.85, n), cas)
+    print(f'Atmosphere benchmark with {n} aircraft')
+
+    results = dict()
+    for table in (False, True):
+        settings.atmos_table = table
+        print('\nTabulated atmosphere' if table else 'Exact atmosphere')
+        atmos = aero.vatmos(h)
+        timeit('vatmos', n, nrepeat, lambda: aero.vatmos(h))
+        timeit('vatmosa', n, nrepeat, lambda: aero.vatmosa(h))
+        timeit('vcas2tas', n, nrepeat, lambda: aero.vcas2tas(cas, h))
+        timeit('vcas2tas with atmos', n, nrepeat, lambda: aero.vcas2tas(cas, h, atmos))
+        timeit('vtas2cas', n, nrepeat, lambda: aero.vtas2cas(cas, h))
+        timeit('vtas2cas with atmos', n, nrepeat, lambda: aero.vtas2cas(cas, h, atmos))
+        timeit('vcasormach2tas', n, nrepeat, lambda: aero.vcasormach2tas(spd, h))
+        timeit('vcasormach2tas with atmos', n, nrepeat,
+               lambda: aero.vcasormach2tas(spd, h, atmos))
+        results[table] = (*atmos, aero.vcas2tas(cas, h), aero.vtas2cas(cas, h))
+
+    settings.atmos_table = False
+    err = max(np.max(np.abs(tab / ref - 1.0)) for tab, ref in zip(results[True], results[False]))
+    print(f'\nLargest relative difference of tabulated results: {err:.2e}')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,63 @@
+''' Benchmark of conflict detection throughput with the number of workers.
+
+    Fills the simulation with random traffic in a dense area, and times the
+    StateBased and ParallelStateBased detection methods, the latter with an
+    increasing number of worker threads (asas_nworkers).
+
+    Usage: python utils/benchmarks/asas.py [ntraf] [maxworkers] [nrepeat]
+'''
+import os
+import sys
+import time
+import numpy as np
+
+import bluesky as bs
+from bluesky.tools.aero import ft, kts, nm
+
+
+def timeit(name, nrepeat, fun):
+    fun()  # Warm-up, e.g., to start the worker threads
+    t0 = time.perf_counter()
+    for _ in range(nrepeat):
+        fun()
+    dt = (time.perf_counter() - t0) / nrepeat
+    print(f'{name:<32s}: {1000.0 * dt:8.1f} ms per detection')
+    return dt
+
+
+def main(ntraf=5000, maxworkers=os.cpu_count() or 1, nrepeat=5):
+    bs.settings.is_sim = True
+    bs.init(mode='sim', detached=True)
+    from bluesky.traffic.asas import StateBased, ParallelStateBased
+
+    print(f'Conflict detection benchmark with {ntraf} aircraft '
+          f'on {os.cpu_count()} cpu cores')
+    rng = np.random.default_rng(42)
+    bs.traf.cre([f'AC{i:05d}' for i in range(ntraf)], 'B744',
+                52.0 + rng.uniform(-2.0, 2.0, ntraf),
+                4.0 + rng.uniform(-3.0, 3.0, ntraf),
+                rng.uniform(0.0, 360.0, ntraf),
+                rng.uniform(2000.0, 10000.0, ntraf) * ft,
+                rng.uniform(100.0, 250.0, ntraf) * kts)
+    rpz = np.full(ntraf, 5.0 * nm)
+    hpz = np.full(ntraf, 1000.0 * ft)
+    dtlookahead = np.full(ntraf, 300.0)
+
+    def detect(method):
+        method.select()
+        cd = method.implinstance()
+        return lambda: cd.detect(bs.traf, bs.traf, rpz, hpz, dtlookahead)
+
+    tref = timeit('StateBased', nrepeat, detect(StateBased))
+    nworkers = 1
+    while nworkers <= maxworkers:
+        bs.settings.asas_nworkers = nworkers
+        dt = timeit(f'ParallelStateBased {nworkers:2d} workers', nrepeat,
+                    detect(ParallelStateBased))
+        print(f'{"":<32s}  speed-up {tref / dt:5.2f}')
+        nworkers *= 2
+    StateBased.select()
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
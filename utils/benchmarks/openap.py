@@ -0,0 +1,55 @@
+''' Benchmark of loading the OpenAP coefficients and creating aircraft.
+
+    Times parsing the OpenAP data files (Coefficient), loading the compiled
+    coefficient table from the cache, and creating aircraft of random mixed
+    types with the OpenAP performance model, one at a time and in a single
+    batch.
+
+    Usage: python utils/benchmarks/openap.py [ntraf] [nrepeat]
+'''
+import sys
+import time
+import numpy as np
+
+import bluesky as bs
+
+
+def timeit(name, nrepeat, fun, setup=None):
+    dt = 0.0
+    for _ in range(nrepeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fun()
+        dt += time.perf_counter() - t0
+    print(f'{name:<32s}: {1000.0 * dt / nrepeat:8.1f} ms')
+
+
+def main(ntraf=2000, nrepeat=5):
+    bs.settings.is_sim = True
+    bs.init(mode='sim', detached=True)
+    from bluesky.traffic.performance.perfbase import PerfBase
+    from bluesky.traffic.performance.openap import coeff, OpenAP
+    OpenAP.select()
+    PerfBase()
+
+    timeit('Coefficient()', nrepeat, coeff.Coefficient)
+    coeff.load_table()
+    timeit('load_table() from cache', nrepeat, coeff.load_table)
+
+    rng = np.random.default_rng(42)
+    table = bs.traf.perf.table
+    actypes = rng.choice(table.names, ntraf).tolist()
+    acid = [f'AC{i:05d}' for i in range(ntraf)]
+    print(f'\nCreating {ntraf} aircraft of {len(set(actypes))} types')
+
+    def one_at_a_time():
+        for i in range(ntraf):
+            bs.traf.cre(acid[i], actypes[i])
+
+    timeit('cre one at a time', nrepeat, one_at_a_time, bs.traf.reset)
+    timeit('cre in one batch', nrepeat, lambda: bs.traf.cre(acid, actypes), bs.traf.reset)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,81 @@
+''' Micro-benchmark of TrafficArrays create and delete throughput.
+
+    Creates a traffic object with a similar number of registered arrays as
+    the BlueSky Traffic object, creates aircraft one by one, and deletes
+    them again, one by one and in batches.
+
+    Usage: python utils/benchmarks/trafficarrays.py [ntraf] [narrays]
+'''
+import sys
+import time
+import numpy as np
+
+from bluesky.core.trafficarrays import TrafficArrays
+
+
+class BenchChild(TrafficArrays):
+    def __init__(self, narrays):
+        super().__init__()
+        with self.settrafarrays():
+            for i in range(narrays):
+                setattr(self, f'arr{i}', np.array([]))
+            self.flags = np.array([], dtype=bool)
+
+
+class BenchRoot(TrafficArrays):
+    def __init__(self, narrays):
+        super().__init__()
+        TrafficArrays.setroot(self)
+        with self.settrafarrays():
+            self.id = []
+            for i in range(narrays // 2):
+                setattr(self, f'arr{i}', np.array([]))
+            self.child = BenchChild(narrays - narrays // 2)
+
+    def create(self, n=1):
+        super().create(n)
+        self.ntraf += n
+        self.create_children(n)
+
+    def delete(self, idx):
+        super().delete(idx)
+        self.ntraf = len(self.id)
+
+
+def timeit(name, ntraf, fun):
+    t0 = time.perf_counter()
+    fun()
+    dt = time.perf_counter() - t0
+    print(f'{name:<28s}: {dt:8.3f} s, {ntraf / dt:10.0f} aircraft/s')
+
+
+def main(ntraf=10000, narrays=150):
+    print(f'TrafficArrays benchmark with {ntraf} aircraft and {narrays} arrays')
+    root = BenchRoot(narrays)
+
+    def create_one():
+        for _ in range(ntraf):
+            root.create(1)
+
+    def create_with_update():
+        # Replace an array after each create, like a simulation step does
+        for _ in range(ntraf):
+            root.create(1)
+            root.arr0 = root.arr0 + 1.0
+
+    def delete_one():
+        for _ in range(ntraf):
+            root.delete(root.ntraf - 1 if root.ntraf % 2 else 0)
+
+    def delete_batch():
+        while root.ntraf:
+            root.delete(np.arange(0, root.ntraf, 2)[:100])
+
+    timeit('create one by one', ntraf, create_one)
+    timeit('delete one by one', ntraf, delete_one)
+    timeit('create with array update', ntraf, create_with_update)
+    timeit('delete in batches of 100', ntraf, delete_batch)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))